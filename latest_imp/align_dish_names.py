@@ -0,0 +1,129 @@
+"""
+Offline alignment of dish names between the two CSVs in data/.
+
+The catalog inner-joins the nutrition and classification CSVs on the exact
+'Dish Name', so a dish spelled slightly differently in one file is
+dropped. This job matches every unjoined nutrition name against the
+unjoined classification names with DishMatcher, keeps one-to-one matches
+at or above --threshold, writes them to the alias file the catalog merges
+with, and reports the coverage gained plus the near misses left for a
+human to review. The alias file is part of the catalog version, so it
+carries no timestamp: re-running with the same result changes nothing.
+
+Usage:
+    python align_dish_names.py [--threshold 0.9] [--review 0.6] [--dry-run]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from catalog import (
+    CatalogError, DISH_ALIASES_FILE, NUTRITION_DATA_FILE, CLASSIFICATION_DATA_FILE,
+    read_nutrition_csv, read_classification_csv,
+)
+from utils.dish_matcher import DishMatcher
+
+ALIAS_FORMAT_VERSION = 1
+
+
+def dish_names(df):
+    return list(dict.fromkeys(df["Dish Name"].astype(str).str.strip(' "')))
+
+
+def align(nutrition_names, classification_names, threshold, review):
+    """
+    (aliases, near_misses): aliases maps nutrition name -> classification
+    name; near_misses lists (nutrition name, best candidate, score) scoring
+    between `review` and `threshold`.
+    """
+    joined = set(nutrition_names) & set(classification_names)
+    targets = [n for n in classification_names if n not in joined]
+    matcher = DishMatcher(targets, threshold=threshold)
+
+    best_for_target, near_misses = {}, []
+    for name in nutrition_names:
+        if name in joined:
+            continue
+        candidates = matcher.candidates(name, n=1)
+        if not candidates:
+            continue
+        match = candidates[0]
+        if match.score >= threshold:
+            current = best_for_target.get(match.dish_id)
+            if current is None or match.score > current[1]:
+                best_for_target[match.dish_id] = (name, match.score)
+        elif match.score >= review:
+            near_misses.append((name, match.dish_name, match.score))
+
+    aliases = {name: targets[dish_id] for dish_id, (name, _) in best_for_target.items()}
+    return aliases, sorted(near_misses, key=lambda m: -m[2])
+
+
+def lookup_latency(matcher, queries, repeats=3):
+    """Median microseconds per DishMatcher.match over `queries`."""
+    samples = []
+    for _ in range(repeats):
+        for query in queries:
+            started = time.perf_counter()
+            matcher.match(query)
+            samples.append(time.perf_counter() - started)
+    return 1e6 * float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Align dish names between the nutrition and classification CSVs.")
+    parser.add_argument("--threshold", type=float, default=0.9, help="minimum trigram similarity for an alias")
+    parser.add_argument("--review", type=float, default=0.6, help="list near misses scoring at least this")
+    parser.add_argument("--out", default=DISH_ALIASES_FILE)
+    parser.add_argument("--dry-run", action="store_true", help="report only, don't write the alias file")
+    args = parser.parse_args()
+
+    try:
+        nutrition_names = dish_names(read_nutrition_csv())
+        classification_names = dish_names(read_classification_csv())
+    except CatalogError as e:
+        print(f"✗ Could not read the data files: {e}")
+        raise SystemExit(1)
+
+    joined = len(set(nutrition_names) & set(classification_names))
+    aliases, near_misses = align(nutrition_names, classification_names, args.threshold, args.review)
+    aligned = joined + len(aliases)
+
+    print(f"nutrition dishes:      {len(nutrition_names)} ({NUTRITION_DATA_FILE})")
+    print(f"classification dishes: {len(classification_names)} ({CLASSIFICATION_DATA_FILE})")
+    print(f"exact join:            {joined} ({joined / len(nutrition_names):.1%} of nutrition, "
+          f"{joined / len(classification_names):.1%} of classification)")
+    print(f"after alignment:       {aligned} ({aligned / len(nutrition_names):.1%} of nutrition, "
+          f"{aligned / len(classification_names):.1%} of classification), +{len(aliases)}")
+    print(f"still unclassified:    {len(nutrition_names) - aligned} nutrition dishes")
+
+    for source, target in sorted(aliases.items()):
+        print(f"  alias  {source!r} -> {target!r}")
+    if near_misses:
+        print(f"\nnear misses for review (score {args.review}-{args.threshold}):")
+        for source, target, score in near_misses:
+            print(f"  {score:.2f}  {source!r} ~ {target!r}")
+
+    matcher = DishMatcher(classification_names)
+    exact_queries = [n.upper() for n in classification_names]
+    fuzzy_queries = [n for n in nutrition_names if n not in set(classification_names)]
+    print(f"\nlookup over {len(classification_names)} names: "
+          f"{lookup_latency(matcher, exact_queries):.1f} µs median normalized-exact, "
+          f"{lookup_latency(matcher, fuzzy_queries):.1f} µs median trigram")
+
+    if args.dry_run:
+        return
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump({
+            "format_version": ALIAS_FORMAT_VERSION,
+            "threshold": args.threshold,
+            "aliases": aliases,
+        }, fh, indent=2, ensure_ascii=False, sort_keys=True)
+        fh.write("\n")
+    print(f"✓ Wrote {len(aliases)} aliases to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
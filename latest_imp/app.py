@@ -2,24 +2,33 @@ import os
 from datetime import date
 
 
-from flask import Flask, request, jsonify, render_template, redirect, url_for,session,flash
+from flask import Flask, request, jsonify, render_template, redirect, url_for,session,flash, send_file
 from werkzeug.utils import secure_filename
 from config import UPLOAD_FOLDER, MAX_CONTENT_LENGTH, SECRET_KEY
-from models import create_meal_doc, update_meal_labels_and_nutrients, get_meal, create_nutrition_plan, plans_col, get_total_intake_for_day, get_queries_for_mother,get_active_plan_for_mother_and_date, users_col, create_alert, get_active_alerts,get_queries_by_mother, meals_col,get_random_doctor_id,get_assigned_mothers,get_user_by_id, upsert_nutrition_plan,get_unread_notifications, mark_notification_as_read , create_notification,get_assigned_mothers_by_asha_id
+from models import create_meal_doc, update_meal_labels_and_nutrients, set_meal_stage, set_meal_images, save_meal_outcome, find_meal_upload, find_analysis_by_image, get_meal, create_nutrition_plan, plans_col, get_total_intake_for_day, get_queries_for_mother,get_active_plan_for_mother_and_date, users_col, create_alert, get_active_alerts,get_queries_by_mother, meals_col,get_random_doctor_id,get_assigned_mothers,get_user_by_id, upsert_nutrition_plan,get_unread_notifications, mark_notification_as_read , create_notification,get_assigned_mothers_by_asha_id, save_weekly_meal_plan, get_weekly_meal_plan, ensure_plan_required_nutrients_is_mapping
 
-from utils.ocr_dummy import analyze_image_dummy
+from utils.image_store import store_upload
+from utils.image_normalize import normalize_in_pool, derived_paths
 from bson.objectid import ObjectId
 from datetime import datetime
 import json
 import random
 from werkzeug.security import generate_password_hash, check_password_hash
 from utils.nutrition_check import compare_nutrients # <-- NEW
-from meal_recommendor import recommend_from_deficits
+import meal_recommendor
+from meal_recommendor import get_ranking_cache_stats, schedule_recipe_link_enrichment
+from recommender_pool import submit_recommendation, submit_batch, start_recommender_pool, RECOMMENDATION_BUSY_ERROR
+from recognition_engine import get_recognition_engine
+from meal_pipeline import (submit_meal, reserve_slot, release_slot, stage_progress, is_finished,
+                           MEAL_PIPELINE_BUSY_ERROR, MEAL_RETRY_AFTER, MEAL_POLL_INTERVAL)
+from catalog import get_catalog, CatalogError, catalog_status, reload_catalog
+from meal_planner import close_day_gap, generate_week_plan
 
 # IMPORTANT for ASHA worker feature
 from models import db
 
 from presets import RDA_PRESETS
+from utils.segments import recommender_segment, build_recommender_profile
 
 # from routes.auth import auth_bp
 from routes.queries import queries_bp, fetch_queries_for_mother_backend  # Import the queries blueprint
@@ -50,23 +59,86 @@ app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
 app.config["SECRET_KEY"] = SECRET_KEY
 
+def warm_up():
+    """
+    Connects to MongoDB, builds the dish catalog, starts the recommender
+    workers and loads the recognition model. Kept out of import so
+    `import app` stays fast; gunicorn calls it after each worker boots
+    (gunicorn.conf.py) and __main__ calls it before app.run. Anything not
+    warmed yet is built on first use.
+    """
+    meal_recommendor.warm_up()
+    # Recommendation scoring runs in worker processes (see recommender_pool.py)
+    start_recommender_pool()
+    # Loads the recognition model now rather than on the first upload
+    get_recognition_engine()
 
-def _ensure_plan_required_nutrients_is_mapping(plan):
-    """If plan['required_nutrients'] is a JSON/string, try to deserialize it into a Python mapping."""
-    if not plan:
-        return plan
-    rn = plan.get("required_nutrients")
-    if isinstance(rn, str):
-        try:
-            plan["required_nutrients"] = json.loads(rn)
-        except Exception:
-            try:
-                import ast
-                plan["required_nutrients"] = ast.literal_eval(rn)
-            except Exception:
-                # leave as-is; template has fallback
-                pass
-    return plan
+
+def _recipe_link_updater(mother_id, meal_id=None):
+    """
+    on_link callback for schedule_recipe_link_enrichment: fills in
+    latest_recommendation.recipe_link, and the meal's copy of it if given.
+    """
+    def on_link(dish, link):
+        users_col.update_one(
+            {"_id": ObjectId(mother_id), "latest_recommendation.Dish Name": dish},
+            {"$set": {"latest_recommendation.recipe_link": link}}
+        )
+        if meal_id:
+            meals_col.update_one(
+                {"_id": ObjectId(meal_id), "recommendation.Dish Name": dish},
+                {"$set": {"recommendation.recipe_link": link}}
+            )
+    return on_link
+
+
+def _store_late_recommendation(mother_id, pending_id, future, meal_id=None):
+    """Replaces a pending latest_recommendation (and the meal's copy) once the recommender pool finishes."""
+    try:
+        recs = future.result()
+    except Exception as e:
+        print(f"Late recommendation for {mother_id} failed: {e}")
+        recs = None
+
+    meal = None
+    if recs and recs.get("recommended_meals"):
+        meal = recs["recommended_meals"][0]
+        meal["reason"] = "Your last meal was a bit low on some nutrients."
+
+    # Only if the placeholder from this upload is still the latest recommendation
+    result = users_col.update_one(
+        {"_id": ObjectId(mother_id), "latest_recommendation.pending_id": pending_id},
+        {"$set": {"latest_recommendation": meal}}
+    )
+    if meal_id:
+        meals_col.update_one(
+            {"_id": ObjectId(meal_id), "recommendation.pending_id": pending_id},
+            {"$set": {"recommendation": meal}}
+        )
+    if meal and result.modified_count:
+        print(f"Late recommendation stored for {mother_id}: {meal['Dish Name']}")
+        schedule_recipe_link_enrichment(recs, on_link=_recipe_link_updater(mother_id, meal_id))
+
+
+def match_catalog_dish(dish_name):
+    """
+    Canonical catalog dish for an OCR or typed dish name, as a dict, or
+    None if the catalog is unavailable or nothing is close enough.
+    """
+    try:
+        catalog = get_catalog()
+    except CatalogError:
+        return None
+    match = catalog.matcher.match(dish_name)
+    if match is None:
+        return None
+    return {
+        "dish_id": match.dish_id,
+        "dish_name": match.dish_name,
+        "score": round(match.score, 3),
+        "exact": match.exact,
+        "catalog_version": catalog.version,
+    }
 
 
 # -------------------------------------------------
@@ -147,10 +219,10 @@ def generate_mother_report(mother_id):
     today = datetime.now().strftime("%Y-%m-%d")
     plan = get_active_plan_for_mother_and_date(mother_id, today)
     alerts = get_active_alerts(mother_id)
-    plan = _ensure_plan_required_nutrients_is_mapping(plan)
+    plan = ensure_plan_required_nutrients_is_mapping(plan)
 
     # Normalize plan.required_nutrients to a mapping when possible
-    plan = _ensure_plan_required_nutrients_is_mapping(plan)
+    plan = ensure_plan_required_nutrients_is_mapping(plan)
     
     return render_template("report.html",
                            mother=mother,
@@ -245,6 +317,14 @@ def signup():
                 "ashaId": assigned_asha_str,
                 "assigned_doctor_id": assigned_doctor_id_str,
                 "cuisine_preference": request.form.get("cuisine_preference", ""),
+                # Ranking context normalized once (income label -> catalog band)
+                "recommender_segment": recommender_segment(
+                    request.form.get("state"),
+                    request.form.get("area_type"),
+                    request.form.get("diet"),
+                    request.form.get("income"),
+                    request.form.get("cuisine_preference", ""),
+                ),
                 
                 # Split comma-separated string into a list
                 "allergies": [
@@ -393,7 +473,7 @@ def asha_patient_profile(mother_id):
     today = datetime.now().strftime("%Y-%m-%d")
 
     plan = get_active_plan_for_mother_and_date(mother_id, today)
-    plan = _ensure_plan_required_nutrients_is_mapping(plan)
+    plan = ensure_plan_required_nutrients_is_mapping(plan)
     alerts = get_active_alerts(mother_id)
 
     # FIX: Pull all queries for this mother directly from DB
@@ -487,7 +567,7 @@ def doctor_patient_profile(mother_id):
     # === GET Request: Show the form (no change needed here) ===
     today = datetime.now().strftime("%Y-%m-%d")
     active_plan = get_active_plan_for_mother_and_date(mother_id, today)
-    active_plan = _ensure_plan_required_nutrients_is_mapping(active_plan)
+    active_plan = ensure_plan_required_nutrients_is_mapping(active_plan)
     
     # Fetch queries for this mother assigned to current doctor
     from models import db
@@ -599,47 +679,61 @@ def query_page():
 
     return render_template('query.html', mother_id=session.get('user_id'))
 
-@app.route("/api/meals/upload", methods=["POST"])
-def upload_meal():
-    mother_id = session.get("user_id") or request.form.get("motherId")
-    meal_type = request.form.get("mealType", "unknown").lower()
-    meal_date = date.today().isoformat()
-    img = request.files.get("image")
-
-    if not mother_id or not img:
-        return jsonify({"error": "motherId and image are required"}), 400
-
-    filename = secure_filename(img.filename)
-    if filename == "":
-        return jsonify({"error": "invalid filename"}), 400
-
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    save_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    img.save(save_path)
-
-    # 1. Create the initial meal document
-    meal_id, _ = create_meal_doc(mother_id, meal_type, meal_date, save_path)
-
-    # 2. Run OCR/AI to get nutrients
-    ocr_result = analyze_image_dummy(save_path)
-    dish_name = ocr_result["nutrients"]["dish_name"]
-    # This is the "actual" nutrients from the meal
-    actual_nutrients = {k: v for k, v in ocr_result["nutrients"].items() if k != "dish_name"}
+def process_meal(meal_id, mother_id, meal_type, meal_date, save_path, image_hash, report_url):
+    """
+    Everything after the upload is stored, run by the meal pipeline
+    (meal_pipeline.py): analysis, the plan check and alert, the next-meal
+    recommendation and notifications. Progress goes to the meal's `stage`.
+    """
+    # 1. Downscale for analysis and make the thumbnail (original may move to cold storage)
+    set_meal_stage(meal_id, "normalizing")
+    analysis_path = save_path
+    try:
+        normalized = normalize_in_pool(save_path, image_hash)
+        analysis_path = normalized.analysis_path
+        set_meal_images(meal_id, normalized.original_path, normalized.analysis_path, normalized.thumbnail_path)
+    except Exception as e:
+        # Not decodable here (e.g. HEIC without a plugin): analyze the original as uploaded
+        print(f"[MealPipeline] Could not normalize {save_path}: {e}")
+
+    # 2. Run food recognition to get nutrients (recognition_engine.py)
+    set_meal_stage(meal_id, "analyzing")
+    engine = get_recognition_engine()
+    # The same photo was analyzed by this engine version before (same content hash): reuse that result
+    previous = find_analysis_by_image(image_hash, engine.version) if image_hash else None
+    if previous:
+        labels = previous.get("labels")
+        dish_name = previous.get("dish_name")
+        actual_nutrients = previous.get("nutrients") or {}
+        recognition = dict(previous["recognition"], cached=True)
+    else:
+        ocr_result = engine.recognize(analysis_path, image_hash)
+        labels = ocr_result.get("labels")
+        dish_name = ocr_result["nutrients"]["dish_name"]
+        # This is the "actual" nutrients from the meal
+        actual_nutrients = {k: v for k, v in ocr_result["nutrients"].items() if k != "dish_name"}
+        recognition = dict(ocr_result["engine"], confidence=(labels or {}).get("confidence"))
+    # OCR spelling rarely matches the catalog exactly ("Instant Coffee" vs "Instant coffee")
+    catalog_match = match_catalog_dish(dish_name)
 
     # 3. Update the meal document with nutrient info
-    updated = update_meal_labels_and_nutrients(
+    update_meal_labels_and_nutrients(
         meal_id, 
-        ocr_result.get("labels"), 
+        labels, 
         actual_nutrients, 
-        dish_name
+        dish_name,
+        catalog_match,
+        recognition
     )
-    updated['_id'] = str(updated['_id'])
 
     # --- 4. START: Alert & Recommendation Logic ---
+    set_meal_stage(meal_id, "checking")
     plan = get_active_plan_for_mother_and_date(mother_id, meal_date)
-    plan = _ensure_plan_required_nutrients_is_mapping(plan)
+    plan = ensure_plan_required_nutrients_is_mapping(plan)
     alert_info = None
     meal_recommendation = None # This is what we will show the mother
+    pending_recs = None # Future of a recommendation still running in the pool
+    keep_latest = False # Pool saturated or failed: leave the mother's last suggestion in place
 
     if plan and plan.get("required_nutrients") and meal_type in plan["required_nutrients"]:
         # A plan exists for this meal. Let's compare.
@@ -663,40 +757,41 @@ def upload_meal():
             alert_info = {"alert_created": True, "deficits": deficits, "alert_id": alert_doc["_id"]}
 
             # Part 2: Generate Recommendation for Mother (Frontend)
+            set_meal_stage(meal_id, "recommending")
             mother_doc = get_user_by_id(mother_id)
             
             # Build the profile your recommender needs
-            profile_for_recommender = {
-                "mother_id": mother_id,  # NEW: Add mother_id for tracking recommendations
-                "state": mother_doc.get("location_state", ""),
-                "area": mother_doc.get("location_area_type", "both"),
-                "income_range": mother_doc.get("income_range", ""),
-                "diet_pref": mother_doc.get("dietary_preference", ""),
-                "cuisine_pref": mother_doc.get("cuisine_preference", ""), 
-                "allergies_to_avoid": mother_doc.get("allergies", []) 
-            }
+            profile_for_recommender = build_recommender_profile(mother_doc)
             
-            # Call the recommender with the deficits
-            recs = recommend_from_deficits(deficits, profile_for_recommender, top_n=1)
-            print("hahah")
-            print(recs)
+            # Call the recommender with the deficits (in the recommender process pool)
+            # Recipe links not cached yet come back "pending" and are filled in below
+            recs, pending_recs = submit_recommendation(
+                deficits, profile_for_recommender, top_n=1, targets=target_nutrients
+            )
             # Get the top meal
             if recs and recs.get("recommended_meals") and recs["recommended_meals"]:
                 meal_recommendation = recs["recommended_meals"][0]
                 meal_recommendation["reason"] = f"Your last meal was a bit low on some nutrients."
                 print(f"Recommendation generated: {meal_recommendation['Dish Name']}")
+            elif recs and recs.get("status") == "pending" and pending_recs is None:
+                # Saturated or failed: no result will ever arrive to replace a placeholder
+                print(f"[MealPipeline] No recommendation for {mother_id} this time; keeping the previous one.")
+                keep_latest = True
+            elif recs and recs.get("status") == "pending":
+                # Pool slow: show a placeholder, replaced when the result arrives
+                meal_recommendation = {
+                    "status": "pending",
+                    "pending_id": str(ObjectId()),
+                    "reason": recs["summary"]
+                }
             doctor_id = mother_doc.get("assigned_doctor_id")
             asha_worker_id = mother_doc.get("ashaId")
             mother_name = mother_doc.get("name", "a patient")
 
-            # 2. Create the URL for the new report page
-            #    We use _external=True to get the full URL (e.g., http://...)
-            report_url = url_for('generate_mother_report', mother_id=mother_id, _external=True)
-
-            # 3. Create the notification message
+            # Create the notification message
             message = f"Nutrient deficit detected for {mother_name} after her {meal_type}."
             
-            # 4. Send notifications
+            # Send notifications (report_url was built while the upload request was live)
             create_notification(doctor_id, message, report_url)
             create_notification(asha_worker_id, message, report_url)
             
@@ -712,41 +807,96 @@ def upload_meal():
         alert_info = {"alert_created": False, "reason": "no plan for this meal type"}
         # meal_recommendation stays None
 
-    # 5. Save the final recommendation (or None) to the mother's profile
-    users_col.update_one(
-        {"_id": ObjectId(mother_id)},
-        {"$set": {"latest_recommendation": meal_recommendation}}
-    )
+    # 5. Save the final recommendation (or None) to the mother's profile and the meal
+    if not keep_latest:
+        users_col.update_one(
+            {"_id": ObjectId(mother_id)},
+            {"$set": {"latest_recommendation": meal_recommendation}}
+        )
+    save_meal_outcome(meal_id, alert_info, meal_recommendation)
+
+    # Fill in a pending recipe link (or a pending recommendation) in the
+    # background, after the profile update
+    if meal_recommendation and meal_recommendation.get("status") != "pending":
+        schedule_recipe_link_enrichment(recs, on_link=_recipe_link_updater(mother_id, meal_id))
+    if pending_recs is not None:
+        pending_id = meal_recommendation["pending_id"]
+        pending_recs.add_done_callback(lambda f: _store_late_recommendation(mother_id, pending_id, f, meal_id))
     # --- END: Alert & Recommendation Logic ---
 
-    # 6. Calculate daily totals (for summary)
-    total_intake = get_total_intake_for_day(mother_id, meal_date)
+    set_meal_stage(meal_id, "done")
 
-    if plan and plan.get("required_nutrients"):
-        daily_goal = {}
-        for meal_type_data in plan["required_nutrients"].values():
-            for k, v in meal_type_data.items():
-                daily_goal[k] = daily_goal.get(k, 0) + v
-    else:
-        daily_goal = {}
 
-    remaining = {}
-    for k, goal in daily_goal.items():
-        taken = total_intake.get(k, 0)
-        remaining[k] = round(max(goal - taken, 0), 2)
+def daily_summary(mother_id, meal_date):
+    """Day goal (summed over the plan's meals), intake so far and what remains."""
+    day = remaining_nutrients_for_day(mother_id, meal_date)
+    if day is None:
+        # No active plan: only the intake is known
+        return {"goal": {}, "taken_so_far": get_total_intake_for_day(mother_id, meal_date), "remaining": {}}
+    daily_goal, total_intake, remaining = day
 
-    # 7. Send the final response
-    return jsonify({
-        "meal": updated,
-        "ocr_result": ocr_result,
-        "meal_check": alert_info, # For backend/doctor use
-        "next_meal_recommendation": meal_recommendation, # For mother's app
-        "daily_summary": {
-            "goal": daily_goal,
-            "taken_so_far": total_intake,
-            "remaining": remaining
-        }
-    }), 201
+    return {
+        "goal": daily_goal,
+        "taken_so_far": total_intake,
+        "remaining": remaining
+    }
+
+
+@app.route("/api/meals/upload", methods=["POST"])
+def upload_meal():
+    mother_id = session.get("user_id") or request.form.get("motherId")
+    meal_type = request.form.get("mealType", "unknown").lower()
+    meal_date = date.today().isoformat()
+    img = request.files.get("image")
+
+    if not mother_id or not img:
+        return jsonify({"error": "motherId and image are required"}), 400
+
+    filename = secure_filename(img.filename)
+    if filename == "":
+        return jsonify({"error": "invalid filename"}), 400
+
+    # Refuse before storing anything if the pipeline cannot take the meal
+    if not reserve_slot():
+        response = jsonify({"error": MEAL_PIPELINE_BUSY_ERROR})
+        response.headers["Retry-After"] = str(MEAL_RETRY_AFTER)
+        return response, 503
+
+    try:
+        # Streamed to disk under its content hash (see utils/image_store.py)
+        stored = store_upload(img)
+
+        # Same photo for the same meal again: a client retry, so answer with the meal already logged
+        # (checked even for newly stored files: the first copy may have moved to cold storage)
+        existing = find_meal_upload(mother_id, meal_type, meal_date, stored.sha256)
+        if existing:
+            release_slot()
+            return _meal_accepted(str(existing["_id"]), 200)
+
+        # Create the pending meal document; the rest happens in process_meal
+        meal_id, _ = create_meal_doc(mother_id, meal_type, meal_date, stored.path, stored.sha256)
+        report_url = url_for('generate_mother_report', mother_id=mother_id, _external=True)
+    except ValueError as e:
+        release_slot()
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        release_slot()
+        raise
+
+    submit_meal(process_meal, meal_id, mother_id, meal_type, meal_date, stored.path, stored.sha256, report_url)
+    return _meal_accepted(meal_id, 202)
+
+
+def _meal_accepted(meal_id, status_code):
+    """Upload response pointing the client at the meal's status endpoint."""
+    status_url = url_for('get_meal_api', meal_id=meal_id)
+    response = jsonify({
+        "meal_id": meal_id,
+        "status_url": status_url,
+        "poll_interval": MEAL_POLL_INTERVAL
+    })
+    response.headers["Location"] = status_url
+    return response, status_code
 
   
 # @app.route("/doctor/patient/<string:mother_id>", methods=["GET", "POST"])
@@ -771,7 +921,52 @@ def get_meal_api(meal_id):
         return jsonify({"error": "not found"}), 404
 
     meal['_id'] = str(meal['_id'])
-    return jsonify(meal)
+    # Meals stored before the pipeline existed have no stage and are finished
+    stage = meal.get("stage") or ("done" if meal.get("status") == "processed" else "queued")
+    meal["stage"] = stage
+    meal["progress"] = stage_progress(stage)
+    if stage == "done":
+        meal["daily_summary"] = daily_summary(meal["motherId"], meal["mealDate"])
+
+    response = jsonify(meal)
+    if not is_finished(stage):
+        # Tells pollers how long to wait before asking again
+        response.headers["Retry-After"] = str(max(1, round(MEAL_POLL_INTERVAL)))
+    return response
+
+
+def _can_view_mother(mother_id):
+    """True if the session user is this mother, or her assigned doctor or ASHA worker."""
+    user_id, role = session.get("user_id"), session.get("role")
+    if role == "mother":
+        return str(mother_id) == user_id
+    if role not in ("doctor", "asha") or not ObjectId.is_valid(str(mother_id)):
+        return False
+    field = "assigned_doctor_id" if role == "doctor" else "ashaId"
+    mother = users_col.find_one({"_id": ObjectId(str(mother_id))}, {field: 1})
+    return bool(mother) and str(mother.get(field)) == user_id
+
+
+@app.route("/api/meals/<meal_id>/thumbnail", methods=["GET"])
+def get_meal_thumbnail(meal_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not logged in"}), 401
+    try:
+        meal = meals_col.find_one({"_id": ObjectId(meal_id)}, {"motherId": 1, "image_hash": 1, "thumbnail_path": 1})
+    except Exception:
+        return jsonify({"error": "invalid id"}), 400
+    # Someone else's meal looks the same as a missing one
+    if not meal or not _can_view_mother(meal.get("motherId")):
+        return jsonify({"error": "not found"}), 404
+
+    # Resolved from the content hash at read time; the stored path is the fallback for older meals
+    path = derived_paths(meal["image_hash"])[1] if meal.get("image_hash") else None
+    if not path or not os.path.exists(path):
+        path = meal.get("thumbnail_path")
+    if not path or not os.path.exists(path):
+        return jsonify({"error": "not found"}), 404
+    # Named after the photo's content hash, so it never changes
+    return send_file(path, mimetype="image/jpeg", max_age=30 * 24 * 3600)
 
 
 @app.route("/api/nutrition-plans", methods=["POST"])
@@ -811,6 +1006,135 @@ def get_alerts_for_mother(mother_id):
     return jsonify(alerts)
 
 
+@app.route("/api/recommendations/caseload", methods=["GET"])
+def api_caseload_recommendations():
+    """
+    Suggested meals for every mother assigned to the logged-in doctor or
+    ASHA worker, based on each mother's latest active nutrient alert.
+    Scored in one batch; nothing is saved.
+    """
+    role = session.get('role')
+    user_id = session.get('user_id')
+    if role == 'doctor':
+        mother_filter = {"role": "mother", "assigned_doctor_id": user_id}
+    elif role == 'asha':
+        mother_filter = {"role": "mother", "ashaId": user_id}
+    else:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    top_k = request.args.get("top_k", 5, type=int)
+    mothers = {str(m["_id"]): m for m in users_col.find(mother_filter)}
+
+    # Latest active alert per mother, in one query
+    latest_deficits = {
+        row["_id"]: row["nutrient_deficit"]
+        for row in db.alerts.aggregate([
+            {"$match": {"motherId": {"$in": list(mothers)}, "status": "active"}},
+            {"$sort": {"createdAt": -1}},
+            {"$group": {"_id": "$motherId", "nutrient_deficit": {"$first": "$nutrient_deficit"}}}
+        ])
+    }
+
+    items = [
+        (latest_deficits[mid], build_recommender_profile(mothers[mid]))
+        for mid in mothers if latest_deficits.get(mid)
+    ]
+    results = submit_batch(items, top_k=max(1, min(top_k, 20)))
+    if results is None:
+        return jsonify({"error": RECOMMENDATION_BUSY_ERROR}), 503
+    for entry in results:
+        entry["name"] = mothers[entry["mother_id"]].get("name")
+
+    return jsonify({"count": len(results), "recommendations": results})
+
+
+# -------------------------------------------------
+# CATALOG ADMIN
+# -------------------------------------------------
+@app.route("/api/catalog/allergens", methods=["GET"])
+def api_catalog_allergens():
+    """Lists the normalized allergen vocabulary with dish counts."""
+    if session.get('role') not in ['doctor', 'asha']:
+        return jsonify({"error": "Unauthorized"}), 403
+    try:
+        catalog = get_catalog()
+    except CatalogError as e:
+        return jsonify({"error": str(e)}), 503
+
+    return jsonify({"catalog_version": catalog.version, "allergens": catalog.allergens.counts()})
+
+
+@app.route("/api/catalog/allergens/<allergen>", methods=["GET"])
+def api_catalog_dishes_with_allergen(allergen):
+    """Which dishes contain the given allergen (any spelling, e.g. 'milk' or 'Diary')."""
+    if session.get('role') not in ['doctor', 'asha']:
+        return jsonify({"error": "Unauthorized"}), 403
+    try:
+        catalog = get_catalog()
+    except CatalogError as e:
+        return jsonify({"error": str(e)}), 503
+
+    mask = catalog.allergens.dishes_containing(allergen)
+    dishes = catalog.df.loc[mask, ["Dish Name", "allergens"]].to_dict(orient="records")
+    return jsonify({"allergen": allergen, "count": len(dishes), "dishes": dishes})
+
+
+@app.route("/api/catalog/dishes/match", methods=["GET"])
+def api_catalog_match_dish():
+    """Resolves a typed or OCR dish name to catalog dishes: ?name=...&n=5"""
+    if 'user_id' not in session:
+        return jsonify({"error": "Unauthorized"}), 403
+    name = request.args.get("name", "").strip()
+    if not name:
+        return jsonify({"error": "name is required"}), 400
+    try:
+        catalog = get_catalog()
+    except CatalogError as e:
+        return jsonify({"error": str(e)}), 503
+
+    n = max(1, min(request.args.get("n", 5, type=int), 20))
+    best = catalog.matcher.match(name)
+    return jsonify({
+        "query": name,
+        "catalog_version": catalog.version,
+        "match": best._asdict() if best else None,
+        "candidates": [c._asdict() for c in catalog.matcher.candidates(name, n)],
+    })
+
+
+@app.route("/api/catalog/status", methods=["GET"])
+def api_catalog_status():
+    """Version of the dish catalog being served and whether a reload is running."""
+    if session.get('role') not in ['doctor', 'asha']:
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify(catalog_status())
+
+
+@app.route("/api/catalog/reload", methods=["POST"])
+def api_catalog_reload():
+    """Checks the data files now instead of waiting for CATALOG_RELOAD_INTERVAL."""
+    if session.get('role') != 'doctor':
+        return jsonify({"error": "Unauthorized"}), 403
+    started = reload_catalog() is not None
+    return jsonify({"reload_started": started, **catalog_status()}), 202 if started else 200
+
+
+@app.route("/api/recommender/cache-stats", methods=["GET"])
+def api_recommender_cache_stats():
+    """Hit / miss / eviction counters of the recommender's segment cache and ranking table."""
+    if session.get('role') not in ['doctor', 'asha']:
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify(get_ranking_cache_stats())
+
+
+@app.route("/api/recognition/stats", methods=["GET"])
+def api_recognition_stats():
+    """Batching and result-cache counters of the food-recognition engine."""
+    if session.get('role') not in ['doctor', 'asha']:
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify(get_recognition_engine().stats())
+
+
 # API: Get all queries (for doctor)
 @app.route("/api/queries", methods=["GET"])
 def get_all_queries():
@@ -860,28 +1184,38 @@ def respond_to_query(query_id):
     
     return redirect(request.referrer or url_for('doctor_page'))
 
-# API: Remaining nutrients for the day
-@app.route("/api/nutrients/remaining/<mother_id>", methods=["GET"])
-def get_remaining_nutrients(mother_id):
-    today = datetime.now().strftime("%Y-%m-%d")
-
-    plan = get_active_plan_for_mother_and_date(mother_id, today)
-    plan = _ensure_plan_required_nutrients_is_mapping(plan)
+def remaining_nutrients_for_day(mother_id, day):
+    """Returns (daily_goal, total_intake, remaining) for a day, or None without an active plan."""
+    plan = get_active_plan_for_mother_and_date(mother_id, day)
+    plan = ensure_plan_required_nutrients_is_mapping(plan)
     if not plan or not plan.get("required_nutrients"):
-        return jsonify({"error": "No active plan found for today"}), 404
+        return None
 
     daily_goal = {}
     for meal_type_data in plan["required_nutrients"].values():
         for k, v in meal_type_data.items():
             daily_goal[k] = daily_goal.get(k, 0) + v
 
-    total_intake = get_total_intake_for_day(mother_id, today)
+    total_intake = get_total_intake_for_day(mother_id, day)
 
     remaining = {}
     for k, goal in daily_goal.items():
         taken = total_intake.get(k, 0)
         remaining[k] = round(max(goal - taken, 0), 2)
 
+    return daily_goal, total_intake, remaining
+
+
+# API: Remaining nutrients for the day
+@app.route("/api/nutrients/remaining/<mother_id>", methods=["GET"])
+def get_remaining_nutrients(mother_id):
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    day = remaining_nutrients_for_day(mother_id, today)
+    if day is None:
+        return jsonify({"error": "No active plan found for today"}), 404
+    daily_goal, total_intake, remaining = day
+
     return jsonify({
         "date": today,
         "required": daily_goal,
@@ -890,6 +1224,72 @@ def get_remaining_nutrients(mother_id):
     })
 
 
+# API: Small set of dishes that closes the rest of today's gap
+@app.route("/api/recommendations/day/<mother_id>", methods=["GET"])
+def api_day_gap_recommendation(mother_id):
+    if session.get('role') not in ('mother', 'doctor', 'asha'):
+        return jsonify({"error": "Unauthorized"}), 403
+    if session.get('role') == 'mother' and session.get('user_id') != mother_id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    day = remaining_nutrients_for_day(mother_id, today)
+    if day is None:
+        return jsonify({"error": "No active plan found for today"}), 404
+    remaining = day[2]
+
+    mother = get_user_by_id(mother_id)
+    if not mother:
+        return jsonify({"error": "Mother not found"}), 404
+
+    max_dishes = request.args.get("max_dishes", 3, type=int)
+    result = close_day_gap(remaining, build_recommender_profile(mother), max_dishes=max_dishes)
+    if "error" in result:
+        return jsonify(result), 422
+
+    result["date"] = today
+    result["remaining"] = remaining
+    return jsonify(result)
+
+
+# API: 7-day breakfast/lunch/dinner dish schedule from the active plan
+@app.route("/api/meal-plan/week/<mother_id>", methods=["GET"])
+def api_weekly_meal_plan(mother_id):
+    """
+    Returns the stored weekly plan (normally written by the nightly
+    generate_weekly_plans.py job). With ?regenerate=1, or when none exists
+    yet, a plan starting today is generated and saved.
+    """
+    if session.get('role') not in ('mother', 'doctor', 'asha'):
+        return jsonify({"error": "Unauthorized"}), 403
+    if session.get('role') == 'mother' and session.get('user_id') != mother_id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    if not request.args.get("regenerate"):
+        week_plan = get_weekly_meal_plan(mother_id, request.args.get("start"))
+        if week_plan:
+            return jsonify(week_plan)
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    plan = ensure_plan_required_nutrients_is_mapping(get_active_plan_for_mother_and_date(mother_id, today))
+    if not plan or not isinstance(plan.get("required_nutrients"), dict):
+        return jsonify({"error": "No active plan found"}), 404
+
+    mother = get_user_by_id(mother_id)
+    if not mother:
+        return jsonify({"error": "Mother not found"}), 404
+
+    recent = [entry["dish"] for entry in mother.get("recent_dishes", [])]
+    week_plan = generate_week_plan(plan["required_nutrients"], build_recommender_profile(mother),
+                                   start_date=today, avoid_dishes=recent)
+    if "error" in week_plan:
+        return jsonify(week_plan), 422
+
+    doc = save_weekly_meal_plan(mother_id, str(plan["_id"]), week_plan)
+    doc.pop("_id", None)
+    return jsonify(doc)
+
+
 # -------------------------------------------------
 # ASHA WORKER ROUTES
 # -------------------------------------------------
@@ -922,17 +1322,19 @@ def api_create_visit():
     observations = data.get("observations")
 
     photos = []
+    photo_hashes = []
     if "photo" in request.files:
-        f = request.files["photo"]
-        filename = secure_filename(f.filename)
-        p = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-        f.save(p)
-        photos.append(p)
+        try:
+            stored = store_upload(request.files["photo"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        photos.append(stored.path)
+        photo_hashes.append(stored.sha256)
 
     from models import create_visit_record
     rec = create_visit_record(
         asha_id, mother_id, visit_date, visit_type,
-        observations=observations, photos=photos
+        observations=observations, photos=photos, photo_hashes=photo_hashes
     )
     return jsonify(rec), 201
 
@@ -984,7 +1386,7 @@ def api_asha_mother_details(mother_id):
     # Today's plan
     today = datetime.now().strftime("%Y-%m-%d")
     plan = get_active_plan_for_mother_and_date(mother_id, today)
-    plan = _ensure_plan_required_nutrients_is_mapping(plan)
+    plan = ensure_plan_required_nutrients_is_mapping(plan)
     if plan:
         plan["_id"] = str(plan["_id"])
     details["plan"] = plan or {}
@@ -1016,4 +1418,5 @@ def api_asha_mother_details(mother_id):
 # MAIN
 # -------------------------------------------------
 if __name__ == "__main__":
+    warm_up()
     app.run(debug=True, use_reloader=False)
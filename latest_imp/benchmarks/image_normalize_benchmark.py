@@ -0,0 +1,97 @@
+"""
+Image normalization: size and time per photo.
+
+Normalizes the photos in uploads/ plus a synthetic 12 MP phone-camera
+JPEG into a temporary store, and reports for each one the original,
+analysis and thumbnail sizes, the time normalize_image takes, and the time
+a full-resolution decode of the original takes (what a recognizer fed the
+original would pay before even starting).
+
+Usage (from latest_imp/):
+    python benchmarks/image_normalize_benchmark.py [--repeat 3]
+"""
+import argparse
+import glob
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from config import UPLOAD_FOLDER  # noqa: E402
+from utils.image_store import store_image  # noqa: E402
+from utils.image_normalize import normalize_image  # noqa: E402
+
+
+def phone_photo(width=4032, height=3024, seed=0):
+    """JPEG bytes shaped like a camera photo: smooth gradients plus sensor noise."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([(x * 255 // width), (y * 255 // height), ((x + y) * 255 // (width + height))], axis=-1)
+    noise = rng.integers(-12, 12, size=base.shape)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+    out = io.BytesIO()
+    Image.fromarray(pixels).save(out, "JPEG", quality=92)
+    return out.getvalue()
+
+
+def best_time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return min(samples)
+
+
+def full_decode(path):
+    with Image.open(path) as img:
+        img.convert("RGB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image normalization size and latency.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    photos = {os.path.basename(p): open(p, "rb").read()
+              for p in sorted(glob.glob(os.path.join(UPLOAD_FOLDER, "*")))
+              if os.path.isfile(p)}
+    photos["synthetic_12MP.jpg"] = phone_photo()
+
+    totals = np.zeros(3)
+    print(f"{'photo':<42} {'original':>10} {'analysis':>10} {'thumb':>8} {'normalize':>10} {'full decode':>12}")
+    with tempfile.TemporaryDirectory() as root:
+        for name, data in photos.items():
+            stored = store_image(io.BytesIO(data), root)
+
+            def normalize():
+                # Fresh derived files every run, so each run decodes
+                for suffix in (".analysis.jpg", ".thumb.jpg"):
+                    derived = stored.path.rsplit(".", 1)[0] + suffix
+                    if os.path.exists(derived):
+                        os.unlink(derived)
+                return normalize_image(stored.path, stored.sha256, root=root, cold_dir="")
+
+            normalize_time = best_time(normalize, args.repeat)
+            result = normalize()
+            decode_time = best_time(lambda: full_decode(stored.path), args.repeat)
+
+            sizes = np.array([len(data), os.path.getsize(result.analysis_path), os.path.getsize(result.thumbnail_path)])
+            totals += sizes
+            assert stored.sha256 == hashlib.sha256(data).hexdigest()
+            print(f"{name[:42]:<42} {sizes[0] / 1024:>8.0f}KB {sizes[1] / 1024:>8.0f}KB {sizes[2] / 1024:>6.1f}KB "
+                  f"{normalize_time * 1e3:>8.1f}ms {decode_time * 1e3:>10.1f}ms")
+
+    print(f"\ntotal: originals {totals[0] / 2**20:.1f} MiB, analysis images {totals[1] / 2**20:.1f} MiB, "
+          f"thumbnails {totals[2] / 1024:.0f} KiB ({totals[2] / totals[0]:.1%} of the originals)")
+
+
+if __name__ == "__main__":
+    main()
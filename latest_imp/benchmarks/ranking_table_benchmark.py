@@ -0,0 +1,96 @@
+"""
+Ranking table vs live scoring on the shipped catalog.
+
+Builds a RankingTable for the segments of --profiles synthetic mothers
+(some with allergies) and queries it two ways:
+
+    equal     0/1 deficit vectors: every table hit must return the same
+              top-k dish ids as rank_candidates_indexed
+    weighted  the same subsets with random weights, like gaps relative to
+              plan targets: the table must decline them (a one-nutrient
+              deficit is still equal-weight) so they are scored
+
+Exits non-zero if either check fails. Also reports the hit rate, build
+time, table size and per-call latency of equal-weight lookups against
+scoring.
+
+Usage (from latest_imp/):
+    python benchmarks/ranking_table_benchmark.py [--profiles 300] [--queries 2000] [-k 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import meal_recommendor as recommender  # noqa: E402
+from catalog import DishCatalog, NUTRIENT_COLS  # noqa: E402
+from ranking_table import RankingTable, N_SUBSETS, subset_vector, set_ranking_table  # noqa: E402
+from benchmarks.synthetic import synthetic_profiles  # noqa: E402
+
+
+def timed(fn, args_list):
+    samples = []
+    for args in args_list:
+        started = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ranking table equivalence and latency.")
+    parser.add_argument("--profiles", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=recommender.DIVERSITY_POOL_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    catalog = DishCatalog.from_csv()
+    profiles = synthetic_profiles(catalog, args.profiles, seed=args.seed)
+
+    started = time.perf_counter()
+    table = RankingTable.build(catalog, profiles)
+    build_time = time.perf_counter() - started
+    set_ranking_table(table, catalog.version)
+    print(f"catalog {catalog.version}: {len(catalog)} dishes, {len(NUTRIENT_COLS)} nutrients, {N_SUBSETS} subsets")
+    print(f"table: {len(table)} segments from {len(profiles)} profiles, k={table.k}, "
+          f"{table.ids.nbytes / 2**20:.1f} MiB, built in {build_time:.2f}s")
+
+    items = [(catalog, subset_vector(int(rng.integers(1, N_SUBSETS))), profiles[int(rng.integers(len(profiles)))], args.k)
+             for _ in range(args.queries)]
+    weighted = [(c, vec * rng.uniform(0.05, 1.0, len(vec)), profile, k) for c, vec, profile, k in items]
+
+    hits = same = 0
+    for item in items:
+        from_table = recommender.rank_candidates_from_table(*item)
+        if from_table is None:
+            continue
+        hits += 1
+        scored = recommender.rank_candidates_indexed(*item)
+        if scored is not None and np.array_equal(from_table[0], scored[0]) and from_table[3] == scored[3]:
+            same += 1
+    weighted_hits = sum(recommender.rank_candidates_from_table(*item) is not None
+                        for item in weighted if np.count_nonzero(item[1]) > 1)
+    print(f"equal     hits: {hits}/{len(items)} ({hits / len(items):.1%}), "
+          f"same top-{args.k} as scoring: {same / max(hits, 1):.1%}")
+    print(f"weighted  hits: {weighted_hits}/{len(weighted)} (multi-nutrient ones should all be scored)")
+
+    lookup = np.asarray(timed(recommender.rank_candidates_from_table, items)) * 1e6
+    scoring = np.asarray(timed(recommender.rank_candidates_indexed, items)) * 1e6
+    print(f"{'path':<10} {'p50 µs':>9} {'p95 µs':>9}")
+    print(f"{'table':<10} {np.percentile(lookup, 50):>9.1f} {np.percentile(lookup, 95):>9.1f}")
+    print(f"{'scoring':<10} {np.percentile(scoring, 50):>9.1f} {np.percentile(scoring, 95):>9.1f}")
+
+    if hits != same:
+        sys.exit("\nranking table disagrees with scoring for equal weights")
+    if weighted_hits:
+        sys.exit("\nranking table answered weighted deficits")
+
+
+if __name__ == "__main__":
+    main()
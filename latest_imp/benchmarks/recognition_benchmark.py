@@ -0,0 +1,110 @@
+"""
+Recognition engine: micro-batching throughput and the result cache.
+
+Drives a RecognitionEngine from --uploads concurrent threads with a model
+whose cost is a fixed per-call overhead plus a per-image cost (roughly how
+a CPU vision model behaves), once with batching off (batch size 1) and
+once with the default batch size and window. Reports images/s, p50/p95
+latency and the mean batch size. It then re-submits every image to show
+cache hits, and checks that the stub model is deterministic per image.
+
+Usage (from latest_imp/):
+    python benchmarks/recognition_benchmark.py [--uploads 8] [--images 200] [--call-ms 40] [--image-ms 5]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from recognition_engine import (RecognitionEngine, StubRecognitionModel,  # noqa: E402
+                                RECOGNITION_BATCH_SIZE, RECOGNITION_BATCH_WINDOW_MS)
+
+
+class CostModel(StubRecognitionModel):
+    """The stub's answers at the cost of a real model: call_ms per batch plus image_ms per image."""
+
+    name = "cost-model"
+
+    def __init__(self, call_ms, image_ms):
+        self.call_s = call_ms / 1000.0
+        self.image_s = image_ms / 1000.0
+
+    def predict_batch(self, images):
+        time.sleep(self.call_s + self.image_s * len(images))
+        return super().predict_batch(images)
+
+
+def image_hashes(n, seed=0):
+    return [hashlib.sha256(f"photo-{seed}-{i}".encode()).hexdigest() for i in range(n)]
+
+
+def drive(engine, hashes, uploads):
+    """Submits `hashes` from `uploads` threads; returns (seconds, per-image latencies)."""
+    latencies = []
+    lock = threading.Lock()
+    chunks = [hashes[i::uploads] for i in range(uploads)]
+
+    def worker(chunk):
+        for image_hash in chunk:
+            started = time.perf_counter()
+            engine.recognize(f"{image_hash}.jpg", image_hash)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, np.asarray(latencies) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recognition engine batching and cache.")
+    parser.add_argument("--uploads", type=int, default=8, help="concurrent uploading threads")
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--call-ms", type=float, default=40)
+    parser.add_argument("--image-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    hashes = image_hashes(args.images)
+    print(f"{args.images} images from {args.uploads} concurrent uploads, "
+          f"model cost {args.call_ms:.0f}ms/call + {args.image_ms:.0f}ms/image")
+    print(f"{'engine':<28} {'images/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'mean batch':>11}")
+
+    engine = None
+    for label, batch_size, window_ms in [("unbatched (batch 1)", 1, 0),
+                                         (f"batch {RECOGNITION_BATCH_SIZE}, {RECOGNITION_BATCH_WINDOW_MS:.0f}ms window",
+                                          RECOGNITION_BATCH_SIZE, RECOGNITION_BATCH_WINDOW_MS)]:
+        engine = RecognitionEngine(CostModel(args.call_ms, args.image_ms), batch_size=batch_size,
+                                   batch_window_ms=window_ms)
+        elapsed, latencies = drive(engine, hashes, args.uploads)
+        print(f"{label:<28} {args.images / elapsed:>9.1f} {np.percentile(latencies, 50):>8.1f} "
+              f"{np.percentile(latencies, 95):>8.1f} {engine.stats()['mean_batch_size']:>11.2f}")
+
+    # Same images again: every one is a cache hit
+    elapsed, latencies = drive(engine, hashes, args.uploads)
+    cache = engine.stats()["cache"]
+    print(f"{'repeat (cached)':<28} {args.images / elapsed:>9.1f} {np.percentile(latencies, 50):>8.3f} "
+          f"{np.percentile(latencies, 95):>8.3f} {'':>11}")
+    print(f"cache: {cache['hits']} hits, {cache['misses']} misses")
+
+    stub = RecognitionEngine(StubRecognitionModel())
+    first = [stub.recognize("x.jpg", h) for h in hashes[:50]]
+    fresh = RecognitionEngine(StubRecognitionModel())
+    second = [fresh.recognize("x.jpg", h) for h in hashes[:50]]
+    same = all(a["nutrients"] == b["nutrients"] and a["labels"] == b["labels"] for a, b in zip(first, second))
+    print(f"stub deterministic across engines: {same}")
+    if not same or cache["hits"] < args.images:
+        sys.exit("\nrecognition engine check failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Offline benchmark of the recommendation pipeline on synthetic catalogs.
+
+For each catalog size it reports p50 / p95 latency, throughput and peak
+allocations (tracemalloc) per stage:
+
+    load      DishCatalog.from_frames (merge, scaling, facet + similarity index)
+    filter    profile_filter_masks
+    score     similarity search over the allowed dishes
+    boost     preference_boosts on the candidates
+    select    top-k + select_diverse_meal
+    end2end   recommend_from_deficits, segment cache cold and warm
+
+Mongo is disabled (collection = None) and recipe links come from a
+StaticRecipeLinkProvider, so nothing leaves the process.
+
+Usage (from latest_imp/):
+    python benchmarks/recommender_benchmark.py [--dishes 1000 10000 100000] [--profiles 300]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import meal_recommendor as recommender  # noqa: E402
+from catalog import DishCatalog, set_catalog  # noqa: E402
+from utils.recipe_links import StaticRecipeLinkProvider  # noqa: E402
+from benchmarks.synthetic import (  # noqa: E402
+    real_frames, synthetic_frames, synthetic_profiles, synthetic_deficits,
+)
+
+LOAD_REPEATS = 3
+
+
+def use_local_stand_ins():
+    """No Mongo, no Google: the recommender runs entirely in-process."""
+    recommender.collection = None
+    recommender.users_collection = None
+    recommender.set_recipe_link_provider(StaticRecipeLinkProvider(default="https://example.org/recipe"))
+
+
+def measure(fn, args_list):
+    """Runs fn over args_list; returns (latencies in s, peak allocation of one call in bytes)."""
+    latencies = []
+    for args in args_list:
+        started = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    fn(*args_list[0])
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return latencies, peak
+
+
+def report(stage, latencies, peak):
+    lat = np.asarray(latencies) * 1000
+    print(f"{stage:<16} {np.percentile(lat, 50):>9.3f} {np.percentile(lat, 95):>9.3f} "
+          f"{1000 / lat.mean():>10.1f} {peak / 1024:>10.1f}")
+
+
+def bench_size(n_dishes, n_profiles, base, seed):
+    print(f"\n=== {n_dishes:,} dishes, {n_profiles} profiles ===")
+    print(f"{'stage':<16} {'p50 ms':>9} {'p95 ms':>9} {'ops/s':>10} {'peak KiB':>10}")
+
+    frames = synthetic_frames(n_dishes, seed=seed, base=base)
+    latencies, peak = measure(lambda f: DishCatalog.from_frames(*f, version="bench"), [(frames,)] * LOAD_REPEATS)
+    report("load", latencies, peak)
+
+    catalog = DishCatalog.from_frames(*frames, version=f"bench-{n_dishes}")
+    set_catalog(catalog)
+    profiles = synthetic_profiles(catalog, n_profiles, seed=seed)
+    deficits = synthetic_deficits(n_profiles, seed=seed)
+    vectors = [recommender.deficit_vector(d) for d in deficits]
+    k = recommender.DIVERSITY_POOL_SIZE
+
+    def choose_mask(profile):
+        strict, relaxed = recommender.profile_filter_masks(catalog, profile)
+        return strict if strict.any() else relaxed
+
+    latencies, peak = measure(lambda p: recommender.profile_filter_masks(catalog, p), [(p,) for p in profiles])
+    report("filter", latencies, peak)
+
+    masks = [choose_mask(p) for p in profiles]
+    pairs = [(v, m) for v, m in zip(vectors, masks) if m.any()]
+    if catalog.index.exact:
+        # rank_candidates_indexed takes the full similarity row from an exact index
+        def score(v, m):
+            return catalog.index.similarities(v[None, :])[0]
+
+        searched = [np.flatnonzero(m) for _, m in pairs]
+    else:
+        def score(v, m):
+            return catalog.index.search(v, k * recommender.RANK_OVERFETCH, m)
+
+        searched = [score(v, m)[0] for v, m in pairs]
+    latencies, peak = measure(score, pairs)
+    report(f"score ({catalog.index.name})", latencies, peak)
+
+    boost_args = [(p, ids) for p, m, ids in zip(profiles, masks, searched) if m.any()]
+    latencies, peak = measure(lambda p, ids: recommender.preference_boosts(catalog, p, ids), boost_args)
+    report("boost", latencies, peak)
+
+    def select(profile, vec):
+        ranked = recommender.rank_candidates_indexed(catalog, vec, profile, k)
+        if ranked is None:
+            return None
+        dish_ids, base_scores, final_scores, _ = ranked
+        top = catalog.df.iloc[dish_ids].copy()
+        top["nutrient_score"] = base_scores
+        top["final_score"] = final_scores
+        return recommender.select_diverse_meal(top, [], top_n=k)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        latencies, peak = measure(select, list(zip(profiles, vectors)))
+    report("rank+select", latencies, peak)
+
+    def end_to_end(d, p):
+        return recommender.recommend_from_deficits(d, p, top_n=1, fetch_links=False)
+
+    def cold(d, p):
+        recommender._segment_cache.clear()
+        return end_to_end(d, p)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        items = list(zip(deficits, profiles))
+        latencies, peak = measure(cold, items)
+        report_cold = (latencies, peak)
+        end_to_end(*items[0])
+        latencies, peak = measure(end_to_end, [items[0]] * len(items))
+    report("end2end cold", *report_cold)
+    report("end2end warm", latencies, peak)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommender stage benchmark on synthetic catalogs.")
+    parser.add_argument("--dishes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--profiles", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    use_local_stand_ins()
+    np.random.seed(args.seed)
+    base = real_frames()
+    for n in args.dishes:
+        bench_size(n, args.profiles, base, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Equivalence and cost of utils.scoring against the scikit-learn calls it
+replaced (MinMaxScaler, cosine_similarity), on the shipped catalog.
+
+Checks (exits non-zero on a mismatch):
+    minmax    scaled matrix and fitted min/max vs MinMaxScaler
+    cosine    float32 scores vs sklearn's float64 scores (max abs error)
+    ranking   top-k dish order of rank_candidates for random deficits and
+              synthetic profiles, sklearn scores vs index.similarities
+
+Then reports latency of each kernel and, in fresh interpreters, the import
+time and resident memory (VmRSS, Linux) of `utils.scoring` vs the sklearn modules.
+
+Needs scikit-learn installed (it is no longer an app requirement).
+
+Usage (from latest_imp/):
+    python benchmarks/scoring_benchmark.py [--queries 500] [-k 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import meal_recommendor as recommender  # noqa: E402
+from catalog import DishCatalog, NUTRIENT_COLS, read_nutrition_csv, read_classification_csv, merge_catalog_frames  # noqa: E402
+from utils import scoring  # noqa: E402
+from benchmarks.synthetic import synthetic_profiles, synthetic_deficits  # noqa: E402
+
+try:
+    from sklearn.metrics.pairwise import cosine_similarity as sk_cosine_similarity
+    from sklearn.preprocessing import MinMaxScaler
+except ImportError:
+    sys.exit("scikit-learn is needed as the reference implementation: pip install scikit-learn")
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+COSINE_TOLERANCE = 1e-5
+
+# VmRSS rather than ru_maxrss, which carries the parent's peak across exec
+IMPORT_PROBE = """
+import time
+started = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - started
+rss = next(line.split()[1] for line in open("/proc/self/status") if line.startswith("VmRSS:"))
+print(elapsed, rss)
+"""
+IMPORT_CASES = {
+    "numpy only": "import numpy",
+    "utils.scoring": "import utils.scoring",
+    "sklearn": "import sklearn.preprocessing, sklearn.metrics.pairwise",
+}
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return 1000 * float(np.median(samples))
+
+
+def check_minmax(raw):
+    scaler = MinMaxScaler()
+    expected = scaler.fit_transform(raw)
+    data_min, data_max = scoring.minmax_fit(raw)
+    actual = scoring.minmax_scale(raw, data_min, data_max)
+    same = (np.array_equal(expected, actual)
+            and np.array_equal(scaler.data_min_, data_min)
+            and np.array_equal(scaler.data_max_, data_max))
+    print(f"minmax    identical={same} max_abs_diff={np.abs(expected - actual).max():.2e}")
+    return same
+
+
+def check_cosine(queries, catalog):
+    expected = sk_cosine_similarity(queries, catalog.nutrients_scaled)
+    actual = catalog.index.similarities(queries)
+    error = float(np.abs(expected - actual).max())
+    print(f"cosine    max_abs_error={error:.2e} (tolerance {COSINE_TOLERANCE:.0e})")
+    return error <= COSINE_TOLERANCE
+
+
+def check_ranking(queries, profiles, catalog, k):
+    expected_scores = sk_cosine_similarity(queries, catalog.nutrients_scaled)
+    actual_scores = catalog.index.similarities(queries)
+    mismatches = 0
+    for i, profile in enumerate(profiles):
+        expected = recommender.rank_candidates(catalog, expected_scores[i], profile, k)
+        actual = recommender.rank_candidates(catalog, actual_scores[i], profile, k)
+        if (expected is None) != (actual is None) or (
+                expected is not None and not np.array_equal(expected[0], actual[0])):
+            mismatches += 1
+    print(f"ranking   {mismatches} of {len(profiles)} top-{k} lists differ")
+    return mismatches == 0
+
+
+def report_latency(raw, queries, catalog):
+    n = len(queries)
+    print(f"\n{'kernel':<34} {'sklearn ms':>11} {'numpy ms':>9}")
+    rows = [
+        ("minmax fit+scale", lambda: MinMaxScaler().fit_transform(raw),
+         lambda: scoring.minmax_scale(raw, *scoring.minmax_fit(raw))),
+        (f"cosine batch ({n} x {len(catalog)})", lambda: sk_cosine_similarity(queries, catalog.nutrients_scaled),
+         lambda: catalog.index.similarities(queries)),
+        ("cosine single query", lambda: sk_cosine_similarity(queries[:1], catalog.nutrients_scaled),
+         lambda: catalog.index.similarities(queries[:1])),
+    ]
+    for name, reference, replacement in rows:
+        print(f"{name:<34} {timed(reference, 20):>11.3f} {timed(replacement, 20):>9.3f}")
+
+
+def report_imports():
+    print(f"\n{'import':<16} {'ms':>8} {'RSS MiB':>12}")
+    for name, imports in IMPORT_CASES.items():
+        proc = subprocess.run([sys.executable, "-c", IMPORT_PROBE.format(imports=imports)],
+                              cwd=APP_DIR, capture_output=True, text=True, check=True)
+        seconds, rss_kib = proc.stdout.split()
+        print(f"{name:<16} {float(seconds) * 1000:>8.1f} {int(rss_kib) / 1024:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="utils.scoring vs scikit-learn.")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=recommender.DIVERSITY_POOL_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    raw = merge_catalog_frames(read_nutrition_csv(), read_classification_csv())[NUTRIENT_COLS].to_numpy(dtype=np.float64)
+    catalog = DishCatalog.from_csv()
+    deficits = synthetic_deficits(args.queries, seed=args.seed)
+    queries = np.vstack([recommender.deficit_vector(d) for d in deficits])
+    profiles = synthetic_profiles(catalog, args.queries, seed=args.seed)
+
+    print(f"catalog {catalog.version}: {len(catalog)} dishes, {len(NUTRIENT_COLS)} nutrients\n")
+    ok = all([
+        check_minmax(raw),
+        check_cosine(queries, catalog),
+        check_ranking(queries, profiles, catalog, args.k),
+    ])
+    report_latency(raw, queries, catalog)
+    report_imports()
+    if not ok:
+        sys.exit("\nutils.scoring does not match scikit-learn")
+
+
+if __name__ == "__main__":
+    main()
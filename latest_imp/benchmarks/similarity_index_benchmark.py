@@ -0,0 +1,102 @@
+"""
+Recall vs latency of the similarity indexes against the exact scorer.
+
+Builds a synthetic catalog of N dishes by resampling the real catalog's
+scaled nutrient vectors with noise, then for a set of random deficit
+queries measures per-search latency (p50/p95) and recall@k of IVFIndex
+at several probe settings, relative to BruteForceIndex with the same
+pre-filter mask.
+
+Usage (from latest_imp/):
+    python benchmarks/similarity_index_benchmark.py [--dishes 50000 200000] [--queries 200] [-k 40]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from catalog import DishCatalog, NUTRIENT_COLS  # noqa: E402
+from utils.similarity_index import BruteForceIndex, IVFIndex  # noqa: E402
+
+PROBE_FRACTIONS = [0.02, 0.05, 0.1, 0.2]
+MASK_DENSITIES = [1.0, 0.25, 0.02]
+
+
+def synthetic_vectors(base, n, rng):
+    """n vectors resampled from `base` rows with multiplicative noise, clipped to [0, 1]."""
+    rows = base[rng.integers(0, len(base), n)]
+    noise = rng.lognormal(0.0, 0.35, rows.shape).astype(np.float32)
+    return np.clip(rows * noise, 0.0, 1.0)
+
+
+def random_queries(n, rng):
+    """Deficit-style queries: a few positive weights, sometimes one nutrient to avoid."""
+    queries = np.round(rng.random((n, len(NUTRIENT_COLS))) * (rng.random((n, len(NUTRIENT_COLS))) < 0.4), 2)
+    queries[~queries.any(axis=1), 2] = 1.0
+    avoid = rng.random(n) < 0.2
+    queries[avoid, rng.integers(0, len(NUTRIENT_COLS), int(avoid.sum()))] = -1.0
+    return queries
+
+
+def percentile_ms(samples, q):
+    return 1000 * float(np.percentile(samples, q))
+
+
+def run(index, queries, masks, exact_results, k):
+    latencies, recalls = [], []
+    for query, mask, exact_ids in zip(queries, masks, exact_results):
+        started = time.perf_counter()
+        ids, _ = index.search(query, k, mask)
+        latencies.append(time.perf_counter() - started)
+        if len(exact_ids):
+            recalls.append(len(np.intersect1d(ids, exact_ids)) / len(exact_ids))
+    return latencies, float(np.mean(recalls)) if recalls else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Similarity index recall/latency benchmark.")
+    parser.add_argument("--dishes", type=int, nargs="+", default=[50000, 200000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=40, help="results per search (top_n x RANK_OVERFETCH)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    base = np.asarray(DishCatalog.from_csv().nutrients_scaled)
+    queries = random_queries(args.queries, rng)
+
+    for n in args.dishes:
+        vectors = synthetic_vectors(base, n, rng)
+        print(f"\n=== {n:,} dishes, {args.queries} queries, k={args.k} ===")
+
+        started = time.perf_counter()
+        brute = BruteForceIndex(vectors)
+        print(f"brute build {time.perf_counter() - started:.2f}s")
+
+        started = time.perf_counter()
+        ivf = IVFIndex(vectors)
+        print(f"ivf build   {time.perf_counter() - started:.2f}s ({ivf.n_lists} lists)")
+
+        print(f"{'mask':>6} {'index':>14} {'p50 ms':>8} {'p95 ms':>8} {'recall':>7}")
+        for density in MASK_DENSITIES:
+            masks = [None if density >= 1.0 else rng.random(n) < density for _ in queries]
+            exact = [brute.search(q, args.k, mask)[0] for q, mask in zip(queries, masks)]
+
+            latencies, recall = run(brute, queries, masks, exact, args.k)
+            print(f"{density:>6.0%} {'brute':>14} {percentile_ms(latencies, 50):>8.2f} "
+                  f"{percentile_ms(latencies, 95):>8.2f} {recall:>7.3f}")
+
+            for fraction in PROBE_FRACTIONS:
+                ivf.n_probe = max(1, int(np.ceil(ivf.n_lists * fraction)))
+                latencies, recall = run(ivf, queries, masks, exact, args.k)
+                label = f"ivf {ivf.n_probe}/{ivf.n_lists}"
+                print(f"{density:>6.0%} {label:>14} {percentile_ms(latencies, 50):>8.2f} "
+                      f"{percentile_ms(latencies, 95):>8.2f} {recall:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
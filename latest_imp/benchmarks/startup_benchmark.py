@@ -0,0 +1,96 @@
+"""
+Cold-start cost of the web app: `import app` and `app.warm_up()`.
+
+Each run is a fresh interpreter with `-X importtime`, so the numbers are
+what a new gunicorn worker pays before it can serve a request. MONGO_URI
+points at a closed local port by default, which is the worst case for
+anything that talks to MongoDB during import.
+
+Reports wall time per phase (median over --runs) and the slowest imports
+by cumulative time from the last run.
+
+Usage (from latest_imp/):
+    python benchmarks/startup_benchmark.py [--runs 5] [--top 15] [--warm-up]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+UNREACHABLE_MONGO = "mongodb://127.0.0.1:1/mothers_nutrition?serverSelectionTimeoutMS=2000"
+
+IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+import app
+print("IMPORT", time.perf_counter() - started)
+"""
+
+WARM_UP_SNIPPET = IMPORT_SNIPPET + """
+started = time.perf_counter()
+app.warm_up()
+print("WARM_UP", time.perf_counter() - started)
+import recommender_pool
+recommender_pool.shutdown_recommender_pool()
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.*)")
+
+
+def run_once(snippet, env):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", snippet],
+        cwd=APP_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"Run failed:\n{proc.stderr[-2000:]}")
+    timings = {}
+    for line in proc.stdout.splitlines():
+        phase, _, seconds = line.partition(" ")
+        if phase in ("IMPORT", "WARM_UP"):
+            timings[phase] = float(seconds)
+    return timings, proc.stderr
+
+
+def slowest_imports(stderr, top):
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            rows.append((int(match.group(2)), match.group(3).rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time of latest_imp/app.py.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--warm-up", action="store_true", help="also time app.warm_up()")
+    parser.add_argument("--mongo-uri", default=UNREACHABLE_MONGO)
+    args = parser.parse_args()
+
+    env = dict(os.environ, MONGO_URI=args.mongo_uri, RECOMMENDER_POOL_SIZE=os.environ.get("RECOMMENDER_POOL_SIZE", "0"))
+    snippet = WARM_UP_SNIPPET if args.warm_up else IMPORT_SNIPPET
+
+    samples = {"IMPORT": [], "WARM_UP": []}
+    stderr = ""
+    for _ in range(args.runs):
+        timings, stderr = run_once(snippet, env)
+        for phase, seconds in timings.items():
+            samples[phase].append(seconds)
+
+    for phase, values in samples.items():
+        if values:
+            print(f"{phase.lower():<8} median {statistics.median(values) * 1000:8.1f} ms "
+                  f"(min {min(values) * 1000:.1f}, max {max(values) * 1000:.1f}, {len(values)} runs)")
+
+    print("\nslowest imports (cumulative, last run):")
+    for micros, name in slowest_imports(stderr, args.top):
+        print(f"{micros / 1000:9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Synthetic dish catalogs, mother profiles and deficits for benchmarks.
+
+Catalogs are resampled from the real CSVs so the state / income / diet /
+cuisine / allergen label distributions (and how they co-occur) stay
+realistic: each synthetic dish copies a real dish's labels, with some
+columns swapped in from other dishes, and gets that dish's nutrients with
+multiplicative noise.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from catalog import (  # noqa: E402
+    DishCatalog, NUTRIENT_COLS, CLASSIFICATION_RENAMES,
+    read_nutrition_csv, read_classification_csv, merge_catalog_frames,
+)
+from utils.nutrient_mapper import SHORT_TO_LONG_MAP  # noqa: E402
+
+# Fraction of label columns taken from a different real dish
+LABEL_MIX_RATE = 0.3
+NUTRIENT_NOISE = 0.25
+
+DIET_MIX = {"Vegetarian": 0.6, "Non-Vegetarian": 0.3, "Eggitarian": 0.1}
+AREA_MIX = {"urban": 0.45, "rural": 0.35, "both": 0.2}
+INCOME_BANDS = ["<1L", "1-3L", "3-6L", ">6L"]
+ALLERGY_CHOICES = [["dairy"], ["gluten"], ["nuts"], ["egg"], ["dairy", "nuts"], ["soy"]]
+
+
+def real_frames():
+    """The real catalog as one merged frame (classification columns renamed)."""
+    return merge_catalog_frames(read_nutrition_csv(), read_classification_csv())
+
+
+def synthetic_frames(n_dishes, seed=0, base=None):
+    """(df_nutri, df_class) with n_dishes rows, ready for DishCatalog.from_frames."""
+    rng = np.random.default_rng(seed)
+    base = real_frames() if base is None else base
+    label_cols = list(CLASSIFICATION_RENAMES.values())
+    rows = rng.integers(0, len(base), n_dishes)
+
+    names = [f"{name} #{i}" for i, name in enumerate(base["Dish Name"].to_numpy()[rows])]
+    nutrients = base[NUTRIENT_COLS].to_numpy(dtype=np.float64)[rows]
+    nutrients *= rng.lognormal(0.0, NUTRIENT_NOISE, nutrients.shape)
+
+    df_nutri = pd.DataFrame(np.round(nutrients, 2), columns=NUTRIENT_COLS)
+    df_nutri.insert(0, "Dish Name", names)
+
+    labels = {}
+    for col in label_cols:
+        source = np.where(rng.random(n_dishes) < LABEL_MIX_RATE, rng.integers(0, len(base), n_dishes), rows)
+        labels[col] = base[col].fillna("").astype(str).to_numpy()[source]
+    df_class = pd.DataFrame(labels)
+    df_class.insert(0, "Dish Name", names)
+    # merge_catalog_frames expects the raw CSV headers
+    df_class = df_class.rename(columns={v: k for k, v in CLASSIFICATION_RENAMES.items()})
+    return df_nutri, df_class
+
+
+def synthetic_catalog(n_dishes, seed=0, base=None):
+    df_nutri, df_class = synthetic_frames(n_dishes, seed=seed, base=base)
+    return DishCatalog.from_frames(df_nutri, df_class, version=f"synthetic-{n_dishes}-{seed}")
+
+
+def _choice(rng, mix):
+    keys = list(mix)
+    return keys[rng.choice(len(keys), p=np.array(list(mix.values())))]
+
+
+def synthetic_profiles(catalog, n_profiles, seed=0):
+    """Profiles shaped like build_recommender_profile output, states weighted by dish coverage."""
+    rng = np.random.default_rng(seed)
+    states = catalog.facets["states"]
+    weights = states.matrix.sum(axis=1).astype(float)
+    weights /= weights.sum()
+    cuisines = catalog.facets["cuisine"].vocab
+
+    profiles = []
+    for i in range(n_profiles):
+        low = rng.integers(0, len(INCOME_BANDS))
+        profiles.append({
+            "mother_id": f"bench-{i}",
+            "state": states.vocab[rng.choice(len(states.vocab), p=weights)],
+            "area": _choice(rng, AREA_MIX),
+            "income_range": ",".join(INCOME_BANDS[low:low + rng.integers(1, 3)]),
+            "diet_pref": _choice(rng, DIET_MIX),
+            "cuisine_pref": cuisines[rng.integers(0, len(cuisines))] if rng.random() < 0.5 else "",
+            "allergies_to_avoid": ALLERGY_CHOICES[rng.integers(0, len(ALLERGY_CHOICES))] if rng.random() < 0.3 else [],
+        })
+    return profiles
+
+
+def synthetic_deficits(n, seed=0):
+    """Deficit dicts (short keys) with 1-4 nutrients each, like compare_nutrients output."""
+    rng = np.random.default_rng(seed)
+    keys = list(SHORT_TO_LONG_MAP)
+    deficits = []
+    for _ in range(n):
+        chosen = rng.choice(len(keys), rng.integers(1, 5), replace=False)
+        deficits.append({keys[j]: round(float(rng.uniform(2, 40)), 1) for j in chosen})
+    return deficits
@@ -0,0 +1,34 @@
+"""
+Offline build step for the binary dish catalog.
+
+Parses and repairs the two CSVs in data/ once and writes the versioned
+artifact (float32 nutrient matrices and their unit-length rows, MinMax
+params, encoded categorical columns) that app workers memory-map at
+startup.
+
+Usage:
+    python build_catalog.py [--out DIR]
+"""
+import argparse
+
+from catalog import DishCatalog, CatalogError, CATALOG_ARTIFACT_DIR
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mappable dish catalog artifact.")
+    parser.add_argument("--out", default=CATALOG_ARTIFACT_DIR, help="artifact directory")
+    args = parser.parse_args()
+
+    try:
+        catalog = DishCatalog.from_csv()
+    except CatalogError as e:
+        print(f"✗ Could not build catalog: {e}")
+        raise SystemExit(1)
+
+    manifest = catalog.write_artifact(args.out)
+    print(f"✓ Wrote {manifest['n_dishes']} dishes to {args.out} "
+          f"(source version {manifest['source_version']}, format {manifest['format_version']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Offline build step for the precomputed ranking table (see ranking_table.py).
+
+Collects the distinct recommender segments of every mother in the users
+collection (or of the profiles in a JSON file), ranks the dish catalog for
+every deficit subset in each of them and writes the table that app
+workers memory-map. Re-run it after the catalog changes (the table is
+tied to one catalog version) and periodically as new segments sign up;
+segments missing from the table are simply scored online.
+
+Usage:
+    python build_ranking_table.py [--profiles FILE] [-k 32] [--out DIR]
+"""
+import argparse
+import json
+import time
+
+from catalog import load_catalog, CatalogError
+from ranking_table import RankingTable, RANKING_TABLE_DIR, RANKING_TABLE_K
+from utils.segments import build_recommender_profile
+
+
+def mother_profiles():
+    """Recommender profiles of every mother in MongoDB (allergies are not part of a segment, so not read)."""
+    from models import users_col
+
+    return [build_recommender_profile(mother) for mother in users_col.find(
+        {"role": "mother"},
+        {"location_state": 1, "location_area_type": 1, "income_range": 1,
+         "dietary_preference": 1, "cuisine_preference": 1, "recommender_segment": 1}
+    )]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the deficit subset x segment ranking table.")
+    parser.add_argument("--profiles", help="JSON list of recommender profiles instead of reading MongoDB")
+    parser.add_argument("-k", type=int, default=RANKING_TABLE_K, help="dishes stored per row")
+    parser.add_argument("--out", default=RANKING_TABLE_DIR, help="table directory")
+    args = parser.parse_args()
+
+    try:
+        catalog = load_catalog()
+    except CatalogError as e:
+        print(f"✗ Could not load catalog: {e}")
+        raise SystemExit(1)
+
+    if args.profiles:
+        with open(args.profiles, encoding="utf-8") as fh:
+            profiles = json.load(fh)
+    else:
+        profiles = mother_profiles()
+    if not profiles:
+        print("✗ No profiles to build segments from.")
+        raise SystemExit(1)
+
+    started = time.perf_counter()
+    table = RankingTable.build(catalog, profiles, k=args.k)
+    manifest = table.write(args.out)
+    print(f"✓ Wrote {len(table)} segments x {table.ids.shape[1]} deficit subsets (k={table.k}, "
+          f"{table.ids.nbytes / 2**20:.1f} MiB) for catalog {manifest['catalog_version']} to {args.out} "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,668 @@
+"""
+Dish catalog engine.
+
+Builds the merged nutrition + classification frame and the MinMax-scaled
+nutrient matrix once per process, then hands the same read-only catalog to
+every recommendation call instead of re-parsing both CSVs each time.
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from utils.similarity_index import build_similarity_index
+from utils.scoring import minmax_fit, minmax_scale, normalize_rows
+from utils.dish_matcher import DishMatcher, read_alias_file
+
+# pandas is imported inside the functions that build a catalog, so
+# importing this module (and the app) stays cheap
+
+SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+CLASSIFICATION_DATA_FILE = os.path.join(PROJECT_ROOT, "data", "food-mother-classified-2.csv")
+NUTRITION_DATA_FILE = os.path.join(PROJECT_ROOT, "data", "Indian_Food_Nutrition_Processed.csv")
+# Nutrition-CSV spellings mapped to classification-CSV names (written by align_dish_names.py)
+DISH_ALIASES_FILE = os.environ.get("DISH_ALIASES_FILE", os.path.join(PROJECT_ROOT, "data", "dish_aliases.json"))
+
+# Prebuilt binary catalog written by build_catalog.py and memory-mapped by workers
+CATALOG_ARTIFACT_DIR = os.environ.get(
+    "CATALOG_ARTIFACT_DIR", os.path.join(PROJECT_ROOT, "data", "catalog_artifact")
+)
+ARTIFACT_FORMAT_VERSION = 1
+ARTIFACT_MANIFEST = "manifest.json"
+
+# Seconds between checks for changed CSVs / artifact; 0 disables hot reload
+CATALOG_RELOAD_INTERVAL = float(os.environ.get("CATALOG_RELOAD_INTERVAL", 30))
+
+# ----------------------------------------------------------------
+# Nutrient columns
+# ----------------------------------------------------------------
+NUTRIENT_COLS = [
+    "Calories (kcal)", "Carbohydrates (g)", "Protein (g)", "Fats (g)",
+    "Free Sugar (g)", "Fibre (g)", "Sodium (mg)", "Calcium (mg)",
+    "Iron (mg)", "Vitamin C (mg)", "Folate (µg)"
+]
+
+CLASSIFICATION_RENAMES = {
+    "States (Commonly Found In)": "states",
+    "Area Type (Rural/Urban/Both)": "area",
+    "Diet Type": "diet_type",
+    "Income Range (Commonly Consumed By)": "income_range",
+    "Cuisine Type": "cuisine",
+    "Known Allergens": "allergens"
+}
+
+# Classification columns indexed as token x dish matrices for profile filtering
+FACET_COLUMNS = ["states", "area", "diet_type", "income_range", "cuisine", "allergens"]
+
+# ----------------------------------------------------------------
+# Allergen vocabulary
+# ----------------------------------------------------------------
+# Spelling variants and synonyms (from the data and from signup input)
+# mapped onto one canonical allergen name
+ALLERGEN_ALIASES = {
+    "diary": "dairy", "milk": "dairy", "lactose": "dairy", "dairy products": "dairy",
+    "eggs": "egg",
+    "nut": "nuts", "tree nuts": "nuts", "tree nut": "nuts",
+    "peanuts": "peanut", "groundnut": "peanut", "groundnuts": "peanut",
+    "gluten free": "gluten",
+    "chocolate": "cocoa",
+}
+
+# An allergy to the key also excludes dishes tagged with any of the values
+ALLERGEN_IMPLIES = {
+    "gluten": ["wheat"],
+    "nuts": ["peanut"],
+}
+
+_ALLERGEN_SPLIT = re.compile(r"[,;/&]|\band\b")
+
+
+def normalize_allergens(text):
+    """
+    Splits free-form allergen text ("Gluten/Wheat", "Dairy, Egg", "milk")
+    into canonical lowercase allergen names.
+    """
+    names = []
+    for part in _ALLERGEN_SPLIT.split(str(text or "").lower()):
+        part = " ".join(part.split())
+        if not part or part == "none":
+            continue
+        part = ALLERGEN_ALIASES.get(part, part)
+        if part not in names:
+            names.append(part)
+    return names
+
+
+class CatalogError(Exception):
+    """Raised when the dish catalog cannot be built from the data files."""
+
+
+# ----------------------------------------------------------------
+# CSV loading
+# ----------------------------------------------------------------
+def read_classification_csv(path=CLASSIFICATION_DATA_FILE):
+    """
+    Reads the classification CSV, repairing rows whose cuisine spilled into
+    extra columns and padding short rows.
+    """
+    import pandas as pd
+
+    try:
+        with open(path, 'r', encoding='utf-8-sig') as fh:
+            reader = csv.reader(fh)
+            rows = [r for r in reader if any(cell.strip() for cell in r)]
+    except FileNotFoundError as e:
+        raise CatalogError(f"Data file not found: {e.filename}")
+
+    if not rows:
+        raise CatalogError(f"{path} is empty or unreadable.")
+
+    header = rows[0]
+    num_cols = len(header)
+    parsed = []
+    for r in rows[1:]:
+        if len(r) == num_cols:
+            parsed.append(r)
+            continue
+        if len(r) > num_cols:
+            if len(r) >= 6:
+                first_five, middle_parts, last = r[0:5], r[5:-1], r[-1]
+                cuisine = ";".join([p for p in middle_parts if p.strip()]) or r[5]
+                parsed.append(first_five + [cuisine, last])
+            continue
+        if len(r) < num_cols:
+            parsed.append(r + [''] * (num_cols - len(r)))
+
+    return pd.DataFrame(parsed, columns=[c.strip() for c in header])
+
+
+def read_nutrition_csv(path=NUTRITION_DATA_FILE):
+    import pandas as pd
+
+    try:
+        return pd.read_csv(path, encoding='utf-8-sig')
+    except FileNotFoundError as e:
+        raise CatalogError(f"Data file not found: {e.filename}")
+
+
+def merge_catalog_frames(df_nutri, df_class, aliases=None):
+    """
+    Inner-joins nutrition and classification frames on 'Dish Name', renames
+    the classification columns and coerces nutrients to numbers. `aliases`
+    renames nutrition dishes to their classification spelling first.
+    """
+    import pandas as pd
+
+    df_class = df_class.copy()
+    df_nutri = df_nutri.copy()
+    df_class.columns = df_class.columns.str.strip(' "')
+    df_nutri.columns = df_nutri.columns.str.strip(' "')
+
+    if 'Dish Name' not in df_class.columns:
+        raise CatalogError(f"'Dish Name' column not found in {CLASSIFICATION_DATA_FILE}.")
+    if 'Dish Name' not in df_nutri.columns:
+        raise CatalogError(f"'Dish Name' column not found in {NUTRITION_DATA_FILE}.")
+
+    df_class['Dish Name'] = df_class['Dish Name'].str.strip(' "')
+    df_nutri['Dish Name'] = df_nutri['Dish Name'].str.strip(' "')
+    if aliases:
+        df_nutri['Dish Name'] = df_nutri['Dish Name'].replace(aliases)
+
+    df = pd.merge(df_nutri, df_class, on="Dish Name", how="inner")
+    if df.empty:
+        raise CatalogError("No dishes found in common between nutrition and classification files.")
+
+    df = df.rename(columns=CLASSIFICATION_RENAMES)
+
+    missing_nutrient_cols = [col for col in NUTRIENT_COLS if col not in df.columns]
+    if missing_nutrient_cols:
+        raise CatalogError(f"Missing required nutrient columns: {missing_nutrient_cols}.")
+
+    for col in NUTRIENT_COLS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = df.dropna(subset=NUTRIENT_COLS)
+    if df.empty:
+        raise CatalogError("All merged dishes have missing or non-numeric nutrient data.")
+
+    return df.reset_index(drop=True)
+
+
+def source_paths(nutrition_path=NUTRITION_DATA_FILE, classification_path=CLASSIFICATION_DATA_FILE):
+    """The catalog's input files: both CSVs, plus the alias file once one has been built."""
+    paths = [nutrition_path, classification_path]
+    if os.path.exists(DISH_ALIASES_FILE):
+        paths.append(DISH_ALIASES_FILE)
+    return paths
+
+
+def source_version(paths=None):
+    """Short content hash of the source files, used as the catalog version."""
+    digest = hashlib.sha1()
+    paths = source_paths() if paths is None else paths
+    for path in paths:
+        try:
+            with open(path, 'rb') as fh:
+                digest.update(fh.read())
+        except FileNotFoundError as e:
+            raise CatalogError(f"Data file not found: {e.filename}")
+    return digest.hexdigest()[:12]
+
+
+# ----------------------------------------------------------------
+# Facet index
+# ----------------------------------------------------------------
+class FacetIndex:
+    """
+    Boolean token x dish matrix for one ';'-separated classification column
+    (e.g. states, income bands, cuisines), so profile filters become NumPy
+    ORs/ANDs over a few rows instead of a Python call per dish.
+    """
+
+    MAX_CACHED_MASKS = 1024
+
+    def __init__(self, values):
+        cells = [[t.strip() for t in str(v).split(";") if t.strip()] for v in values]
+        self.size = len(cells)
+        self.vocab = sorted({t for tokens in cells for t in tokens})
+        self.vocab_lower = [t.lower() for t in self.vocab]
+        token_ids = {t: i for i, t in enumerate(self.vocab)}
+
+        matrix = np.zeros((len(self.vocab), self.size), dtype=bool)
+        for dish, tokens in enumerate(cells):
+            for t in tokens:
+                matrix[token_ids[t], dish] = True
+        matrix.flags.writeable = False
+        self.matrix = matrix
+
+        self._masks = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, key, build):
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = build()
+            mask.flags.writeable = False
+            with self._lock:
+                if len(self._masks) >= self.MAX_CACHED_MASKS:
+                    self._masks.clear()
+                self._masks[key] = mask
+        return mask
+
+    def _rows_mask(self, rows):
+        if not rows:
+            return np.zeros(self.size, dtype=bool)
+        return self.matrix[rows].any(axis=0)
+
+    def contains(self, value, case_sensitive=True):
+        """
+        Dishes with a token containing `value`, mirroring the old
+        `value in str(row[col])` check. An empty value matches every dish.
+        """
+        if not value:
+            return self._cached(("all",), lambda: np.ones(self.size, dtype=bool))
+
+        def build():
+            vocab = self.vocab if case_sensitive else self.vocab_lower
+            needle = value if case_sensitive else value.lower()
+            return self._rows_mask([i for i, t in enumerate(vocab) if needle in t])
+
+        return self._cached(("contains", value, case_sensitive), build)
+
+    def equals(self, value):
+        """Dishes with a token equal to `value` (case-insensitive)."""
+        needle = (value or "").lower()
+        return self._cached(
+            ("equals", needle),
+            lambda: self._rows_mask([i for i, t in enumerate(self.vocab_lower) if t == needle])
+        )
+
+
+class AllergenIndex:
+    """
+    Inverted index from canonical allergen name to a dish bitmap.
+
+    Built once from the catalog's allergen column, so a mother's allergy
+    list resolves to a single exclusion mask without touching dish rows.
+    """
+
+    def __init__(self, values, fallback=None):
+        cells = [normalize_allergens(v) for v in values]
+        self.size = len(cells)
+        self.vocab = sorted({a for names in cells for a in names})
+        self._ids = {a: i for i, a in enumerate(self.vocab)}
+
+        bitmaps = np.zeros((len(self.vocab), self.size), dtype=bool)
+        for dish, names in enumerate(cells):
+            for a in names:
+                bitmaps[self._ids[a], dish] = True
+        bitmaps.flags.writeable = False
+        self.bitmaps = bitmaps
+
+        # Raw-text FacetIndex used for allergy terms outside the vocabulary
+        self._fallback = fallback
+        self._masks = {}
+        self._lock = threading.Lock()
+
+    def counts(self):
+        return {a: int(self.bitmaps[i].sum()) for i, a in enumerate(self.vocab)}
+
+    def dishes_containing(self, allergen):
+        """Boolean mask of dishes tagged with `allergen` (any spelling)."""
+        return self.exclusion_mask([allergen])
+
+    def exclusion_mask(self, allergies):
+        """Boolean mask of dishes that are unsafe for the given allergy list."""
+        terms = set()
+        for allergy in allergies or []:
+            for name in normalize_allergens(allergy):
+                terms.add(name)
+                terms.update(ALLERGEN_IMPLIES.get(name, []))
+
+        key = frozenset(terms)
+        mask = self._masks.get(key)
+        if mask is not None:
+            return mask
+
+        mask = np.zeros(self.size, dtype=bool)
+        for term in terms:
+            if term in self._ids:
+                mask |= self.bitmaps[self._ids[term]]
+            elif self._fallback is not None:
+                # Unknown term: keep the conservative substring match on the raw text
+                mask |= self._fallback.contains(term, case_sensitive=False)
+        mask.flags.writeable = False
+
+        with self._lock:
+            if len(self._masks) >= FacetIndex.MAX_CACHED_MASKS:
+                self._masks.clear()
+            self._masks[key] = mask
+        return mask
+
+
+# ----------------------------------------------------------------
+# Catalog
+# ----------------------------------------------------------------
+class DishCatalog:
+    """
+    In-memory dish catalog shared by every recommendation call.
+
+    `df` holds one row per dish with 'Dish Name' and the renamed
+    classification columns. `nutrients_raw` and `nutrients_scaled` are
+    float32 matrices (dishes x NUTRIENT_COLS) in the same row order, the
+    latter MinMax-scaled with `data_min` / `data_max`. `facets` maps each
+    FACET_COLUMNS name to its FacetIndex, `allergens` is the allergen
+    inverted index and `index` the cosine-similarity index over
+    `nutrients_scaled` (see utils/similarity_index.py), built on
+    `unit_vectors` (those rows already normalized) when given. `matcher` resolves
+    free-text dish names to row ids (see utils/dish_matcher.py), using the
+    `aliases` the catalog was merged with. Everything is treated as
+    read-only: callers filter or copy, never modify in place.
+    """
+
+    def __init__(self, df, nutrients_raw, nutrients_scaled, data_min, data_max, version, source="csv", aliases=None,
+                 unit_vectors=None):
+        self.df = df
+        self.aliases = dict(aliases or {})
+        self.nutrients_raw = nutrients_raw
+        self.nutrients_scaled = nutrients_scaled
+        self.data_min = data_min
+        self.data_max = data_max
+        self.version = version
+        self.source = source
+
+        for arr in (nutrients_raw, nutrients_scaled, data_min, data_max):
+            if arr.flags.writeable:
+                arr.flags.writeable = False
+
+        self.facets = {col: FacetIndex(df[col]) for col in FACET_COLUMNS if col in df.columns}
+        self.allergens = AllergenIndex(
+            df["allergens"] if "allergens" in df.columns else [""] * len(df),
+            fallback=self.facets.get("allergens"),
+        )
+        if unit_vectors is not None:
+            self.index = build_similarity_index(unit_vectors, normalized=True)
+        else:
+            self.index = build_similarity_index(nutrients_scaled)
+        self._matcher = None
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def matcher(self):
+        # Built on first use: only name lookups need it, and it is cheap to rebuild
+        if self._matcher is None:
+            self._matcher = DishMatcher(self.df["Dish Name"], aliases=self.aliases)
+        return self._matcher
+
+    @classmethod
+    def from_frames(cls, df_nutri, df_class, version=None, aliases=None):
+        df = merge_catalog_frames(df_nutri, df_class, aliases)
+
+        nutrients_raw = df[NUTRIENT_COLS].to_numpy(dtype=np.float64)
+        data_min, data_max = minmax_fit(nutrients_raw)
+        nutrients_scaled = minmax_scale(nutrients_raw, data_min, data_max)
+
+        labels = df.drop(columns=NUTRIENT_COLS).fillna("").astype(str).astype(object)
+        return cls(
+            labels,
+            nutrients_raw.astype(np.float32),
+            nutrients_scaled.astype(np.float32),
+            data_min.astype(np.float32),
+            data_max.astype(np.float32),
+            version or "adhoc",
+            aliases=aliases,
+        )
+
+    @classmethod
+    def from_csv(cls, nutrition_path=NUTRITION_DATA_FILE, classification_path=CLASSIFICATION_DATA_FILE):
+        version = source_version(source_paths(nutrition_path, classification_path))
+        df_nutri = read_nutrition_csv(nutrition_path)
+        df_class = read_classification_csv(classification_path)
+        aliases = read_alias_file(DISH_ALIASES_FILE)
+        return cls.from_frames(df_nutri, df_class, version=version, aliases=aliases)
+
+    # ------------------------------------------------------------
+    # Binary artifact
+    # ------------------------------------------------------------
+    def write_artifact(self, artifact_dir=CATALOG_ARTIFACT_DIR):
+        """
+        Writes the catalog as .npy matrices plus a JSON manifest. Categorical
+        columns are stored as int32 codes into per-column vocabularies.
+        """
+        import pandas as pd
+
+        os.makedirs(artifact_dir, exist_ok=True)
+
+        np.save(os.path.join(artifact_dir, "nutrients_raw.npy"), np.ascontiguousarray(self.nutrients_raw))
+        np.save(os.path.join(artifact_dir, "nutrients_scaled.npy"), np.ascontiguousarray(self.nutrients_scaled))
+        # The similarity index's unit rows, so workers map them instead of each normalizing a copy
+        np.save(os.path.join(artifact_dir, "nutrients_unit.npy"), np.ascontiguousarray(normalize_rows(self.nutrients_scaled)))
+
+        columns = []
+        for i, col in enumerate(self.df.columns):
+            codes, vocab = pd.factorize(self.df[col], sort=True)
+            filename = f"codes_{i}.npy"
+            np.save(os.path.join(artifact_dir, filename), codes.astype(np.int32))
+            columns.append({"name": col, "file": filename, "vocab": list(vocab)})
+
+        manifest = {
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "source_version": self.version,
+            "n_dishes": len(self),
+            "nutrient_cols": NUTRIENT_COLS,
+            "data_min": self.data_min.tolist(),
+            "data_max": self.data_max.tolist(),
+            "aliases": self.aliases,
+            "columns": columns,
+            "built_at": datetime.utcnow().isoformat()
+        }
+        # Manifest goes last so a half-written artifact is never picked up
+        tmp_path = os.path.join(artifact_dir, ARTIFACT_MANIFEST + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, os.path.join(artifact_dir, ARTIFACT_MANIFEST))
+        return manifest
+
+    @classmethod
+    def from_artifact(cls, artifact_dir=CATALOG_ARTIFACT_DIR):
+        """
+        Loads a catalog written by write_artifact. Matrices are memory-mapped
+        read-only, so every worker on the host shares the same pages.
+        """
+        import pandas as pd
+
+        manifest = read_artifact_manifest(artifact_dir)
+        if manifest is None:
+            raise CatalogError(f"No catalog artifact found in {artifact_dir}.")
+        if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+            raise CatalogError(
+                f"Catalog artifact format {manifest.get('format_version')} is not supported "
+                f"(expected {ARTIFACT_FORMAT_VERSION}). Re-run build_catalog.py."
+            )
+        if manifest.get("nutrient_cols") != NUTRIENT_COLS:
+            raise CatalogError("Catalog artifact nutrient columns do not match. Re-run build_catalog.py.")
+
+        def load(name):
+            return np.load(os.path.join(artifact_dir, name), mmap_mode="r")
+
+        # Artifacts written before nutrients_unit.npy existed: normalized at load
+        unit_path = os.path.join(artifact_dir, "nutrients_unit.npy")
+        unit_vectors = load("nutrients_unit.npy") if os.path.exists(unit_path) else None
+
+        labels = {}
+        for col in manifest["columns"]:
+            vocab = np.array(col["vocab"], dtype=object)
+            labels[col["name"]] = vocab[load(col["file"])]
+        df = pd.DataFrame(labels, dtype=object)
+
+        return cls(
+            df,
+            load("nutrients_raw.npy"),
+            load("nutrients_scaled.npy"),
+            np.array(manifest["data_min"], dtype=np.float32),
+            np.array(manifest["data_max"], dtype=np.float32),
+            manifest["source_version"],
+            source="artifact",
+            aliases=manifest.get("aliases"),
+            unit_vectors=unit_vectors,
+        )
+
+
+def read_artifact_manifest(artifact_dir=CATALOG_ARTIFACT_DIR):
+    try:
+        with open(os.path.join(artifact_dir, ARTIFACT_MANIFEST), encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+def load_catalog():
+    """
+    Loads the catalog from the prebuilt artifact when it matches the current
+    CSVs (or the CSVs are not shipped), otherwise builds it from the CSVs.
+    """
+    manifest = read_artifact_manifest()
+    if manifest is not None:
+        try:
+            current = source_version()
+        except CatalogError:
+            current = None  # CSVs not deployed; trust the artifact
+
+        if current is None or manifest.get("source_version") == current:
+            try:
+                return DishCatalog.from_artifact()
+            except CatalogError as e:
+                print(f"[Catalog] Ignoring artifact: {e}")
+        else:
+            print("[Catalog] Artifact is stale (data files changed). Building from CSV.")
+
+    return DishCatalog.from_csv()
+
+
+def source_fingerprint():
+    """
+    Cheap change detector: (mtime, size) of both CSVs, the alias file and
+    the artifact manifest. Only when it changes is the catalog actually
+    rebuilt; the rebuilt catalog's content-hash version decides whether it
+    is swapped in.
+    """
+    fingerprint = []
+    for path in (NUTRITION_DATA_FILE, CLASSIFICATION_DATA_FILE, DISH_ALIASES_FILE,
+                 os.path.join(CATALOG_ARTIFACT_DIR, ARTIFACT_MANIFEST)):
+        try:
+            st = os.stat(path)
+            fingerprint.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            fingerprint.append(None)
+    return tuple(fingerprint)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+_catalog_loaded_at = None
+_loaded_fingerprint = None
+_last_reload_check = 0.0
+_reload_thread = None
+
+
+def _install_catalog(catalog, fingerprint):
+    global _catalog, _catalog_loaded_at, _loaded_fingerprint
+    # A single reference assignment: callers that already hold the old
+    # catalog keep using it until their request finishes
+    _catalog = catalog
+    _catalog_loaded_at = datetime.utcnow()
+    _loaded_fingerprint = fingerprint
+    print(f"[Catalog] Loaded {len(catalog)} dishes from {catalog.source} (version {catalog.version}).")
+
+
+def _reload_worker(fingerprint):
+    global _loaded_fingerprint
+    try:
+        catalog = load_catalog()
+    except CatalogError as e:
+        print(f"[Catalog] Reload failed, keeping version {_catalog.version}: {e}")
+        _loaded_fingerprint = fingerprint  # don't retry until the files change again
+        return
+
+    if catalog.version == _catalog.version:
+        _loaded_fingerprint = fingerprint
+        return
+    _install_catalog(catalog, fingerprint)
+
+
+def reload_catalog(block=False):
+    """
+    Rebuilds the catalog in a background thread if its source files changed
+    and swaps it in when the content version differs. Returns the thread,
+    or None when nothing changed or a reload is already running.
+    """
+    global _reload_thread
+    fingerprint = source_fingerprint()
+    with _catalog_lock:
+        if _catalog is None or fingerprint == _loaded_fingerprint:
+            return None
+        if _reload_thread is not None and _reload_thread.is_alive():
+            return None
+        print("[Catalog] Data files changed. Rebuilding catalog in the background.")
+        _reload_thread = threading.Thread(target=_reload_worker, args=(fingerprint,),
+                                          name="catalog-reload", daemon=True)
+        _reload_thread.start()
+
+    if block:
+        _reload_thread.join()
+    return _reload_thread
+
+
+def set_catalog(catalog):
+    """Serves the given catalog from now on (benchmarks, offline runs, tests)."""
+    with _catalog_lock:
+        _install_catalog(catalog, source_fingerprint())
+
+
+def catalog_status():
+    """Version and origin of the catalog currently being served."""
+    if _catalog is None:
+        return {"loaded": False}
+    return {
+        "loaded": True,
+        "version": _catalog.version,
+        "source": _catalog.source,
+        "dishes": len(_catalog),
+        "similarity_index": _catalog.index.name,
+        "loaded_at": _catalog_loaded_at.isoformat() + "Z",
+        "reloading": _reload_thread is not None and _reload_thread.is_alive(),
+    }
+
+
+def get_catalog():
+    """
+    Returns the process-wide catalog, loading it on first use.
+    Every CATALOG_RELOAD_INTERVAL seconds it also checks whether the data
+    files changed and, if so, reloads them in the background (see
+    reload_catalog). Callers should fetch the catalog once per request and
+    use that object throughout, so a swap never mixes two versions.
+    Raises CatalogError if the data files are missing or unusable.
+    """
+    global _last_reload_check
+    if _catalog is not None:
+        if CATALOG_RELOAD_INTERVAL > 0 and time.monotonic() - _last_reload_check >= CATALOG_RELOAD_INTERVAL:
+            _last_reload_check = time.monotonic()
+            reload_catalog()
+        return _catalog
+
+    with _catalog_lock:
+        if _catalog is None:
+            fingerprint = source_fingerprint()
+            _install_catalog(load_catalog(), fingerprint)
+            _last_reload_check = time.monotonic()
+    return _catalog
@@ -0,0 +1,78 @@
+"""
+Nightly batch: weekly meal plans for every mother with an active plan.
+
+Reads each mother's active nutrition plan and profile, generates a 7-day
+breakfast/lunch/dinner dish schedule for all of them in one batch (see
+meal_planner.generate_week_plans) and stores it in weekly_meal_plans.
+
+Usage:
+    python generate_weekly_plans.py [--start YYYY-MM-DD] [--no-repeat-days N] [--dry-run]
+"""
+import argparse
+import time
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+from models import plans_col, users_col, weekly_plans_col, save_weekly_meal_plan, parse_required_nutrients
+from meal_planner import generate_week_plans, WEEKLY_PLAN_NO_REPEAT_DAYS
+from utils.segments import build_recommender_profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate weekly meal plans for all mothers.")
+    parser.add_argument("--start", default=datetime.now().strftime("%Y-%m-%d"), help="first day of the plan")
+    parser.add_argument("--no-repeat-days", type=int, default=WEEKLY_PLAN_NO_REPEAT_DAYS)
+    parser.add_argument("--dry-run", action="store_true", help="generate but do not save")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+
+    # Latest active plan per mother
+    plans = {}
+    for plan in plans_col.find({"status": "active"}).sort("createdAt", 1):
+        plans[plan["motherId"]] = plan
+
+    mother_ids = [ObjectId(mid) for mid in plans if ObjectId.is_valid(mid)]
+    mothers = users_col.find(
+        {"_id": {"$in": mother_ids}, "role": "mother"},
+        {"location_state": 1, "location_area_type": 1, "income_range": 1,
+         "dietary_preference": 1, "cuisine_preference": 1, "allergies": 1, "recent_dishes": 1,
+         "recommender_segment": 1}
+    )
+
+    keys, items = [], []
+    for mother in mothers:
+        mother_id = str(mother["_id"])
+        plan = plans[mother_id]
+        required = parse_required_nutrients(plan.get("required_nutrients"))
+        if not required:
+            print(f"✗ {mother_id}: plan {plan['_id']} has no per-meal targets")
+            continue
+        recent = [entry["dish"] for entry in mother.get("recent_dishes", [])]
+        keys.append((mother_id, str(plan["_id"])))
+        items.append((required, build_recommender_profile(mother), recent))
+
+    generation_started = time.perf_counter()
+    results = generate_week_plans(items, start_date=args.start, no_repeat_days=args.no_repeat_days)
+    generation_time = time.perf_counter() - generation_started
+
+    saved = failed = 0
+    for (mother_id, plan_id), week_plan in zip(keys, results):
+        if "error" in week_plan:
+            print(f"✗ {mother_id}: {week_plan['error']}")
+            failed += 1
+            continue
+        if not args.dry_run:
+            save_weekly_meal_plan(mother_id, plan_id, week_plan)
+        saved += 1
+
+    if not args.dry_run:
+        weekly_plans_col.create_index([("motherId", 1), ("startDate", -1)])
+
+    print(f"✓ {saved} weekly plans {'generated' if args.dry_run else 'saved'}, {failed} failed "
+          f"(generation {generation_time:.2f}s, total {time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
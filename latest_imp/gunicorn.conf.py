@@ -0,0 +1,18 @@
+"""
+Gunicorn settings for the Docker image.
+
+Each worker imports app.py quickly (no network, no catalog build at
+import) and then warms up in a background thread, so the worker starts
+accepting requests straight away. Requests that arrive before warm-up
+finishes build whatever they need on first use.
+"""
+import os
+import threading
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 1))
+
+
+def post_worker_init(worker):
+    from app import warm_up
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
@@ -0,0 +1,120 @@
+"""
+Background executor for meal uploads.
+
+upload_meal only saves the image and the pending meal document, then
+hands the meal to this pipeline and answers 202; analysis, the plan
+check, alerts, the recommendation and notifications run here, in
+MEAL_PIPELINE_WORKERS threads (the work is MongoDB calls and waiting on
+the recommender pool, so threads are enough). Progress is written to the
+meal document as `stage` (see MEAL_STAGES) and read back by
+GET /api/meals/<id>, which the mother page polls.
+
+The pipeline is bounded like the recommender pool: at most
+MEAL_QUEUE_DEPTH meals may be queued or running, and reserve_slot() fails
+beforehand so an upload can be refused before anything is stored.
+Jobs live in this process; a meal whose worker died mid-way keeps its last
+stage. MEAL_PIPELINE_WORKERS=0 runs every meal inline.
+"""
+import atexit
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+MEAL_PIPELINE_WORKERS = int(os.environ.get("MEAL_PIPELINE_WORKERS", 4))
+MEAL_QUEUE_DEPTH = int(os.environ.get("MEAL_QUEUE_DEPTH", 64))
+# Seconds a client is told to wait before retrying a refused upload / polling again
+MEAL_RETRY_AFTER = int(os.environ.get("MEAL_RETRY_AFTER", 5))
+MEAL_POLL_INTERVAL = float(os.environ.get("MEAL_POLL_INTERVAL", 1.5))
+
+MEAL_PIPELINE_BUSY_ERROR = "We're processing a lot of meals right now. Please try again shortly."
+
+# Stages a meal goes through, in order; "failed" can replace any of them
+MEAL_STAGES = ["queued", "normalizing", "analyzing", "checking", "recommending", "done"]
+MEAL_STAGE_FAILED = "failed"
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, MEAL_QUEUE_DEPTH))
+
+
+def stage_progress(stage):
+    """Share of the pipeline done (0-1) at `stage`; failed meals count as finished."""
+    if stage == MEAL_STAGE_FAILED:
+        return 1.0
+    if stage not in MEAL_STAGES:
+        return 0.0
+    return round(MEAL_STAGES.index(stage) / (len(MEAL_STAGES) - 1), 2)
+
+
+def is_finished(stage):
+    return stage in (MEAL_STAGES[-1], MEAL_STAGE_FAILED)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MEAL_PIPELINE_WORKERS, thread_name_prefix="meal-pipeline")
+                print(f"[MealPipeline] Started {MEAL_PIPELINE_WORKERS} workers (queue depth {MEAL_QUEUE_DEPTH}).")
+    return _executor
+
+
+def shutdown_meal_pipeline(wait=True):
+    """Stops taking meals; by default lets queued ones finish first."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+atexit.register(shutdown_meal_pipeline)
+
+
+def reserve_slot():
+    """Claims a queue slot for one meal; False when the pipeline is saturated."""
+    return _slots.acquire(blocking=False)
+
+
+def release_slot():
+    """Gives back a slot reserved with reserve_slot() that was not submitted."""
+    _slots.release()
+
+
+def _run(process, meal_id, args):
+    from models import set_meal_stage
+
+    try:
+        process(meal_id, *args)
+    except Exception as e:
+        print(f"[MealPipeline] Meal {meal_id} failed: {e}")
+        traceback.print_exc()
+        try:
+            set_meal_stage(meal_id, MEAL_STAGE_FAILED, error=str(e))
+        except Exception as store_error:
+            print(f"[MealPipeline] Could not mark meal {meal_id} failed: {store_error}")
+
+
+def submit_meal(process, meal_id, *args):
+    """
+    Runs process(meal_id, *args) in the pipeline. The caller must hold a
+    slot from reserve_slot(); it is released when the meal finishes.
+    Exceptions mark the meal failed instead of propagating.
+    """
+    if MEAL_PIPELINE_WORKERS <= 0:
+        try:
+            _run(process, meal_id, args)
+        finally:
+            _slots.release()
+        return None
+
+    try:
+        future = _get_executor().submit(_run, process, meal_id, args)
+    except RuntimeError:
+        # Interpreter shutting down: nothing will run it
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
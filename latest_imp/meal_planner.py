@@ -0,0 +1,373 @@
+"""
+Multi-dish planning on the in-memory dish catalog.
+
+close_day_gap() picks a small set of dishes (2-4) that together cover as
+much as possible of what is left of a mother's daily targets, without
+going over her sodium and free-sugar allowance. The search is pruned to a
+shortlist of useful dishes; small sets are enumerated exhaustively and
+larger ones grown from the best smaller sets, each size scored in one
+NumPy pass, so a call takes a few tens of milliseconds.
+
+generate_week_plan() turns a nutrition plan's per-meal targets into a
+7-day breakfast/lunch/dinner dish schedule with no dish repeated within
+`no_repeat_days`. generate_week_plans() runs it for a whole caseload and
+scores each distinct (profile segment, plan targets) pair only once.
+"""
+import itertools
+import math
+import os
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from catalog import get_catalog, CatalogError, NUTRIENT_COLS
+from meal_recommendor import profile_filter_masks, profile_segment
+from utils.nutrient_mapper import SHORT_TO_LONG_MAP
+
+LONG_TO_SHORT_MAP = {v: k for k, v in SHORT_TO_LONG_MAP.items()}
+
+# Nutrients that are upper limits for the day rather than targets
+DAY_LIMIT_NUTRIENTS = ["sodium_mg", "free_sugar_g"]
+# Used when the remaining-day dict has no entry for a limit
+DEFAULT_DAY_LIMITS = {"sodium_mg": 2300, "free_sugar_g": 25}
+
+# Going over these targets is penalised (extra calories are not "free")
+ENERGY_NUTRIENTS = ["kcal", "carb_g", "fat_g"]
+OVERSHOOT_PENALTY = 0.5
+# Small cost per dish so a larger set has to earn its place
+PER_DISH_PENALTY = 0.01
+
+# Size of the shortlist the combinations are drawn from
+GAP_SHORTLIST_SIZE = int(os.environ.get("GAP_SHORTLIST_SIZE", 36))
+# Dishes kept per target nutrient, so specialists (e.g. iron) stay in the shortlist
+GAP_PER_NUTRIENT = 4
+# Set sizes with more combinations than this are grown from the best
+# smaller sets (beam search) instead of being enumerated
+GAP_MAX_COMBINATIONS = int(os.environ.get("GAP_MAX_COMBINATIONS", 60000))
+GAP_BEAM_WIDTH = 256
+
+# Weekly plans
+MEAL_TYPES = ["breakfast", "lunch", "dinner"]
+PLAN_DAYS = 7
+WEEKLY_PLAN_NO_REPEAT_DAYS = int(os.environ.get("WEEKLY_PLAN_NO_REPEAT_DAYS", 3))
+# Score cost per earlier use in the same week, so the plan does not just
+# cycle through the same few dishes once the no-repeat window allows it
+WEEKLY_REPEAT_PENALTY = 0.05
+
+NO_FEASIBLE_SET_ERROR = "No combination of safe dishes fits within the remaining sodium and sugar allowance."
+
+
+@lru_cache(maxsize=16)
+def _combinations(n, k):
+    """All k-subsets of range(n) as an int32 array (cached; reused across calls)."""
+    combos = np.fromiter(itertools.chain.from_iterable(itertools.combinations(range(n), k)),
+                         dtype=np.int32)
+    combos = combos.reshape(-1, k)
+    combos.setflags(write=False)
+    return combos
+
+
+def _candidate_mask(catalog, profile, min_size):
+    """Strict profile match when it leaves enough dishes, otherwise diet/area/allergy only."""
+    strict, relaxed = profile_filter_masks(catalog, profile)
+    if strict.sum() >= min_size:
+        return strict
+    return relaxed
+
+
+def _shortlist(coverage, score, size):
+    """Best overall dishes plus the best few for each target nutrient."""
+    picks = set(np.argsort(-score, kind="stable")[:size].tolist())
+    for j in range(coverage.shape[1]):
+        picks.update(np.argsort(-coverage[:, j], kind="stable")[:GAP_PER_NUTRIENT].tolist())
+    return np.array(sorted(picks), dtype=np.int64)
+
+
+def _grow_sets(sets, n):
+    """Every set in `sets` extended by one dish with a higher index (keeps sets sorted)."""
+    k = sets.shape[1]
+    extra = np.arange(n)
+    grown = np.concatenate([np.repeat(sets, n, axis=0), np.tile(extra, len(sets))[:, None]], axis=1)
+    grown = grown[grown[:, k] > grown[:, k - 1]]
+    return np.unique(grown, axis=0)
+
+
+def _score_sets(coverage, energy, combos):
+    """Objective for every dish set: mean capped coverage minus energy overshoot."""
+    totals = coverage[combos].sum(axis=1)
+    score = np.minimum(totals, 1.0).mean(axis=1)
+    if energy.shape[1]:
+        over = np.maximum(energy[combos].sum(axis=1) - 1.0, 0.0)
+        score -= OVERSHOOT_PENALTY * over.sum(axis=1)
+    return score - PER_DISH_PENALTY * combos.shape[1]
+
+
+def close_day_gap(remaining: dict, profile: dict, min_dishes=2, max_dishes=3, catalog=None):
+    """
+    Picks `min_dishes`..`max_dishes` catalog dishes that best close the
+    remaining-day vector (short keys, e.g. {"protein_g": 30, "iron_mg": 8}).
+
+    Sodium and free sugar are treated as limits: the chosen dishes may not
+    add up to more than what is left of them (or DEFAULT_DAY_LIMITS).
+    Returns {"dishes", "totals", "remaining_after", "coverage"} or {"error"}.
+    """
+    if catalog is None:
+        try:
+            catalog = get_catalog()
+        except CatalogError as e:
+            return {"error": str(e)}
+
+    min_dishes = max(1, int(min_dishes))
+    max_dishes = max(min_dishes, min(int(max_dishes), 4))
+
+    targets = [k for k in SHORT_TO_LONG_MAP
+               if k not in DAY_LIMIT_NUTRIENTS and float(remaining.get(k) or 0) > 0]
+    if not targets:
+        return {"error": "Nothing left to cover for today."}
+
+    col = {name: i for i, name in enumerate(NUTRIENT_COLS)}
+    X = np.asarray(catalog.nutrients_raw, dtype=np.float64)
+
+    mask = _candidate_mask(catalog, profile, max_dishes)
+    limits = {}
+    for key in DAY_LIMIT_NUTRIENTS:
+        value = remaining.get(key)
+        limits[key] = float(DEFAULT_DAY_LIMITS[key] if value is None else value)
+        # A dish that alone breaks a limit can never be part of a valid set
+        mask &= X[:, col[SHORT_TO_LONG_MAP[key]]] <= limits[key]
+
+    dish_ids = np.flatnonzero(mask)
+    if len(dish_ids) < min_dishes:
+        return {"error": NO_FEASIBLE_SET_ERROR}
+
+    gaps = np.array([float(remaining[k]) for k in targets])
+    target_cols = [col[SHORT_TO_LONG_MAP[k]] for k in targets]
+    coverage = X[dish_ids][:, target_cols] / gaps
+    energy_idx = [i for i, k in enumerate(targets) if k in ENERGY_NUTRIENTS]
+
+    # --- Prune: shortlist by single-dish usefulness ---
+    single = np.minimum(coverage, 1.0).mean(axis=1)
+    short = _shortlist(np.minimum(coverage, 1.0), single, GAP_SHORTLIST_SIZE)
+    coverage = coverage[short]
+    energy = coverage[:, energy_idx]
+    limit_values = X[dish_ids[short]][:, [col[SHORT_TO_LONG_MAP[k]] for k in DAY_LIMIT_NUTRIENTS]]
+    limit_caps = np.array([limits[k] for k in DAY_LIMIT_NUTRIENTS])
+
+    # --- Search the shortlist, one vectorized pass per set size ---
+    n = len(short)
+    best_score, best_set = -np.inf, None
+    beam = None
+    for k in range(1, min(max_dishes, n) + 1):
+        if beam is None or math.comb(n, k) <= GAP_MAX_COMBINATIONS:
+            combos = _combinations(n, k)
+        else:
+            combos = _grow_sets(beam, n)
+        feasible = (limit_values[combos].sum(axis=1) <= limit_caps).all(axis=1)
+        if not feasible.any():
+            break
+        combos = combos[feasible]
+        scores = _score_sets(coverage, energy, combos)
+        top = np.argsort(-scores, kind="stable")[:GAP_BEAM_WIDTH]
+        beam = combos[top]
+        if k >= min_dishes and scores[top[0]] > best_score:
+            best_score, best_set = float(scores[top[0]]), combos[top[0]]
+
+    if best_set is None:
+        return {"error": NO_FEASIBLE_SET_ERROR}
+
+    chosen = dish_ids[short[best_set]]
+    dishes = []
+    for dish_id in chosen:
+        nutrients = {LONG_TO_SHORT_MAP[name]: round(float(X[dish_id, i]), 2)
+                     for i, name in enumerate(NUTRIENT_COLS)}
+        dishes.append({"Dish Name": catalog.df["Dish Name"].iat[dish_id], "nutrients": nutrients})
+
+    totals = {LONG_TO_SHORT_MAP[name]: round(float(X[chosen, i].sum()), 2)
+              for i, name in enumerate(NUTRIENT_COLS)}
+    remaining_after = {k: round(max(float(remaining.get(k) or 0) - totals[k], 0), 2) for k in targets}
+
+    return {
+        "dishes": dishes,
+        "totals": totals,
+        "remaining_after": remaining_after,
+        "coverage": round(float(np.minimum(coverage[best_set].sum(axis=0), 1.0).mean()), 4),
+        "catalog_version": catalog.version
+    }
+
+
+# ----------------------------------------------------------------
+# Weekly meal plans
+# ----------------------------------------------------------------
+def meal_shares(required_nutrients: dict, meal_types):
+    """
+    Fraction of the day each meal stands for: its share of the plan's
+    calories, or an equal split when the plan has no kcal targets.
+    """
+    kcal = np.array([float(required_nutrients[m].get("kcal") or 0) for m in meal_types])
+    if kcal.sum() <= 0:
+        return np.full(len(meal_types), 1.0 / len(meal_types))
+    return kcal / kcal.sum()
+
+
+def meal_scores(catalog, targets: dict, mask, day_share=1.0):
+    """
+    Suitability of every dish for one meal's targets (short keys). Same
+    objective as close_day_gap for a single dish; sodium and sugar above
+    the meal's allowance are penalised instead of being hard limits. The
+    allowance is the meal's own target if it has one, otherwise
+    DEFAULT_DAY_LIMITS scaled by `day_share` (see meal_shares), since those
+    are for the whole day. Dishes outside `mask` get -inf.
+    """
+    col = {name: i for i, name in enumerate(NUTRIENT_COLS)}
+    X = np.asarray(catalog.nutrients_raw, dtype=np.float64)
+
+    keys = [k for k in SHORT_TO_LONG_MAP
+            if k not in DAY_LIMIT_NUTRIENTS and float(targets.get(k) or 0) > 0]
+    if not keys:
+        return np.where(mask, 0.0, -np.inf)
+
+    coverage = X[:, [col[SHORT_TO_LONG_MAP[k]] for k in keys]] / np.array([float(targets[k]) for k in keys])
+    energy = coverage[:, [i for i, k in enumerate(keys) if k in ENERGY_NUTRIENTS]]
+    scores = _score_sets(coverage, energy, np.arange(len(X))[:, None])
+
+    for key in DAY_LIMIT_NUTRIENTS:
+        limit = float(targets.get(key) or DEFAULT_DAY_LIMITS[key] * day_share)
+        over = np.maximum(X[:, col[SHORT_TO_LONG_MAP[key]]] / limit - 1.0, 0.0)
+        scores -= OVERSHOOT_PENALTY * over
+
+    return np.where(mask, scores, -np.inf)
+
+
+def _schedule_week(score_rows, days, no_repeat_days, avoid_ids=()):
+    """
+    Greedy slot-by-slot assignment: each (day, meal) takes its best dish
+    that was not used in the previous `no_repeat_days` days (nor earlier
+    the same day), minus WEEKLY_REPEAT_PENALTY per earlier use. If that
+    leaves nothing, the least recently used safe dish is taken instead.
+    Returns a days x meals array of dish ids.
+    """
+    n_meals, n_dishes = score_rows.shape
+    safe = np.isfinite(score_rows).any(axis=0)
+    last_used = np.full(n_dishes, -(10 ** 6), dtype=np.int64)
+    if len(avoid_ids):
+        last_used[np.asarray(avoid_ids, dtype=np.int64)] = -1
+    use_count = np.zeros(n_dishes)
+
+    schedule = np.empty((days, n_meals), dtype=np.int64)
+    for day in range(days):
+        for m in range(n_meals):
+            available = last_used <= day - max(no_repeat_days, 1)
+            row = np.where(available, score_rows[m] - WEEKLY_REPEAT_PENALTY * use_count, -np.inf)
+            if np.isfinite(row).any():
+                dish_id = int(np.argmax(row))
+            else:
+                # Small pool: fall back to the least recently used safe dish
+                dish_id = int(np.argmin(np.where(safe, last_used, np.iinfo(np.int64).max)))
+            schedule[day, m] = dish_id
+            last_used[dish_id] = day
+            use_count[dish_id] += 1
+    return schedule
+
+
+def generate_week_plan(required_nutrients: dict, profile: dict, start_date=None,
+                       no_repeat_days=WEEKLY_PLAN_NO_REPEAT_DAYS, avoid_dishes=None,
+                       catalog=None, days=PLAN_DAYS):
+    """
+    7-day x breakfast/lunch/dinner dish schedule for one mother.
+
+    `required_nutrients` is a plan's per-meal targets ({"breakfast":
+    {"kcal": 500, ...}, ...}); `avoid_dishes` (e.g. recent
+    recommendations) count as eaten the day before the plan starts.
+    Returns {"start_date", "no_repeat_days", "days": [...]} or {"error"}.
+    """
+    plans = generate_week_plans(
+        [(required_nutrients, profile, avoid_dishes)], start_date=start_date,
+        no_repeat_days=no_repeat_days, catalog=catalog, days=days
+    )
+    return plans[0]
+
+
+def generate_week_plans(items, start_date=None, no_repeat_days=WEEKLY_PLAN_NO_REPEAT_DAYS,
+                        catalog=None, days=PLAN_DAYS):
+    """
+    Weekly plans for many mothers (nightly batch).
+
+    `items` holds (required_nutrients, profile) or (required_nutrients,
+    profile, avoid_dishes) tuples. Score rows are computed once per
+    distinct (profile segment, targets) and the schedule once per distinct
+    (segment, targets, avoid list), so a caseload on a few presets costs
+    little more than a single mother. Returns one result per item.
+    """
+    if catalog is None:
+        try:
+            catalog = get_catalog()
+        except CatalogError as e:
+            return [{"error": str(e)} for _ in items]
+
+    if start_date is None:
+        start_date = datetime.now().strftime("%Y-%m-%d")
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    dates = [(start + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(days)]
+
+    names = catalog.df["Dish Name"]
+    name_to_id = {name.lower(): i for i, name in enumerate(names)}
+
+    score_cache = {}
+    schedule_cache = {}
+    results = []
+    for item in items:
+        required_nutrients, profile = item[0], item[1]
+        avoid_dishes = item[2] if len(item) > 2 else None
+        if not required_nutrients:
+            results.append({"error": "Plan has no per-meal targets."})
+            continue
+
+        meal_types = [m for m in MEAL_TYPES if m in required_nutrients] or list(required_nutrients)
+        targets_key = tuple(
+            (m, tuple(sorted((k, float(v)) for k, v in required_nutrients[m].items())))
+            for m in meal_types
+        )
+        score_key = (profile_segment(profile), targets_key)
+
+        if score_key not in score_cache:
+            mask = _candidate_mask(catalog, profile, len(meal_types) * (no_repeat_days + 1))
+            if not mask.any():
+                score_cache[score_key] = None
+            else:
+                shares = meal_shares(required_nutrients, meal_types)
+                score_cache[score_key] = np.vstack([
+                    meal_scores(catalog, required_nutrients[m], mask, share)
+                    for m, share in zip(meal_types, shares)
+                ])
+        score_rows = score_cache[score_key]
+        if score_rows is None:
+            results.append({"error": "No safe dishes match the diet and allergy constraints."})
+            continue
+
+        avoid_ids = tuple(sorted({
+            name_to_id[d.lower()] for d in (avoid_dishes or []) if d.lower() in name_to_id
+        }))
+        schedule_key = (score_key, avoid_ids)
+        if schedule_key not in schedule_cache:
+            schedule_cache[schedule_key] = _schedule_week(score_rows, days, no_repeat_days, avoid_ids)
+        schedule = schedule_cache[schedule_key]
+
+        plan_days = []
+        for d, date_str in enumerate(dates):
+            meals = {}
+            for m, meal_type in enumerate(meal_types):
+                dish_id = int(schedule[d, m])
+                meals[meal_type] = {
+                    "Dish Name": names.iat[dish_id],
+                    "score": round(float(score_rows[m, dish_id]), 4)
+                }
+            plan_days.append({"date": date_str, "meals": meals})
+
+        results.append({
+            "start_date": dates[0],
+            "no_repeat_days": no_repeat_days,
+            "catalog_version": catalog.version,
+            "days": plan_days
+        })
+    return results
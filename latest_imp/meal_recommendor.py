@@ -1,29 +1,56 @@
 import json
 import os
 import numpy as np
-import pandas as pd
-import csv
 import random
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics.pairwise import cosine_similarity
+from concurrent.futures import ThreadPoolExecutor
+from bson.objectid import ObjectId
 from pymongo import MongoClient
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from utils.nutrient_mapper import deficits_to_text_query
-# --- NEW: Import Google Custom Search API ---
-
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from utils.nutrient_mapper import deficit_weights
+from utils.ttl_cache import TTLCache
+from catalog import get_catalog, CatalogError, NUTRIENT_COLS, normalize_allergens
+from ranking_table import get_ranking_table, deficit_subset
+from utils.scoring import normalize_vector, select_top_k
+from utils.recipe_links import (
+    RecipeLinkCache, GoogleSearchProvider, UnconfiguredProvider,
+    MongoRecipeLinkStore, JsonFileRecipeLinkStore
+)
 
 # --- Load Environment Variables ---
 # This loads .env file for MONGO_URI and Google API keys
 load_dotenv()
 
-SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
-PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+# Set RECOMMENDER_DEBUG=1 to log per-dish scoring details
+RECOMMENDER_DEBUG = os.environ.get("RECOMMENDER_DEBUG", "").lower() in ("1", "true", "yes")
+
+# Number of top-scoring candidates the variety logic picks from
+DIVERSITY_POOL_SIZE = 5
+
+# Fields returned for each recommended meal
+OUTPUT_COLUMNS = [
+    "Dish Name", "states", "diet_type", "cuisine",
+    "allergens", "income_range", "final_score"
+]
+
+# Filter pass and preference boosts per (catalog version, profile segment).
+# Deficits are not part of the key: every request scores its own weights.
+SEGMENT_CACHE_SIZE = int(os.environ.get("RECOMMENDATION_CACHE_SIZE", 2048))
+SEGMENT_CACHE_TTL = int(os.environ.get("RECOMMENDATION_CACHE_TTL", 3600))
+_segment_cache = TTLCache(maxsize=SEGMENT_CACHE_SIZE, ttl=SEGMENT_CACHE_TTL)
+_MISSING = object()
 
-CLASSIFICATION_DATA_FILE = os.path.join(PROJECT_ROOT, "data", "food-mother-classified-2.csv")
-NUTRITION_DATA_FILE = os.path.join(PROJECT_ROOT, "data", "Indian_Food_Nutrition_Processed.csv")
+# Candidates fetched per requested result from an approximate similarity
+# index, leaving room for the preference boosts to reorder them
+RANK_OVERFETCH = int(os.environ.get("RANK_OVERFETCH", 8))
+
+# Per-mother ring buffer of recently recommended dishes, kept on the user
+# document (capped with $slice). Read from the document on every request:
+# recommendations run in several worker processes, so a per-process copy
+# would go stale.
+RECENT_DISHES_LIMIT = int(os.environ.get("RECENT_DISHES_LIMIT", 5))
+
+NO_SAFE_MEALS_ERROR = "No safe meals found, even after relaxing region, income, and cuisine filters. The basic constraints (Diet Type or Allergies) are too restrictive for the nutrient goals."
 
 # ----------------------------------------------------------------
 # MongoDB Connection Setup
@@ -31,51 +58,89 @@ NUTRITION_DATA_FILE = os.path.join(PROJECT_ROOT, "data", "Indian_Food_Nutrition_
 MONGO_URI = os.environ.get("MONGO_URI") 
 DB_NAME = "mothers_nutrition"
 COLLECTION_NAME = "recommendations" 
+USERS_COLLECTION_NAME = "users"
 
 if not MONGO_URI:
     print("Error: MONGO_URI not found. Make sure it's in your .env file.")
     client = None
     db = None
     collection = None
+    users_collection = None
 else:
-    try:
-        client = MongoClient(MONGO_URI)
-        db = client[DB_NAME]
-        collection = db[COLLECTION_NAME]
-        client.server_info()
-        print(f"Successfully connected to MongoDB: {DB_NAME}.{COLLECTION_NAME}")
-    except Exception as e:
-        print(f"Error: Could not connect to MongoDB. {e}")
-        client = None
-        db = None
-        collection = None
+    # connect=False: no network at import; the first query (or warm_up) connects
+    client = MongoClient(MONGO_URI, connect=False)
+    db = client[DB_NAME]
+    collection = db[COLLECTION_NAME]
+    users_collection = db[USERS_COLLECTION_NAME]
 
 # ----------------------------------------------------------------
-# NEW: Google Custom Search API Setup
+# Recipe links: Google Custom Search behind a persistent cache
 # ----------------------------------------------------------------
 GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
 SEARCH_ENGINE_ID = os.environ.get("SEARCH_ENGINE_ID")
+RECIPE_LINK_TTL_DAYS = int(os.environ.get("RECIPE_LINK_TTL_DAYS", 30))
+RECIPE_LINK_NEGATIVE_TTL_DAYS = int(os.environ.get("RECIPE_LINK_NEGATIVE_TTL_DAYS", 3))
+# Path to a JSON file; when unset the 'recipe_links' Mongo collection is used
+RECIPE_LINK_STORE_FILE = os.environ.get("RECIPE_LINK_STORE_FILE")
 
 if not GOOGLE_API_KEY or not SEARCH_ENGINE_ID:
     print("Warning: GOOGLE_API_KEY or SEARCH_ENGINE_ID not found in .env file. Recipe links will not be fetched.")
-    search_service = None
+    recipe_link_provider = UnconfiguredProvider()
 else:
     try:
-        # Build the service object
-        search_service = build("customsearch", "v1", developerKey=GOOGLE_API_KEY)
+        recipe_link_provider = GoogleSearchProvider(GOOGLE_API_KEY, SEARCH_ENGINE_ID)
         print("Google Custom Search API configured successfully.")
     except Exception as e:
         print(f"Error configuring Google Custom Search API: {e}")
-        search_service = None
+        recipe_link_provider = UnconfiguredProvider()
 
-# ----------------------------------------------------------------
-# Nutrient columns
-# ----------------------------------------------------------------
-NUTRIENT_COLS = [
-    "Calories (kcal)", "Carbohydrates (g)", "Protein (g)", "Fats (g)",
-    "Free Sugar (g)", "Fibre (g)", "Sodium (mg)", "Calcium (mg)",
-    "Iron (mg)", "Vitamin C (mg)", "Folate (µg)"
-]
+if RECIPE_LINK_STORE_FILE:
+    recipe_link_store = JsonFileRecipeLinkStore(RECIPE_LINK_STORE_FILE)
+elif db is not None:
+    recipe_link_store = MongoRecipeLinkStore(db["recipe_links"])
+else:
+    recipe_link_store = None
+
+recipe_links = RecipeLinkCache(
+    recipe_link_provider,
+    recipe_link_store,
+    ttl=timedelta(days=RECIPE_LINK_TTL_DAYS),
+    negative_ttl=timedelta(days=RECIPE_LINK_NEGATIVE_TTL_DAYS)
+)
+
+# Recipe links not yet in the cache are filled in by this pool after the
+# recommendation has been returned (see schedule_recipe_link_enrichment)
+RECIPE_LINK_PENDING = "pending"
+RECIPE_LINK_WORKERS = int(os.environ.get("RECIPE_LINK_WORKERS", 2))
+_recipe_link_pool = ThreadPoolExecutor(max_workers=RECIPE_LINK_WORKERS, thread_name_prefix="recipe-links")
+
+def set_recipe_link_provider(provider, store=None):
+    """Swaps the recipe-link provider (and store), e.g. for tests or offline runs."""
+    global recipe_links
+    recipe_links = RecipeLinkCache(provider, store, recipe_links.ttl, recipe_links.negative_ttl)
+
+def warm_up():
+    """
+    Checks the MongoDB connection and loads the dish catalog. Called from
+    the app's warm-up hook rather than at import, so importing this module
+    stays fast and never touches the network. If MongoDB is unreachable,
+    saving is switched off as before.
+    """
+    global client, db, collection, users_collection
+    if client is not None:
+        try:
+            client.server_info()
+            print(f"Successfully connected to MongoDB: {DB_NAME}.{COLLECTION_NAME}")
+        except Exception as e:
+            print(f"Error: Could not connect to MongoDB. {e}")
+            client = db = collection = users_collection = None
+            if isinstance(recipe_links.store, MongoRecipeLinkStore):
+                set_recipe_link_provider(recipe_links.provider)
+
+    try:
+        get_catalog()
+    except CatalogError as e:
+        print(f"Warning: dish catalog not loaded at startup. {e}")
 
 # ----------------------------------------------------------------
 # Nutrient Map
@@ -103,10 +168,11 @@ def parse_deficiency(text: str):
 # ----------------------------------------------------------------
 # Helper Functions for Variety & Diversity
 # ----------------------------------------------------------------
-def get_recent_recommendations(mother_id, days=2, limit=5):
+def _recent_dishes_from_history(mother_id, days=2, limit=5):
     """
-    Fetch recent recommendations for a mother from MongoDB.
-    Returns a list of dish names recommended in the last N days.
+    Legacy lookup over the recommendations collection, used only for
+    mothers whose user document has no recent_dishes array yet.
+    Returns [{"dish": name, "at": datetime}, ...], oldest first.
     """
     if collection is None:
         return []
@@ -121,19 +187,64 @@ def get_recent_recommendations(mother_id, days=2, limit=5):
         }).sort("created_at", -1).limit(limit)
         
         # Extract dish names from recommended meals
-        recent_dishes = []
+        entries = []
         for rec in recent_recs:
-            if "recommended_meals" in rec:
-                for meal in rec["recommended_meals"]:
-                    dish_name = meal.get("Dish Name")
-                    if dish_name:
-                        recent_dishes.append(dish_name)
+            for meal in rec.get("recommended_meals", []):
+                dish_name = meal.get("Dish Name")
+                if dish_name:
+                    entries.append({"dish": dish_name, "at": rec["created_at"]})
         
-        return recent_dishes
+        entries.reverse()
+        return entries[-RECENT_DISHES_LIMIT:]
     except Exception as e:
         print(f"Error fetching recent recommendations: {e}")
         return []
 
+def _load_recent_dishes(mother_id):
+    """Ring buffer for a mother: the user document's recent_dishes, or history for older documents."""
+    if users_collection is None or not ObjectId.is_valid(mother_id):
+        return []
+    try:
+        user = users_collection.find_one({"_id": ObjectId(mother_id)}, {"recent_dishes": 1})
+        if user is not None and "recent_dishes" in user:
+            return user["recent_dishes"]
+
+        entries = _recent_dishes_from_history(mother_id, limit=RECENT_DISHES_LIMIT)
+        # Seed the array once so the history query is not needed again
+        users_collection.update_one(
+            {"_id": ObjectId(mother_id), "recent_dishes": {"$exists": False}},
+            {"$set": {"recent_dishes": entries}}
+        )
+        return entries
+    except Exception as e:
+        print(f"Error fetching recent dishes: {e}")
+        return []
+
+def get_recent_recommendations(mother_id, days=2, limit=5):
+    """
+    Returns the dish names recommended to a mother in the last N days,
+    most recent first, from her capped recent_dishes buffer.
+    """
+    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    entries = _load_recent_dishes(mother_id)
+    recent = [e["dish"] for e in reversed(entries) if e["at"] >= cutoff_date]
+    return recent[:limit]
+
+def remember_recommended_dishes(mother_id, dish_names):
+    """Appends dishes to a mother's recent_dishes buffer ($push with $slice)."""
+    if not dish_names:
+        return
+
+    new_entries = [{"dish": name, "at": datetime.utcnow()} for name in dish_names]
+    if users_collection is not None and ObjectId.is_valid(mother_id):
+        try:
+            users_collection.update_one(
+                {"_id": ObjectId(mother_id)},
+                {"$push": {"recent_dishes": {"$each": new_entries, "$slice": -RECENT_DISHES_LIMIT}}}
+            )
+        except Exception as e:
+            print(f"Error saving recent dishes: {e}")
+
 def select_diverse_meal(top_meals, recent_dishes, top_n=5):
     """
     Select a meal from top candidates, ensuring variety.
@@ -184,30 +295,31 @@ def select_diverse_meal(top_meals, recent_dishes, top_n=5):
     
     return selected_meal.to_dict()
 
-def recommend_from_deficits(deficits: dict, profile: dict, top_n=1):
+def deficit_vector(deficits: dict, targets: dict = None):
+    """
+    Weight vector over NUTRIENT_COLS for numeric deficits, scaled by how
+    large each gap is relative to the plan (see deficit_weights).
+    """
+    weights = deficit_weights(deficits or {}, targets)
+    return np.array([weights.get(col, 0.0) for col in NUTRIENT_COLS])
+
+def recommend_from_deficits(deficits: dict, profile: dict, top_n=1, targets: dict = None, fetch_links=True):
     """
-    New adapter function to generate recommendations from a
-    quantitative deficit dictionary.
+    Generates recommendations straight from a quantitative deficit
+    dictionary, e.g. {"protein_g": 10}. `targets` is the plan's target for
+    the same meal and is used to weight each gap. With fetch_links=False,
+    uncached recipe links come back as RECIPE_LINK_PENDING.
     """
     print(f"[Recommender] Received deficits: {deficits}")
-    print(profile)
-    # 1. Translate deficit dict to text query
-    #    e.g., {"protein_g": 10} -> "Low in protein"
-    deficiency_text = deficits_to_text_query(deficits)
-    
-    if not deficiency_text:
-        print("[Recommender] No translatable deficits. No recommendation.")
+    def_vec = deficit_vector(deficits, targets)
+
+    if not def_vec.any():
+        print("[Recommender] No usable deficits. No recommendation.")
         return None
-        
-    print(f"[Recommender] Translated to query: '{deficiency_text}'")
-    
-    # 2. Call the existing recommendation function
-    #    This re-uses all your complex logic, file loading, and filtering.
+
     try:
-        recommendations = generate_recommendations(
-            deficiency_text=deficiency_text,
-            profile=profile,
-            top_n=top_n
+        recommendations = generate_recommendations_from_vector(
+            def_vec, profile, top_n=top_n, fetch_links=fetch_links
         )
         print(recommendations)
         return recommendations
@@ -216,207 +328,379 @@ def recommend_from_deficits(deficits: dict, profile: dict, top_n=1):
         print(f"[Recommender] Error during generation: {e}")
         return {"error": str(e)}
 # ----------------------------------------------------------------
-# NEW: Function to get recipe link from Google Search
+# Recipe link for a dish (cached; external call only on a miss)
 # ----------------------------------------------------------------
-def get_recipe_link_google_search(dish_name):
-    if not search_service:
-        return "Error: Google Search API not configured."
+def get_recipe_link(dish_name):
+    return recipe_links.get_link(dish_name)
 
-    try:
-        query = f"{dish_name} recipe"
-        result = search_service.cse().list(
-            q=query,
-            cx=SEARCH_ENGINE_ID,
-            num=1
-        ).execute()
-
-        items = result.get('items', [])
-        if items:
-            link = items[0].get('link')
-            return link
-        else:
-            return "No recipe link found."
-            
-    except HttpError as e:
-        print(f"Error calling Google Search API for '{dish_name}': {e}")
-        if e.resp.status == 429:
-            return "Error: Daily free query limit (100) likely exceeded."
-        return "Error: API call failed (HttpError)."
-    except Exception as e:
-        print(f"Error during recipe search for '{dish_name}': {e}")
-        return "Error: API call failed (Exception)."
+def _enrich_recipe_link(mongo_id, dish_name, on_link):
+    link = get_recipe_link(dish_name)
+    print(f"[RecipeLinks] {dish_name}: {link}")
+
+    if collection is not None and mongo_id:
+        try:
+            collection.update_one(
+                {"_id": ObjectId(mongo_id), "recommended_meals.Dish Name": dish_name},
+                {"$set": {"recommended_meals.$.recipe_link": link}}
+            )
+        except Exception as e:
+            print(f"Error: Failed to store recipe link for '{dish_name}'. {e}")
+
+    if on_link is not None:
+        try:
+            on_link(dish_name, link)
+        except Exception as e:
+            print(f"Error in recipe link callback for '{dish_name}': {e}")
+
+def schedule_recipe_link_enrichment(result, on_link=None):
+    """
+    Looks up every pending recipe link of `result` in the background and
+    writes it to the saved recommendation document. `on_link(dish_name,
+    link)` is called afterwards, e.g. to update the mother's profile.
+    Returns the list of futures.
+    """
+    if not result or not result.get("recommended_meals"):
+        return []
+
+    futures = []
+    for meal in result["recommended_meals"]:
+        if meal.get("recipe_link") == RECIPE_LINK_PENDING:
+            futures.append(_recipe_link_pool.submit(
+                _enrich_recipe_link, result.get("mongo_id"), meal["Dish Name"], on_link
+            ))
+    return futures
 
 # ----------------------------------------------------------------
-# Generate personalized meal recommendations
+# Profile filtering over the catalog's facet matrices
 # ----------------------------------------------------------------
-def generate_recommendations(deficiency_text, profile, top_n=5):
+def profile_filter_masks(catalog, profile):
     """
-    Generates meal recommendations, fetches recipe links, and saves to MongoDB.
-    
-    Implements a two-pass filter: 
+    Builds boolean dish masks for the two filtering passes.
+
+    Strict: state, area, diet, income, cuisine and allergies.
+    Relaxed: diet, area and allergies only (state, income and cuisine ignored).
+    """
+    facets = catalog.facets
+
+    # Allergies MUST remain strict for safety
+    allergies_ok = ~catalog.allergens.exclusion_mask(profile.get("allergies_to_avoid"))
+
+    # Diet MUST remain strict for user preference. Whole-token match, so
+    # "Vegetarian" does not pick up "Non-Vegetarian" dishes
+    diet_pref = (profile.get("diet_pref") or "").strip()
+    diet_ok = facets["diet_type"].equals(diet_pref) if diet_pref else np.ones(len(catalog), dtype=bool)
+
+    # Area remains important (e.g., rural vs urban ingredient availability)
+    area_ok = facets["area"].equals("both") | facets["area"].equals(profile.get("area") or "")
+
+    relaxed = area_ok & diet_ok & allergies_ok
+
+    state_ok = facets["states"].contains("All Indian States") | facets["states"].contains(profile.get("state") or "")
+    income_ok = np.zeros(len(catalog), dtype=bool)
+    for rng in (profile.get("income_range") or "").split(","):
+        income_ok |= facets["income_range"].contains(rng)
+    cuisine_ok = facets["cuisine"].contains((profile.get("cuisine_pref") or "").lower(), case_sensitive=False)
+
+    strict = relaxed & state_ok & income_ok & cuisine_ok
+    return strict, relaxed
+
+def preference_boosts(catalog, profile, dish_ids=None):
+    """
+    Per-dish score multipliers: cuisine preference (15%), income range (10%)
+    and state/regional availability (5%). Empty preferences give no boost.
+    With `dish_ids`, only those dishes are computed (in that order).
+    """
+    facets = catalog.facets
+    rows = slice(None) if dish_ids is None else dish_ids
+    boosts = np.ones(len(catalog) if dish_ids is None else len(dish_ids))
+
+    cuisine_pref = (profile.get("cuisine_pref") or "").lower()
+    if cuisine_pref:
+        boosts[facets["cuisine"].contains(cuisine_pref, case_sensitive=False)[rows]] *= 1.15
+
+    income_range = profile.get("income_range") or ""
+    if income_range:
+        income_ok = np.zeros(len(catalog), dtype=bool)
+        for rng in income_range.split(","):
+            income_ok |= facets["income_range"].contains(rng)
+        boosts[income_ok[rows]] *= 1.10
+
+    state = profile.get("state") or ""
+    if state:
+        boosts[(facets["states"].contains(state) | facets["states"].contains("All Indian States"))[rows]] *= 1.05
+
+    return boosts
+
+def rank_candidates(catalog, nutrient_scores, profile, k):
+    """
+    Applies the two-pass profile filter and preference boosts to one row of
+    nutrient scores and returns the top k as
+    (dish_ids, base_scores, final_scores, relaxed), best first.
+
+    Implements a two-pass filter:
     1. Strict (all profile criteria)
-    2. Relaxed (enforce only diet and allergies) if strict fails.
+    2. Relaxed (enforce only diet, area and allergies) if strict fails.
+
+    Returns None when even the relaxed pass leaves no safe dish.
+    """
+    pool = segment_pool(catalog, profile)
+    if pool is None:
+        return None
+
+    # Apply cuisine, income and state preference boosts to final score
+    _, candidate_ids, boosts, relaxed = pool
+    base_scores = nutrient_scores[candidate_ids]
+    final_scores = base_scores * boosts
+
+    if RECOMMENDER_DEBUG:
+        for i in np.flatnonzero(final_scores != base_scores):
+            print(f"[Boost] {catalog.df.iat[candidate_ids[i], 0]}: {base_scores[i]:.3f} → {final_scores[i]:.3f}")
+
+    order = select_top_k(final_scores, k)
+    return candidate_ids[order], base_scores[order], final_scores[order], relaxed
+
+def rank_candidates_indexed(catalog, def_vec, profile, k):
+    """
+    rank_candidates for one deficit vector. An exact index only supplies
+    the similarity row, and the partial top-k in rank_candidates does the
+    rest; an approximate one fetches RANK_OVERFETCH * k nearest allowed
+    dishes and applies the boosts to those only.
+    """
+    if catalog.index.exact:
+        return rank_candidates(catalog, catalog.index.similarities(def_vec[None, :])[0], profile, k)
+
+    pool = segment_pool(catalog, profile)
+    if pool is None:
+        return None
+    mask, allowed_ids, allowed_boosts, relaxed = pool
+
+    candidate_ids, base_scores = catalog.index.search(def_vec, k * RANK_OVERFETCH, mask)
+    if not len(candidate_ids):
+        return None
+
+    # Back to catalog order so ties resolve the same way as rank_candidates
+    order = np.argsort(candidate_ids, kind="stable")
+    candidate_ids, base_scores = candidate_ids[order], base_scores[order].astype(float)
+    final_scores = base_scores * allowed_boosts[np.searchsorted(allowed_ids, candidate_ids)]
+
+    order = select_top_k(final_scores, k)
+    return candidate_ids[order], base_scores[order], final_scores[order], relaxed
+
+# ----------------------------------------------------------------
+# Segment cache
+# ----------------------------------------------------------------
+def profile_segment(profile):
+    """
+    Normalized tuple of everything the filters and boosts read from a
+    profile, so mothers with the same context share cache entries.
+    """
+    allergies = {
+        name
+        for allergy in profile.get("allergies_to_avoid") or []
+        for name in normalize_allergens(allergy)
+    }
+    return (
+        profile.get("state") or "",
+        (profile.get("area") or "").lower(),
+        (profile.get("diet_pref") or "").lower(),
+        profile.get("income_range") or "",
+        (profile.get("cuisine_pref") or "").lower(),
+        tuple(sorted(allergies)),
+    )
+
+def segment_pool(catalog, profile):
+    """
+    (mask, candidate_ids, boosts, relaxed) for the profile's segment: the
+    strict pass, or the relaxed one when strict allows nothing, and the
+    preference boosts of the allowed dishes. None when no dish is safe.
+    Cached per catalog version and segment.
+    """
+    key = (catalog.version, profile_segment(profile))
+    pool = _segment_cache.get(key, _MISSING)
+    if pool is _MISSING:
+        strict_mask, relaxed_mask = profile_filter_masks(catalog, profile)
+
+        # --- Pass 1: Strict Filtering ---
+        mask, relaxed = strict_mask, False
+        if not mask.any():
+            # --- Pass 2: Relaxed Filtering (Only enforce Diet, Area and Allergies) ---
+            mask, relaxed = relaxed_mask, True
+
+        pool = None
+        if mask.any():
+            candidate_ids = np.flatnonzero(mask)
+            boosts = preference_boosts(catalog, profile, candidate_ids)
+            for arr in (mask, candidate_ids, boosts):
+                arr.flags.writeable = False
+            pool = (mask, candidate_ids, boosts, relaxed)
+        _segment_cache.put(key, pool)
+    return pool
+
+def rank_candidates_from_table(catalog, def_vec, profile, k):
+    """
+    rank_candidates answered from the precomputed ranking table (see
+    ranking_table.py) for equal-weight deficits: the segment's row for the
+    set of nutrients in deficit, restricted to the mother's candidate pool
+    (which drops her allergens) and re-scored. Returns None whenever the
+    row cannot stand in for scoring (weighted deficits included), so the
+    caller scores instead.
+    """
+    table = get_ranking_table(catalog)
+    if table is None or k > table.k:
+        return None
+    code = deficit_subset(def_vec)
+    entry = None if code is None else table.lookup(profile_segment(profile)[:5], code)
+    if entry is None:
+        table.record(hit=False)
+        return None
+
+    dish_ids, pool_size, relaxed = entry
+    pool = segment_pool(catalog, profile)
+    # Allergies can empty the strict pass and make scoring relax instead
+    if pool is None or pool[3] != relaxed:
+        table.record(hit=False)
+        return None
+    mask, allowed_ids, allowed_boosts, _ = pool
+
+    dish_ids = dish_ids[mask[dish_ids]]
+    # Too few left: more dishes may exist past the stored top-k
+    if len(dish_ids) < k and pool_size > table.k:
+        table.record(hit=False)
+        return None
+    table.record(hit=True)
+
+    # Catalog order first, so ties resolve the same way as rank_candidates
+    dish_ids = np.sort(dish_ids).astype(np.int64)
+    base_scores = (catalog.index.vectors[dish_ids] @ normalize_vector(def_vec)).astype(float)
+    final_scores = base_scores * allowed_boosts[np.searchsorted(allowed_ids, dish_ids)]
+
+    order = select_top_k(final_scores, k)
+    return dish_ids[order], base_scores[order], final_scores[order], relaxed
+
+def rank_candidates_cached(catalog, def_vec, profile, k):
+    """
+    Ranking from the precomputed table when it answers this request
+    exactly (equal-weight deficits), otherwise scored with the deficit
+    weights over the segment's cached candidate pool. Entries for an old catalog version simply stop
+    matching.
     """
+    ranked = rank_candidates_from_table(catalog, def_vec, profile, k)
+    if ranked is not None:
+        return ranked
+    return rank_candidates_indexed(catalog, np.asarray(def_vec, dtype=float), profile, k)
+
+def get_ranking_cache_stats():
+    stats = _segment_cache.stats()
     try:
-        df_nutri = pd.read_csv(NUTRITION_DATA_FILE, encoding='utf-8-sig')
-    except FileNotFoundError as e:
-        return {"error": f"Data file not found: {e.filename}"}
+        table = get_ranking_table(get_catalog())
+    except CatalogError:
+        table = None
+    stats["ranking_table"] = table.stats() if table is not None else None
+    return stats
 
+# ----------------------------------------------------------------
+# Batch recommendations (caseloads, nightly jobs)
+# ----------------------------------------------------------------
+def deficit_matrix(items):
+    """
+    N x len(NUTRIENT_COLS) matrix of deficit weights, one row per
+    (deficits, profile[, targets]) item.
+    """
+    if not items:
+        return np.zeros((0, len(NUTRIENT_COLS)))
+    return np.vstack([deficit_vector(item[0], item[2] if len(item) > 2 else None) for item in items])
+
+def recommend_batch(items, top_k=DIVERSITY_POOL_SIZE):
+    """
+    Ranks candidate meals for many mothers in one pass.
+
+    Args:
+        items: list of (deficits, profile) or (deficits, profile, targets)
+            tuples, as passed to recommend_from_deficits
+        top_k: number of candidates to return per mother
+
+    Returns a list with one entry per item, in order:
+        {"mother_id", "deficiencies", "relaxed", "candidates": [...]} or
+        {"mother_id", "error"}.
+    Nothing is saved and no recipe links are fetched.
+    """
     try:
-        with open(CLASSIFICATION_DATA_FILE, 'r', encoding='utf-8-sig') as fh:
-            reader = csv.reader(fh)
-            rows = [r for r in reader if any(cell.strip() for cell in r)]
-    except FileNotFoundError as e:
-        return {"error": f"Data file not found: {e.filename}"}
-
-    if not rows:
-        return {"error": f"{CLASSIFICATION_DATA_FILE} is empty or unreadable."}
-
-    header = rows[0]
-    num_cols = len(header)
-    parsed = []
-    for r in rows[1:]:
-        if len(r) == num_cols:
-            parsed.append(r)
+        catalog = get_catalog()
+    except CatalogError as e:
+        return [{"mother_id": item[1].get("mother_id"), "error": str(e)} for item in items]
+
+    if not items:
+        return []
+
+    # One matrix multiply scores every mother against every dish
+    deficits_mat = deficit_matrix(items)
+    scores = catalog.index.similarities(deficits_mat)
+
+    results = []
+    for i, item in enumerate(items):
+        profile = item[1]
+        entry = {"mother_id": profile.get("mother_id")}
+        if not deficits_mat[i].any():
+            entry["error"] = "No usable deficits."
+            results.append(entry)
             continue
-        if len(r) > num_cols:
-            if len(r) >= 6:
-                first_five, middle_parts, last = r[0:5], r[5:-1], r[-1]
-                cuisine = ";".join([p for p in middle_parts if p.strip()]) or r[5]
-                parsed.append(first_five + [cuisine, last])
+
+        ranked = rank_candidates(catalog, scores[i], profile, top_k)
+        if ranked is None:
+            entry["error"] = NO_SAFE_MEALS_ERROR
+            results.append(entry)
             continue
-        if len(r) < num_cols:
-            parsed.append(r + [''] * (num_cols - len(r)))
 
-    df_class = pd.DataFrame(parsed, columns=[c.strip() for c in header])
+        dish_ids, _, final_scores, relaxed = ranked
+        candidates = catalog.df.iloc[dish_ids][OUTPUT_COLUMNS[:-1]].to_dict(orient="records")
+        for meal, score in zip(candidates, final_scores):
+            meal["final_score"] = float(score)
 
-    df_class.columns = df_class.columns.str.strip(' "')
-    df_nutri.columns = df_nutri.columns.str.strip(' "')
+        entry.update({
+            "deficiencies": [col for col, w in zip(NUTRIENT_COLS, deficits_mat[i]) if w > 0],
+            "relaxed": relaxed,
+            "candidates": candidates
+        })
+        results.append(entry)
 
-    if 'Dish Name' not in df_class.columns:
-        return {"error": f"'Dish Name' column not found in {CLASSIFICATION_DATA_FILE}."}
-    if 'Dish Name' not in df_nutri.columns:
-        return {"error": f"'Dish Name' column not found in {NUTRITION_DATA_FILE}."}
-        
-    df_class['Dish Name'] = df_class['Dish Name'].str.strip(' "')
-    df_nutri['Dish Name'] = df_nutri['Dish Name'].str.strip(' "')
+    return results
 
-    df = pd.merge(df_nutri, df_class, on="Dish Name", how="inner")
+# ----------------------------------------------------------------
+# Generate personalized meal recommendations
+# ----------------------------------------------------------------
+def generate_recommendations(deficiency_text, profile, top_n=5):
+    """
+    Generates meal recommendations from a doctor's text note
+    (e.g. "Low in protein"). The note is parsed once into a vector.
+    """
+    def_vec = np.array(list(parse_deficiency(deficiency_text).values()), dtype=float)
+    return generate_recommendations_from_vector(def_vec, profile, top_n=top_n, deficiency_query=deficiency_text)
 
-    if df.empty:
-        return {"error": "No dishes found in common between nutrition and classification files."}
-    
-    df = df.rename(columns={
-        "States (Commonly Found In)": "states",
-        "Area Type (Rural/Urban/Both)": "area",
-        "Diet Type": "diet_type",
-        "Income Range (Commonly Consumed By)": "income_range",
-        "Cuisine Type": "cuisine",
-        "Known Allergens": "allergens"
-    })
-
-    missing_nutrient_cols = [col for col in NUTRIENT_COLS if col not in df.columns]
-    if missing_nutrient_cols:
-        return {"error": f"Missing required nutrient columns: {missing_nutrient_cols}."}
-
-    for col in NUTRIENT_COLS:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-
-    df = df.dropna(subset=NUTRIENT_COLS)
-    if df.empty:
-        return {"error": "All merged dishes have missing or non-numeric nutrient data."}
-
-    scaler = MinMaxScaler()
-    nutrients_scaled = scaler.fit_transform(df[NUTRIENT_COLS])
-    df_norm = df.copy()
-    for i, col in enumerate(NUTRIENT_COLS):
-        df_norm[col] = nutrients_scaled[:, i]
-
-    def_vec = np.array([list(parse_deficiency(deficiency_text).values())])
-    food_vecs = df_norm[NUTRIENT_COLS].values
-    nutrient_scores = cosine_similarity(def_vec, food_vecs)[0]
-    df_norm["nutrient_score"] = nutrient_scores
-    
-    # --- Two-Pass Filtering Logic Starts Here ---
-    
-    def get_allergy_ok(profile, row):
-        """Helper to check strict allergy constraint."""
-        allergies_ok = True
-        if profile.get("allergies_to_avoid"):
-            allergies_ok = all(
-                allergy.lower() not in str(row["allergens"]).lower() 
-                for allergy in profile["allergies_to_avoid"]
-            )
-        return allergies_ok
-        
-    def matches_strict(profile, row):
-        """Pass 1: Checks ALL profile criteria."""
-        state_ok = "All Indian States" in str(row["states"]) or profile["state"] in str(row["states"])
-        area_ok = row["area"].lower() in ["both", profile["area"].lower()]
-        diet_ok = profile["diet_pref"].lower() in str(row["diet_type"]).lower()
-        income_ok = any(rng in str(row["income_range"]) for rng in profile["income_range"].split(","))
-        cuisine_ok = profile.get("cuisine_pref", "").lower() in str(row["cuisine"]).lower()
-        allergies_ok = get_allergy_ok(profile, row)
-        return state_ok and area_ok and diet_ok and income_ok and cuisine_ok and allergies_ok
-
-    # --- Pass 1: Strict Filtering ---
-    df_filtered = df_norm[df_norm.apply(lambda r: matches_strict(profile, r), axis=1)]
-
-    if df_filtered.empty:
-        print("[Recommender] Strict filtering failed. Trying relaxed search...")
-        
-        # --- Pass 2: Relaxed Filtering (Only enforce Diet and Allergies) ---
-        def matches_relaxed(profile, row):
-            """Pass 2: Checks only essential criteria (Diet, Area, Allergies)."""
-            
-            # Diet MUST remain strict for user preference
-            diet_ok = profile["diet_pref"].lower() in str(row["diet_type"]).lower()
-            
-            # Area remains important (e.g., rural vs urban ingredient availability)
-            area_ok = row["area"].lower() in ["both", profile["area"].lower()]
-            
-            # Allergies MUST remain strict for safety
-            allergies_ok = get_allergy_ok(profile, row)
-            
-            # State, Income, and Cuisine filters are ignored in this pass.
-            return area_ok and diet_ok and allergies_ok
-
-        df_filtered = df_norm[df_norm.apply(lambda r: matches_relaxed(profile, r), axis=1)]
-
-    # --- Check Pass 2 Results ---
-    if df_filtered.empty:
+def generate_recommendations_from_vector(def_vec, profile, top_n=5, deficiency_query=None, fetch_links=True):
+    """
+    Generates meal recommendations, fetches recipe links, and saves to MongoDB.
+
+    `def_vec` holds one weight per NUTRIENT_COLS entry: positive for a
+    deficit, negative for a nutrient to avoid. Candidates come from
+    rank_candidates (strict, then relaxed filtering).
+    """
+    try:
+        catalog = get_catalog()
+    except CatalogError as e:
+        return {"error": str(e)}
+
+    ranked = rank_candidates_cached(catalog, def_vec, profile, max(top_n, DIVERSITY_POOL_SIZE))
+    if ranked is None:
         # If even the relaxed search fails, we can't recommend anything safe.
-        return {"error": "No safe meals found, even after relaxing region, income, and cuisine filters. The basic constraints (Diet Type or Allergies) are too restrictive for the nutrient goals."}
+        return {"error": NO_SAFE_MEALS_ERROR}
 
-    # --- Continue with sorting and output using the best matches found (from Pass 1 or Pass 2) ---
-    # Apply cuisine and income preference boosts to final score
-    def apply_preference_boosts(row):
-        base_score = row["nutrient_score"]
-        boosted_score = base_score
-        
-        # Cuisine preference boost (15%)
-        cuisine_pref = profile.get("cuisine_pref", "").lower()
-        if cuisine_pref and cuisine_pref in str(row["cuisine"]).lower():
-            boosted_score *= 1.15
-        
-        # Income range boost (10%)
-        income_range = profile.get("income_range", "")
-        if income_range and any(rng in str(row["income_range"]) for rng in income_range.split(",")):
-            boosted_score *= 1.10
-        
-        # State/regional preference boost (5%)
-        state = profile.get("state", "")
-        if state and (state in str(row["states"]) or "All Indian States" in str(row["states"])):
-            boosted_score *= 1.05
-        
-        if boosted_score != base_score:
-            print(f"[Boost] {row['Dish Name']}: {base_score:.3f} → {boosted_score:.3f}")
-        
-        return boosted_score
-    
-    df_filtered = df_filtered.copy()  # Avoid SettingWithCopyWarning
-    df_filtered["final_score"] = df_filtered.apply(apply_preference_boosts, axis=1)
-    df_filtered = df_filtered.sort_values("final_score", ascending=False)
+    dish_ids, base_scores, final_scores, relaxed = ranked
+    if relaxed:
+        print("[Recommender] Strict filtering failed. Used relaxed search.")
+
+    df_filtered = catalog.df.iloc[dish_ids].copy()
+    df_filtered["nutrient_score"] = base_scores
+    df_filtered["final_score"] = final_scores
     
     # --- NEW: Apply Diversity Logic ---
     mother_id = profile.get("mother_id")
@@ -427,7 +711,7 @@ def generate_recommendations(deficiency_text, profile, top_n=5):
         print(f"[Variety] Recent dishes for mother {mother_id}: {recent_dishes}")
         
         # Select diverse meal using weighted random selection
-        selected_meal = select_diverse_meal(df_filtered, recent_dishes, top_n=5)
+        selected_meal = select_diverse_meal(df_filtered, recent_dishes, top_n=DIVERSITY_POOL_SIZE)
         
         if selected_meal:
             # Convert single selection to list format for consistency
@@ -435,33 +719,36 @@ def generate_recommendations(deficiency_text, profile, top_n=5):
         else:
             # Fallback: use traditional top 1
             recommended_meals = df_filtered.head(1).to_dict(orient="records")
+
+        remember_recommended_dishes(mother_id, [meal["Dish Name"] for meal in recommended_meals])
     else:
         # No mother_id provided, use traditional approach
         print("[Variety] No mother_id in profile. Using traditional top-N selection.")
         recommended_meals = df_filtered.head(top_n).to_dict(orient="records")
     
-    output_columns = [
-        "Dish Name", "states", "diet_type", "cuisine", 
-        "allergens", "income_range", "final_score"
-    ]
-    
     # Ensure output columns are present
     for meal in recommended_meals:
-        meal_filtered = {k: meal[k] for k in output_columns if k in meal}
+        meal_filtered = {k: meal[k] for k in OUTPUT_COLUMNS if k in meal}
         recommended_meals[recommended_meals.index(meal)] = meal_filtered
     
     result = {
-        "deficiencies": [k for k, v in parse_deficiency(deficiency_text).items() if v == 1],
-        "avoidances": [k for k, v in parse_deficiency(deficiency_text).items() if v == -1],
+        "deficiencies": [col for col, w in zip(NUTRIENT_COLS, def_vec) if w > 0],
+        "avoidances": [col for col, w in zip(NUTRIENT_COLS, def_vec) if w < 0],
         "recommended_meals": recommended_meals,
-        "summary": "Recommended meals tailored to nutrient deficiencies and the mother's context."
+        "summary": "Recommended meals tailored to nutrient deficiencies and the mother's context.",
+        "catalog_version": catalog.version
     }
 
-    # --- Loop to add recipe links using Google Search ---
-    print("Fetching recipe links using Google Custom Search...")
+    # --- Loop to add recipe links (cached, Google Search on a miss) ---
+    # Without fetch_links, uncached links are left "pending" for
+    # schedule_recipe_link_enrichment so the caller never waits on the API.
+    print("Fetching recipe links...")
     for meal in result["recommended_meals"]:
         dish_name = meal["Dish Name"]
-        recipe_link = get_recipe_link_google_search(dish_name)
+        if fetch_links:
+            recipe_link = get_recipe_link(dish_name)
+        else:
+            recipe_link = recipe_links.peek(dish_name) or RECIPE_LINK_PENDING
         meal["recipe_link"] = recipe_link
         print(f"  - {dish_name}: {recipe_link}")
 
@@ -470,7 +757,10 @@ def generate_recommendations(deficiency_text, profile, top_n=5):
         try:
             document_to_save = result.copy()
             document_to_save['user_profile'] = profile
-            document_to_save['deficiency_query'] = deficiency_text
+            document_to_save['deficit_vector'] = {col: float(w) for col, w in zip(NUTRIENT_COLS, def_vec) if w}
+            document_to_save['catalog_version'] = catalog.version
+            if deficiency_query:
+                document_to_save['deficiency_query'] = deficiency_query
             document_to_save['created_at'] = datetime.utcnow() 
 
             insert_result = collection.insert_one(document_to_save)
@@ -3,8 +3,10 @@ from config import MONGO_URI
 from bson.objectid import ObjectId
 from datetime import datetime
 from pymongo import ReturnDocument
+import ast
+import json
 import random
-client = MongoClient(MONGO_URI)
+client = MongoClient(MONGO_URI, connect=False)
 db = client.get_default_database()
 
 meals_col = db.get_collection("meals")
@@ -12,6 +14,7 @@ plans_col = db.get_collection("nutrition_plans")
 # mothers_col = db.get_collection("mothers")
 notifications_col = db.get_collection("notifications")
 users_col = db.get_collection("users")
+weekly_plans_col = db.get_collection("weekly_meal_plans")
 def create_notification(user_id: str, message: str, link_url: str):
     """
     Creates a new notification for a specific user (doctor or asha worker).
@@ -117,17 +120,59 @@ def get_total_intake_for_day(mother_id, meal_date):
 
     return {k: round(v, 2) for k, v in total.items()}
 
-def create_meal_doc(mother_id, meal_type, meal_date, image_path):
+def create_meal_doc(mother_id, meal_type, meal_date, image_path, image_hash=None):
     doc = {
         "motherId": mother_id,
         "mealType": meal_type,
         "mealDate": meal_date,
         "image_path": image_path,
+        "image_hash": image_hash,        # SHA-256 of the photo (utils/image_store.py)
         "status": "pending",
+        "stage": "queued",               # meal_pipeline.MEAL_STAGES
         "createdAt": datetime.utcnow()
     }
     res = meals_col.insert_one(doc)
     return str(res.inserted_id), doc
+
+def set_meal_stage(meal_id, stage, error=None):
+    """Records how far the meal pipeline got; `error` is kept for failed meals."""
+    fields = {"stage": stage, "stageAt": datetime.utcnow()}
+    if error is not None:
+        fields["error"] = error
+    meals_col.update_one({"_id": ObjectId(meal_id)}, {"$set": fields})
+
+def set_meal_images(meal_id, image_path, analysis_path, thumbnail_path):
+    """Paths from the normalization stage; image_path changes if the original went to cold storage."""
+    meals_col.update_one(
+        {"_id": ObjectId(meal_id)},
+        {"$set": {"image_path": image_path, "analysis_path": analysis_path, "thumbnail_path": thumbnail_path}}
+    )
+
+def find_meal_upload(mother_id, meal_type, meal_date, image_hash):
+    """The same photo already uploaded for this meal (a client retry), unless that attempt failed."""
+    return meals_col.find_one(
+        {"motherId": mother_id, "mealType": meal_type, "mealDate": meal_date,
+         "image_hash": image_hash, "stage": {"$ne": "failed"}},
+        sort=[("createdAt", -1)]
+    )
+
+def find_analysis_by_image(image_hash, engine_version=None):
+    """Labels, nutrients and dish of the latest processed meal with this photo (from that engine version), or None."""
+    query = {"image_hash": image_hash, "status": "processed"}
+    if engine_version:
+        query["recognition.version"] = engine_version
+    return meals_col.find_one(
+        query,
+        {"labels": 1, "nutrients": 1, "dish_name": 1, "catalogMatch": 1, "recognition": 1},
+        sort=[("processedAt", -1)]
+    )
+
+def save_meal_outcome(meal_id, meal_check, recommendation):
+    """Stores the plan check and next-meal recommendation of a processed meal."""
+    meals_col.update_one(
+        {"_id": ObjectId(meal_id)},
+        {"$set": {"mealCheck": meal_check, "recommendation": recommendation}}
+    )
 # ... (keep all your existing imports: MongoClient, ObjectId, etc.) ...
 # ... (keep all your existing db.get_collection lines) ...
 # ... (keep all your existing functions: get_random_doctor_id, get_assigned_mothers, etc.) ...
@@ -169,13 +214,15 @@ def upsert_nutrition_plan(mother_id, title, required_nutrients):
         return None
 
 # ... (keep all your other existing functions: get_total_nutrients_for_day, create_alert, etc.) ...
-def update_meal_labels_and_nutrients(meal_id, labels, nutrients, dish_name):
+def update_meal_labels_and_nutrients(meal_id, labels, nutrients, dish_name, catalog_match=None, recognition=None):
     updated_meal = meals_col.find_one_and_update(
         {"_id": ObjectId(meal_id)},
         {"$set": {
             "labels": labels,
             "nutrients": nutrients,
             "dish_name": dish_name,          # <--- NEW FIELD STORED
+            "catalogMatch": catalog_match,   # canonical catalog dish for dish_name, or None
+            "recognition": recognition,      # engine, version and confidence behind labels/nutrients
             "status": "processed",
             "processedAt": datetime.utcnow()
         }},
@@ -271,6 +318,29 @@ def get_active_plan_for_mother_and_date(mother_id, meal_date):
     )
     return plan
 
+
+def parse_required_nutrients(value):
+    """A plan's required_nutrients as a dict, whether stored as one or as a JSON / Python-literal string; else None."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except Exception:
+            try:
+                value = ast.literal_eval(value)
+            except Exception:
+                return None
+    return value if isinstance(value, dict) else None
+
+
+def ensure_plan_required_nutrients_is_mapping(plan):
+    """If plan['required_nutrients'] is a JSON/string, try to deserialize it into a Python mapping."""
+    if plan and isinstance(plan.get("required_nutrients"), str):
+        parsed = parse_required_nutrients(plan["required_nutrients"])
+        if parsed is not None:
+            plan["required_nutrients"] = parsed
+        # else leave as-is; template has fallback
+    return plan
+
 # --- ASHA helper functions ---
 
 def assign_mother_to_asha(asha_id, mother_id):
@@ -287,7 +357,7 @@ def get_mothers_for_asha(asha_id):
         m["_id"] = str(m["_id"])
     return mothers
 
-def create_visit_record(asha_id, mother_id, visit_date, visit_type, observations=None, metrics=None, photos=None, related_alert=None):
+def create_visit_record(asha_id, mother_id, visit_date, visit_type, observations=None, metrics=None, photos=None, related_alert=None, photo_hashes=None):
     doc = {
         "ashaId": asha_id,
         "motherId": mother_id,
@@ -296,6 +366,7 @@ def create_visit_record(asha_id, mother_id, visit_date, visit_type, observations
         "observations": observations or "",
         "metrics": metrics or {},
         "photos": photos or [],
+        "photoHashes": photo_hashes or [],  # SHA-256 of each photo, same order
         "relatedAlertId": related_alert,
         "status": "completed" if visit_type=="spot-check" else "open",
         "createdAt": datetime.utcnow()
@@ -465,3 +536,32 @@ def update_query_status(query_id, status):
             updated_query["doctorId"] = str(updated_query["doctorId"])
     
     return updated_query
+
+
+def save_weekly_meal_plan(mother_id, plan_id, week_plan):
+    """Upserts a generated weekly dish schedule (one document per mother and start date)."""
+    doc = {
+        "motherId": mother_id,
+        "planId": plan_id,
+        "startDate": week_plan["start_date"],
+        "noRepeatDays": week_plan["no_repeat_days"],
+        "catalogVersion": week_plan.get("catalog_version"),
+        "days": week_plan["days"],
+        "generatedAt": datetime.utcnow()
+    }
+    weekly_plans_col.replace_one(
+        {"motherId": mother_id, "startDate": week_plan["start_date"]},
+        doc,
+        upsert=True
+    )
+    return doc
+
+def get_weekly_meal_plan(mother_id, start_date=None):
+    """Latest generated weekly plan for a mother, or the one starting on start_date."""
+    query = {"motherId": mother_id}
+    if start_date:
+        query["startDate"] = start_date
+    plan = weekly_plans_col.find_one(query, sort=[("startDate", -1)])
+    if plan:
+        plan["_id"] = str(plan["_id"])
+    return plan
@@ -0,0 +1,262 @@
+"""
+Precomputed dish rankings for every deficit subset x profile segment.
+
+The nutrients in deficit form a subset of NUTRIENT_COLS (at most 2^11 of
+them), and a segment (state, area, diet, income band, cuisine) is one of
+the few contexts mothers actually sign up with. build_ranking_table.py
+ranks the catalog offline for every pair, scoring each subset as equal
+weights, and stores the top RANKING_TABLE_K dish ids.
+
+Online, only a deficit vector whose nonzero weights are all equal (no
+plan targets, or every gap at least the target) is answered from the
+table: it picks the row of its nonzero set, drops dishes the mother is
+allergic to (allergies are not part of the segment) and re-scores what is
+left, which is exactly the scored ranking. Weighted deficits could rank a
+dish the row does not hold, so they are scored. RANKING_TABLE_K only needs
+room above the k the recommender asks for for allergy drops.
+
+Weighted or "avoid" weights, unseen segments, rows left too short by
+allergies and a table built for another catalog version all fall back to
+scoring.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from catalog import NUTRIENT_COLS, PROJECT_ROOT
+from utils.scoring import normalize_rows
+
+RANKING_TABLE_DIR = os.environ.get("RANKING_TABLE_DIR", os.path.join(PROJECT_ROOT, "data", "ranking_table"))
+RANKING_TABLE_K = int(os.environ.get("RANKING_TABLE_K", 32))
+# Seconds between checks for a rebuilt table on disk
+RANKING_TABLE_RELOAD_INTERVAL = float(os.environ.get("RANKING_TABLE_RELOAD_INTERVAL", 30))
+
+TABLE_FORMAT_VERSION = 1
+TABLE_MANIFEST = "manifest.json"
+N_SUBSETS = 1 << len(NUTRIENT_COLS)
+# Subsets scored per matrix product while building (bounds memory on big catalogs)
+SUBSET_BLOCK = 256
+_SUBSET_BITS = 1 << np.arange(len(NUTRIENT_COLS))
+
+
+def deficit_subset(def_vec):
+    """
+    Bitmask of the nutrients in deficit (bit i = NUTRIENT_COLS[i]) when they
+    all have the same weight, the only case the table ranks exactly. None
+    for weighted deficits, "avoid" (negative) weights or no deficits at all.
+    """
+    def_vec = np.asarray(def_vec, dtype=float)
+    if (def_vec < 0).any() or not def_vec.any():
+        return None
+    in_deficit = def_vec > 0
+    weights = def_vec[in_deficit]
+    if (weights != weights[0]).any():
+        return None
+    return int(_SUBSET_BITS[in_deficit].sum())
+
+
+def subset_vector(code):
+    """The 0/1 deficit vector of a subset bitmask."""
+    return ((code >> np.arange(len(NUTRIENT_COLS))) & 1).astype(float)
+
+
+class RankingTable:
+    """
+    `ids[s, code]` holds segment s's top-k dish ids for deficit subset
+    `code`, best first, padded with -1 when the segment allows fewer than k
+    dishes. `pool_sizes[s]` is how many dishes the segment's filter allows
+    and `relaxed[s]` whether that is the relaxed pass (strict left none).
+    """
+
+    def __init__(self, segments, ids, pool_sizes, relaxed, catalog_version, k):
+        self.segments = {tuple(seg): i for i, seg in enumerate(segments)}
+        self.ids = ids
+        self.pool_sizes = pool_sizes
+        self.relaxed = relaxed
+        self.catalog_version = catalog_version
+        self.k = k
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.segments)
+
+    def lookup(self, segment, code):
+        """(dish_ids, pool_size, relaxed) for a segment and subset, or None for an unseen segment."""
+        s = self.segments.get(tuple(segment))
+        if s is None:
+            return None
+        row = np.asarray(self.ids[s, code])
+        return row[row >= 0], int(self.pool_sizes[s]), bool(self.relaxed[s])
+
+    def record(self, hit):
+        """Counts one request answered from the table (hit) or left to scoring."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "catalog_version": self.catalog_version,
+            "segments": len(self),
+            "k": self.k,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+    # ------------------------------------------------------------
+    # Build / persist
+    # ------------------------------------------------------------
+    @classmethod
+    def build(cls, catalog, profiles, k=RANKING_TABLE_K):
+        """Ranks every subset for the distinct segments of `profiles` (allergies ignored)."""
+        from meal_recommendor import profile_filter_masks, preference_boosts, profile_segment
+
+        unit = normalize_rows(np.vstack([subset_vector(code) for code in range(N_SUBSETS)]))
+
+        segments, rows, pool_sizes, relaxed = [], [], [], []
+        seen = set()
+        id_dtype = np.int16 if len(catalog) < np.iinfo(np.int16).max else np.int32
+        for profile in profiles:
+            segment_profile = dict(profile, allergies_to_avoid=[])
+            segment = profile_segment(segment_profile)[:5]
+            if segment in seen:
+                continue
+            seen.add(segment)
+
+            strict, relaxed_mask = profile_filter_masks(catalog, segment_profile)
+            mask, is_relaxed = (strict, False) if strict.any() else (relaxed_mask, True)
+            candidates = np.flatnonzero(mask)
+
+            ids = np.full((N_SUBSETS, k), -1, dtype=id_dtype)
+            if len(candidates):
+                vectors = catalog.index.vectors[candidates].T
+                boosts = preference_boosts(catalog, segment_profile, candidates)
+                top = min(k, len(candidates))
+                for start in range(0, N_SUBSETS, SUBSET_BLOCK):
+                    # Same arithmetic as rank_candidates: float32 cosine, float64 boosts
+                    scores = (unit[start:start + SUBSET_BLOCK] @ vectors).astype(float) * boosts
+                    order = np.argsort(-scores, axis=1, kind="stable")[:, :top]
+                    ids[start:start + SUBSET_BLOCK, :top] = candidates[order]
+
+            segments.append(list(segment))
+            rows.append(ids)
+            pool_sizes.append(len(candidates))
+            relaxed.append(is_relaxed)
+
+        ids = np.stack(rows) if rows else np.zeros((0, N_SUBSETS, k), dtype=id_dtype)
+        return cls(segments, ids, np.array(pool_sizes, dtype=np.int32),
+                   np.array(relaxed, dtype=bool), catalog.version, k)
+
+    def write(self, table_dir=RANKING_TABLE_DIR):
+        os.makedirs(table_dir, exist_ok=True)
+        np.save(os.path.join(table_dir, "ids.npy"), np.ascontiguousarray(self.ids))
+        np.save(os.path.join(table_dir, "pool_sizes.npy"), self.pool_sizes)
+        np.save(os.path.join(table_dir, "relaxed.npy"), self.relaxed)
+
+        manifest = {
+            "format_version": TABLE_FORMAT_VERSION,
+            "catalog_version": self.catalog_version,
+            "nutrient_cols": NUTRIENT_COLS,
+            "k": self.k,
+            "segments": sorted(self.segments, key=self.segments.get),
+            "built_at": datetime.utcnow().isoformat(),
+        }
+        # Manifest goes last so a half-written table is never picked up
+        tmp_path = os.path.join(table_dir, TABLE_MANIFEST + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(table_dir, TABLE_MANIFEST))
+        return manifest
+
+    @classmethod
+    def load(cls, table_dir=RANKING_TABLE_DIR):
+        """Loads a written table (ids memory-mapped), or returns None if there is none or it is unusable."""
+        try:
+            with open(os.path.join(table_dir, TABLE_MANIFEST), encoding="utf-8") as fh:
+                manifest = json.load(fh)
+        except FileNotFoundError:
+            return None
+        if manifest.get("format_version") != TABLE_FORMAT_VERSION or manifest.get("nutrient_cols") != NUTRIENT_COLS:
+            print(f"[RankingTable] Ignoring {table_dir}: built by another version. Re-run build_ranking_table.py.")
+            return None
+        try:
+            return cls(
+                manifest["segments"],
+                np.load(os.path.join(table_dir, "ids.npy"), mmap_mode="r"),
+                np.load(os.path.join(table_dir, "pool_sizes.npy")),
+                np.load(os.path.join(table_dir, "relaxed.npy")),
+                manifest["catalog_version"],
+                manifest["k"],
+            )
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[RankingTable] Could not load {table_dir}: {e}")
+            return None
+
+
+_table = None
+# (catalog version, manifest stamp) the current table was loaded for
+_table_key = None
+_last_reload_check = 0.0
+_table_lock = threading.Lock()
+
+
+def manifest_stamp(table_dir=None):
+    """Identity of the manifest on disk, which every write replaces; None if there is no table."""
+    try:
+        st = os.stat(os.path.join(table_dir or RANKING_TABLE_DIR, TABLE_MANIFEST))
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+
+def _table_is_current(catalog):
+    return (_table_key is not None and _table_key[0] == catalog.version
+            and time.monotonic() - _last_reload_check < RANKING_TABLE_RELOAD_INTERVAL)
+
+
+def get_ranking_table(catalog):
+    """
+    The table for this catalog version; None if there is no matching table.
+    Every RANKING_TABLE_RELOAD_INTERVAL seconds it also checks whether
+    build_ranking_table.py wrote a new manifest and, if so, loads that table.
+    """
+    global _table, _table_key, _last_reload_check
+    if _table_is_current(catalog):
+        return _table
+    with _table_lock:
+        if not _table_is_current(catalog):
+            key = (catalog.version, manifest_stamp())
+            if key != _table_key:
+                table = RankingTable.load(RANKING_TABLE_DIR)
+                if table is not None and table.catalog_version != catalog.version:
+                    print(f"[RankingTable] Table is for catalog {table.catalog_version}, "
+                          f"serving {catalog.version}; scoring instead.")
+                    table = None
+                elif table is not None:
+                    print(f"[RankingTable] Loaded {len(table)} segments (k={table.k}).")
+                _table, _table_key = table, key
+            _last_reload_check = time.monotonic()
+    return _table
+
+
+def set_ranking_table(table, catalog_version):
+    """
+    Installs a table directly (benchmarks, tests); None disables the table.
+    It is served until the catalog version changes or a new table is written.
+    """
+    global _table, _table_key, _last_reload_check
+    with _table_lock:
+        _table, _table_key = table, (catalog_version, manifest_stamp())
+        _last_reload_check = time.monotonic()
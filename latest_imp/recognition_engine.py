@@ -0,0 +1,208 @@
+"""
+Food-recognition engine: one model behind a micro-batching queue, with
+results cached by image content hash.
+
+A model is any object with
+
+    name, version                 identify the model (stored on every meal)
+    predict_batch(images)         images: list of (image_hash, path); returns
+                                  one result per image, in order
+
+where a result has the shape analyze_image_dummy always returned:
+{"labels": {"tags", "confidence"}, "nutrients": {..., "dish_name"},
+"recognized_text"}. RECOGNITION_MODEL picks the model: "stub" (default,
+StubRecognitionModel) or "package.module:ClassName" for a real one, which
+is imported and constructed on first use.
+
+Concurrent uploads are served by a single runner thread. It takes the
+first queued image, keeps collecting until RECOGNITION_BATCH_SIZE images
+are queued or RECOGNITION_BATCH_WINDOW_MS has passed, and runs them as one
+predict_batch call, so a CPU model pays its per-call overhead once per
+batch. Results are cached per (model, version, image hash); the same image
+queued twice is predicted once.
+"""
+import copy
+import importlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.ocr_dummy import FOOD_DATA
+from utils.ttl_cache import TTLCache
+
+RECOGNITION_MODEL = os.environ.get("RECOGNITION_MODEL", "stub")
+RECOGNITION_BATCH_SIZE = int(os.environ.get("RECOGNITION_BATCH_SIZE", 8))
+RECOGNITION_BATCH_WINDOW_MS = float(os.environ.get("RECOGNITION_BATCH_WINDOW_MS", 20))
+RECOGNITION_TIMEOUT = float(os.environ.get("RECOGNITION_TIMEOUT", 30))
+RECOGNITION_CACHE_SIZE = int(os.environ.get("RECOGNITION_CACHE_SIZE", 4096))
+RECOGNITION_CACHE_TTL = int(os.environ.get("RECOGNITION_CACHE_TTL", 7 * 24 * 3600))
+
+
+class StubRecognitionModel:
+    """
+    Deterministic offline stand-in: picks one of the ocr_dummy dishes, and a
+    confidence between 0.80 and 0.98, from the image hash. Same image, same
+    answer, so tests and benchmarks are reproducible.
+    """
+
+    name = "stub"
+    version = "1"
+
+    def predict_batch(self, images):
+        return [self._predict(image_hash) for image_hash, _ in images]
+
+    def _predict(self, image_hash):
+        digest = int(image_hash[:16], 16)
+        selected = dict(FOOD_DATA[digest % len(FOOD_DATA)])
+        return {
+            "labels": {
+                "tags": ["veg", "home-cooked"],
+                "confidence": round(0.80 + (digest >> 8) % 19 / 100, 2)
+            },
+            "nutrients": selected,
+            "recognized_text": f"Recognized Dish: {selected['dish_name']}"
+        }
+
+
+def load_model(spec=None):
+    """Model for a RECOGNITION_MODEL spec ("stub" or "package.module:ClassName")."""
+    spec = spec or RECOGNITION_MODEL
+    if spec == "stub":
+        return StubRecognitionModel()
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"RECOGNITION_MODEL must be 'stub' or 'module:ClassName', got {spec!r}")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class RecognitionEngine:
+    """Micro-batching runner and result cache around one model."""
+
+    def __init__(self, model, batch_size=RECOGNITION_BATCH_SIZE, batch_window_ms=RECOGNITION_BATCH_WINDOW_MS,
+                 cache_size=RECOGNITION_CACHE_SIZE, cache_ttl=RECOGNITION_CACHE_TTL):
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window_ms / 1000.0
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._queue = queue.Queue()
+        self._inflight = {}  # image_hash -> Future, for images queued or running
+        self._lock = threading.Lock()
+        self._runner = None
+        self.batches = 0
+        self.images = 0
+
+    @property
+    def version(self):
+        return f"{self.model.name}-{self.model.version}"
+
+    def _cache_key(self, image_hash):
+        return (self.model.name, self.model.version, image_hash)
+
+    def _start(self):
+        with self._lock:
+            if self._runner is None:
+                self._runner = threading.Thread(target=self._run, name="recognition-runner", daemon=True)
+                self._runner.start()
+                print(f"[Recognition] Runner started for {self.version} "
+                      f"(batch {self.batch_size}, window {self.batch_window * 1000:.0f}ms).")
+
+    def submit(self, path, image_hash):
+        """(future, cached): the future resolves to the shared, read-only result for one image."""
+        cached = self.cache.get(self._cache_key(image_hash))
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future, True
+
+        with self._lock:
+            future = self._inflight.get(image_hash)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[image_hash] = future
+        self._start()
+        self._queue.put((image_hash, path, future))
+        return future, False
+
+    def recognize(self, path, image_hash, timeout=RECOGNITION_TIMEOUT):
+        """
+        Result for one image, plus "engine": {"name", "version", "cached"}.
+        Raises whatever the model raised, or TimeoutError.
+        """
+        future, cached = self.submit(path, image_hash)
+        result = copy.deepcopy(future.result(timeout=timeout))
+        result["engine"] = {"name": self.model.name, "version": self.version, "cached": cached}
+        return result
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                results = self.model.predict_batch([(image_hash, path) for image_hash, path, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.version} returned {len(results)} results for {len(batch)} images")
+            except Exception as e:
+                print(f"[Recognition] Batch of {len(batch)} failed: {e}")
+                results = None
+                error = e
+
+            self.batches += 1
+            self.images += len(batch)
+            for i, (image_hash, _, future) in enumerate(batch):
+                # Cached before leaving _inflight, so a concurrent submit finds one or the other
+                if results is not None:
+                    self.cache.put(self._cache_key(image_hash), results[i])
+                with self._lock:
+                    self._inflight.pop(image_hash, None)
+                if results is None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(results[i])
+
+    def stats(self):
+        return {
+            "engine": self.version,
+            "batch_size": self.batch_size,
+            "batch_window_ms": self.batch_window * 1000,
+            "batches": self.batches,
+            "images": self.images,
+            "mean_batch_size": round(self.images / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+            "cache": self.cache.stats(),
+        }
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_recognition_engine():
+    """The process-wide engine for RECOGNITION_MODEL, created on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = RecognitionEngine(load_model())
+    return _engine
+
+
+def set_recognition_engine(engine):
+    """Installs an engine directly (benchmarks, tests)."""
+    global _engine
+    with _engine_lock:
+        _engine = engine
@@ -0,0 +1,172 @@
+"""
+Recommendation executor backed by a process pool.
+
+Scoring runs in RECOMMENDER_POOL_SIZE worker processes, each holding its
+own warm catalog, so a Flask worker only waits on a future instead of
+doing the NumPy/pandas work under its own GIL. The pool is bounded:
+
+- at most RECOMMENDER_QUEUE_DEPTH calls may be queued or running; beyond
+  that a call is refused immediately (backpressure);
+- a call waits at most RECOMMENDER_TIMEOUT seconds.
+
+In both cases the caller gets recommendation_pending() back; a timed-out
+call keeps running and its future is handed back so the caller can store
+the late result. RECOMMENDER_POOL_SIZE=0 runs everything inline.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+RECOMMENDER_POOL_SIZE = int(os.environ.get("RECOMMENDER_POOL_SIZE", 2))
+RECOMMENDER_QUEUE_DEPTH = int(os.environ.get("RECOMMENDER_QUEUE_DEPTH", 32))
+RECOMMENDER_TIMEOUT = float(os.environ.get("RECOMMENDER_TIMEOUT", 5))
+RECOMMENDER_BATCH_TIMEOUT = float(os.environ.get("RECOMMENDER_BATCH_TIMEOUT", 60))
+
+RECOMMENDATION_PENDING_MESSAGE = "We're preparing a meal suggestion for you. Check back in a moment."
+RECOMMENDATION_BUSY_ERROR = "The recommender is busy. Please try again shortly."
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, RECOMMENDER_QUEUE_DEPTH))
+_NO_RESULT = object()
+
+
+def recommendation_pending():
+    """Result returned instead of a recommendation when the pool is saturated or slow."""
+    return {"status": "pending", "recommended_meals": [], "summary": RECOMMENDATION_PENDING_MESSAGE}
+
+
+# ----------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------
+def _init_worker():
+    # Imported here so the parent never pays for it just by importing this module
+    from catalog import get_catalog, CatalogError
+    try:
+        catalog = get_catalog()
+        print(f"[RecommenderPool] Worker {os.getpid()} ready (catalog {catalog.version}).")
+    except CatalogError as e:
+        print(f"[RecommenderPool] Worker {os.getpid()} started without a catalog: {e}")
+
+
+def _run_recommendation(deficits, profile, top_n, targets):
+    from meal_recommendor import recommend_from_deficits
+    return recommend_from_deficits(deficits, profile, top_n=top_n, targets=targets, fetch_links=False)
+
+
+def _run_batch(items, top_k):
+    from meal_recommendor import recommend_batch
+    return recommend_batch(items, top_k=top_k)
+
+
+# ----------------------------------------------------------------
+# Parent side
+# ----------------------------------------------------------------
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: workers open their own MongoClient instead of inheriting one across fork
+                _pool = ProcessPoolExecutor(
+                    max_workers=RECOMMENDER_POOL_SIZE,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+                print(f"[RecommenderPool] Started {RECOMMENDER_POOL_SIZE} workers "
+                      f"(queue depth {RECOMMENDER_QUEUE_DEPTH}, timeout {RECOMMENDER_TIMEOUT}s).")
+    return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def start_recommender_pool():
+    """Starts the workers now (e.g. at app start) rather than on the first request."""
+    if RECOMMENDER_POOL_SIZE > 0:
+        _get_pool().submit(os.getpid)
+
+
+def shutdown_recommender_pool():
+    _reset_pool()
+
+
+atexit.register(shutdown_recommender_pool)
+
+
+def _submit(fn, *args):
+    """Submits to the pool if a queue slot is free; returns the future or None when saturated."""
+    if not _slots.acquire(blocking=False):
+        return None
+    try:
+        future = _get_pool().submit(fn, *args)
+    except (BrokenProcessPool, RuntimeError) as e:
+        _slots.release()
+        print(f"[RecommenderPool] Pool unavailable, restarting: {e}")
+        _reset_pool()
+        return None
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def _wait(future, timeout):
+    """Result of a future, or _NO_RESULT if it is still running after `timeout` or failed."""
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        return _NO_RESULT
+    except BrokenProcessPool as e:
+        print(f"[RecommenderPool] Worker died, restarting pool: {e}")
+        _reset_pool()
+    except Exception as e:
+        print(f"[RecommenderPool] Recommendation failed: {e}")
+    return _NO_RESULT
+
+
+def submit_recommendation(deficits, profile, top_n=1, targets=None, timeout=RECOMMENDER_TIMEOUT):
+    """
+    recommend_from_deficits (with recipe links left "pending") in the pool.
+
+    Returns (result, pending_future). Normally pending_future is None. If
+    the call timed out, result is recommendation_pending() and
+    pending_future resolves to the real result later (attach a callback
+    with add_done_callback). If the pool is saturated or the call failed,
+    result is recommendation_pending() with a None future: nothing will
+    follow, so callers must not store a placeholder for it.
+    """
+    if RECOMMENDER_POOL_SIZE <= 0:
+        return _run_recommendation(deficits, profile, top_n, targets), None
+
+    future = _submit(_run_recommendation, deficits, profile, top_n, targets)
+    if future is None:
+        print("[RecommenderPool] Saturated; returning a pending recommendation.")
+        return recommendation_pending(), None
+
+    result = _wait(future, timeout)
+    if result is not _NO_RESULT:
+        return result, None
+    if future.done():
+        # Failed rather than slow: nothing will arrive later
+        return recommendation_pending(), None
+    print(f"[RecommenderPool] No result within {timeout}s; recommendation is pending.")
+    return recommendation_pending(), future
+
+
+def submit_batch(items, top_k, timeout=RECOMMENDER_BATCH_TIMEOUT):
+    """recommend_batch in the pool; returns None when saturated, failed or timed out."""
+    if RECOMMENDER_POOL_SIZE <= 0:
+        return _run_batch(items, top_k)
+
+    future = _submit(_run_batch, items, top_k)
+    if future is None:
+        return None
+    result = _wait(future, timeout)
+    return None if result is _NO_RESULT else result
@@ -9,7 +9,7 @@ from pymongo import MongoClient
 from config import MONGO_URI
 
 # Initialize MongoDB connection
-client = MongoClient(MONGO_URI)
+client = MongoClient(MONGO_URI, connect=False)
 db = client.get_default_database()
 queries_col = db.get_collection("queries")
 
@@ -0,0 +1,24 @@
+"""
+Shared setup: runs from latest_imp/ imports, with every external service
+off. MongoDB points at a closed port with a short timeout, so a query the
+test forgot to fake fails fast instead of reaching a real database.
+"""
+import os
+import sys
+
+os.environ["MONGO_URI"] = "mongodb://127.0.0.1:9/mothers_nutrition_test?serverSelectionTimeoutMS=200"
+os.environ["GOOGLE_API_KEY"] = ""
+os.environ["SEARCH_ENGINE_ID"] = ""
+os.environ["RECOMMENDER_POOL_SIZE"] = "0"
+os.environ["MEAL_PIPELINE_WORKERS"] = "0"
+os.environ["IMAGE_WORKERS"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def catalog():
+    from catalog import get_catalog
+    return get_catalog()
@@ -0,0 +1,86 @@
+import os
+import threading
+
+from bson.objectid import ObjectId
+from PIL import Image
+
+import app as app_module
+from utils import image_normalize, image_store
+from utils.image_store import image_path
+
+
+def stored_photo(root, name="a" * 64, ext=".jpg"):
+    path = image_path(name, ext, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new("RGB", (640, 480), (200, 120, 40)).save(path, "JPEG")
+    return path
+
+
+def test_normalize_finds_an_original_already_moved_to_cold_storage(tmp_path):
+    root, cold = str(tmp_path / "store"), str(tmp_path / "cold")
+    path = stored_photo(root)
+    sha = "a" * 64
+    moved = image_normalize.move_to_cold_storage(path, sha, cold)
+    assert moved != path and os.path.exists(moved) and not os.path.exists(path)
+
+    # A second meal with the same photo, queued before the move
+    result = image_normalize.normalize_image(path, sha, root=root, cold_dir=cold)
+    assert result.original_path == moved
+    assert os.path.exists(result.analysis_path) and os.path.exists(result.thumbnail_path)
+
+
+def test_concurrent_normalization_of_one_photo(tmp_path):
+    root, cold = str(tmp_path / "store"), str(tmp_path / "cold")
+    path = stored_photo(root, "b" * 64)
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(image_normalize.normalize_image(path, "b" * 64, root=root, cold_dir=cold))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    cold_path = image_path("b" * 64, ".jpg", cold)
+    assert {r.original_path for r in results} == {cold_path}
+    assert os.path.exists(cold_path) and not os.path.exists(path)
+    assert not [f for f in os.listdir(os.path.dirname(cold_path)) if f.endswith(".tmp")]
+
+
+class FakeCollection:
+    def __init__(self, doc):
+        self.doc = doc
+
+    def find_one(self, query, projection=None):
+        return self.doc if query["_id"] == self.doc["_id"] else None
+
+
+def test_thumbnail_only_for_the_mother_and_her_care_team(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_store, "IMAGE_STORE_DIR", str(tmp_path))
+    sha = "c" * 64
+    thumbnail = image_path(sha, image_normalize.THUMBNAIL_SUFFIX, str(tmp_path))
+    os.makedirs(os.path.dirname(thumbnail), exist_ok=True)
+    Image.new("RGB", (16, 16)).save(thumbnail, "JPEG")
+
+    mother_id = ObjectId()
+    meal = {"_id": ObjectId(), "motherId": str(mother_id), "image_hash": sha, "thumbnail_path": "/gone.jpg"}
+    monkeypatch.setattr(app_module, "meals_col", FakeCollection(meal))
+    monkeypatch.setattr(app_module, "users_col", FakeCollection(
+        {"_id": mother_id, "assigned_doctor_id": "doc-1", "ashaId": "asha-1"}))
+
+    client = app_module.app.test_client()
+    url = f"/api/meals/{meal['_id']}/thumbnail"
+    for user_id, role, status in [(str(mother_id), "mother", 200), ("doc-1", "doctor", 200),
+                                  ("asha-1", "asha", 200), (str(ObjectId()), "mother", 404),
+                                  ("doc-2", "doctor", 404), ("asha-2", "asha", 404)]:
+        with client.session_transaction() as sess:
+            sess["user_id"], sess["role"] = user_id, role
+        response = client.get(url)
+        assert response.status_code == status, (role, user_id)
+        response.close()
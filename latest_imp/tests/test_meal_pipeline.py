@@ -0,0 +1,152 @@
+from concurrent.futures import Future
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+import app as app_module
+import meal_recommendor as recommender
+import recommender_pool
+from ranking_table import RankingTable, set_ranking_table
+from utils.recipe_links import RecipeLinkCache, StaticRecipeLinkProvider
+from utils.segments import build_recommender_profile
+
+LUNCH_TARGETS = {"kcal": 650, "protein_g": 25, "iron_mg": 9, "calcium_mg": 400, "fibre_g": 8, "folate_ug": 200}
+
+
+class Recorder:
+    """Stands in for a collection or a models function: records every call."""
+
+    def __init__(self, result=None):
+        self.calls = []
+        self.result = result
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+        return self.result
+
+    def __getattr__(self, name):
+        return self
+
+
+class FakeUsers:
+    """users_col holding one mother: applies $set when the filter matches her document."""
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def update_one(self, query, update):
+        matched = all(self._get(key) == value for key, value in query.items())
+        if matched:
+            for key, value in update["$set"].items():
+                self.doc[key] = value
+        return Recorder(int(matched))
+
+    def _get(self, dotted):
+        value = self.doc
+        for part in dotted.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        return value
+
+
+def _mother():
+    return {"_id": ObjectId(), "name": "Asha", "role": "mother", "location_state": "Karnataka",
+            "location_area_type": "rural", "dietary_preference": "Vegetarian", "income_range": "1-3L",
+            "cuisine_preference": "South Indian", "allergies": [], "assigned_doctor_id": "d1", "ashaId": "a1",
+            "latest_recommendation": {"Dish Name": "Ragi mudde"}}
+
+
+def _run_process_meal(monkeypatch, mother, targets=LUNCH_TARGETS):
+    """Runs process_meal for a lunch upload with Mongo stubbed out; returns (save_meal_outcome, users_col)."""
+    mother_id = str(mother["_id"])
+    plan = {"_id": ObjectId(), "motherId": mother_id, "status": "active", "required_nutrients": {"lunch": targets}}
+    save_meal_outcome = Recorder()
+    users_col = FakeUsers(mother)
+    monkeypatch.setattr(recommender, "collection", None)
+    monkeypatch.setattr(recommender, "users_collection", None)
+    monkeypatch.setattr(recommender, "recipe_links", RecipeLinkCache(StaticRecipeLinkProvider(), None))
+    monkeypatch.setattr(app_module, "normalize_in_pool", Recorder())
+    monkeypatch.setattr(app_module, "find_analysis_by_image", Recorder())
+    monkeypatch.setattr(app_module, "get_active_plan_for_mother_and_date", Recorder(plan))
+    monkeypatch.setattr(app_module, "create_alert", Recorder({"_id": "alert-1"}))
+    monkeypatch.setattr(app_module, "get_user_by_id", Recorder(mother))
+    monkeypatch.setattr(app_module, "save_meal_outcome", save_meal_outcome)
+    monkeypatch.setattr(app_module, "users_col", users_col)
+    for name in ("set_meal_stage", "set_meal_images", "update_meal_labels_and_nutrients",
+                 "create_notification", "meals_col", "schedule_recipe_link_enrichment"):
+        monkeypatch.setattr(app_module, name, Recorder())
+
+    app_module.process_meal(str(ObjectId()), mother_id, "lunch", datetime.utcnow().strftime("%Y-%m-%d"),
+                            "meal.jpg", "ab" * 32, "/report")
+    return save_meal_outcome, users_col
+
+
+def _pool_returning(monkeypatch, future):
+    """Routes submit_recommendation through a pool whose _submit hands back `future`."""
+    monkeypatch.setattr(recommender_pool, "RECOMMENDER_POOL_SIZE", 1)
+    monkeypatch.setattr(recommender_pool, "_submit", lambda *args: future)
+    monkeypatch.setattr(recommender_pool, "_wait", lambda f, timeout: recommender_pool._NO_RESULT)
+
+
+def test_process_meal_scores_weighted_deficits_instead_of_using_the_ranking_table(catalog, monkeypatch):
+    mother = _mother()
+    table = RankingTable.build(catalog, [build_recommender_profile(mother)])
+    set_ranking_table(table, catalog.version)
+    recommender._segment_cache.clear()
+    try:
+        save_meal_outcome, _ = _run_process_meal(monkeypatch, mother)
+    finally:
+        set_ranking_table(None, None)
+
+    (_, alert_info, recommendation), _ = save_meal_outcome.calls[0]
+    assert alert_info["alert_created"]
+    assert recommendation and recommendation.get("status") != "pending"
+    # Gaps relative to the plan targets are weighted: the table cannot rank them exactly
+    assert (table.hits, table.misses) == (0, 1)
+
+
+def test_saturated_pool_keeps_the_previous_recommendation(catalog, monkeypatch):
+    _pool_returning(monkeypatch, None)
+    mother = _mother()
+    save_meal_outcome, _ = _run_process_meal(monkeypatch, mother)
+
+    (_, alert_info, recommendation), _ = save_meal_outcome.calls[0]
+    assert alert_info["alert_created"] and recommendation is None
+    assert mother["latest_recommendation"] == {"Dish Name": "Ragi mudde"}
+
+
+def test_failed_recommendation_keeps_the_previous_recommendation(catalog, monkeypatch):
+    failed = Future()
+    failed.set_exception(RuntimeError("worker crashed"))
+    _pool_returning(monkeypatch, failed)
+    mother = _mother()
+    save_meal_outcome, _ = _run_process_meal(monkeypatch, mother)
+
+    (_, _, recommendation), _ = save_meal_outcome.calls[0]
+    assert recommendation is None
+    assert mother["latest_recommendation"] == {"Dish Name": "Ragi mudde"}
+
+
+def test_slow_recommendation_replaces_its_placeholder(catalog, monkeypatch):
+    slow = Future()
+    _pool_returning(monkeypatch, slow)
+    mother = _mother()
+    _run_process_meal(monkeypatch, mother)
+    assert mother["latest_recommendation"]["status"] == "pending"
+
+    slow.set_result({"recommended_meals": [{"Dish Name": "Pesarattu"}]})
+    assert mother["latest_recommendation"]["Dish Name"] == "Pesarattu"
+
+
+def test_daily_summary_matches_remaining_nutrients(monkeypatch):
+    plan = {"required_nutrients": {"breakfast": {"protein_g": 20, "iron_mg": 9},
+                                   "lunch": {"protein_g": 25, "iron_mg": 9}}}
+    monkeypatch.setattr(app_module, "get_active_plan_for_mother_and_date", Recorder(plan))
+    monkeypatch.setattr(app_module, "get_total_intake_for_day", Recorder({"protein_g": 30.5, "iron_mg": 20}))
+
+    summary = app_module.daily_summary("m1", "2026-01-05")
+    assert summary == {"goal": {"protein_g": 45, "iron_mg": 18},
+                       "taken_so_far": {"protein_g": 30.5, "iron_mg": 20},
+                       "remaining": {"protein_g": 14.5, "iron_mg": 0}}
+
+    monkeypatch.setattr(app_module, "get_active_plan_for_mother_and_date", Recorder(None))
+    assert app_module.daily_summary("m1", "2026-01-05")["remaining"] == {}
@@ -0,0 +1,61 @@
+import numpy as np
+
+from catalog import NUTRIENT_COLS
+from meal_planner import close_day_gap, generate_week_plan, meal_scores, meal_shares, DEFAULT_DAY_LIMITS
+from meal_recommendor import profile_filter_masks
+from utils.nutrient_mapper import SHORT_TO_LONG_MAP
+
+VEGETARIAN = {"state": "Karnataka", "area": "rural", "diet_pref": "Vegetarian",
+              "income_range": "1-3L", "cuisine_pref": "", "allergies_to_avoid": []}
+
+
+def diets(catalog, dish_ids):
+    return {catalog.df["diet_type"].iat[int(i)].strip().lower() for i in dish_ids}
+
+
+def test_vegetarian_masks_exclude_non_vegetarian(catalog):
+    strict, relaxed = profile_filter_masks(catalog, VEGETARIAN)
+    assert relaxed.any()
+    assert diets(catalog, np.flatnonzero(relaxed)) == {"vegetarian"}
+    assert not (strict & ~relaxed).any()
+
+
+def test_empty_diet_keeps_every_diet(catalog):
+    _, relaxed = profile_filter_masks(catalog, dict(VEGETARIAN, diet_pref=""))
+    assert {"vegetarian", "non-vegetarian"} <= diets(catalog, np.flatnonzero(relaxed))
+
+
+def test_vegetarian_day_gap_and_week_plan(catalog):
+    veg = catalog.df["diet_type"].str.strip().str.lower() == "vegetarian"
+    non_veg = set(catalog.df["Dish Name"][~veg])
+
+    gap = close_day_gap({"protein_g": 30, "iron_mg": 8, "kcal": 700}, VEGETARIAN, catalog=catalog)
+    assert "error" not in gap
+    assert not {d["Dish Name"] for d in gap["dishes"]} & non_veg
+
+    targets = {meal: {"kcal": 500, "protein_g": 20, "iron_mg": 6} for meal in ("breakfast", "lunch", "dinner")}
+    plan = generate_week_plan(targets, VEGETARIAN, catalog=catalog)
+    assert "error" not in plan
+    planned = {meal["Dish Name"] for day in plan["days"] for meal in day["meals"].values()}
+    assert planned and not planned & non_veg
+
+
+
+def test_meal_scores_scale_the_daily_sodium_allowance_to_the_meal(catalog):
+    targets = {"breakfast": {"kcal": 400}, "lunch": {"kcal": 800}, "dinner": {"kcal": 800}}
+    np.testing.assert_allclose(meal_shares(targets, ["breakfast", "lunch", "dinner"]), [0.2, 0.4, 0.4])
+    np.testing.assert_allclose(meal_shares({"lunch": {"protein_g": 20}, "dinner": {}}, ["lunch", "dinner"]), [0.5, 0.5])
+
+    sodium = catalog.nutrients_raw[:, NUTRIENT_COLS.index(SHORT_TO_LONG_MAP["sodium_mg"])].astype(float)
+    lunch_allowance = DEFAULT_DAY_LIMITS["sodium_mg"] * 0.4
+    salty = (sodium > lunch_allowance) & (sodium <= DEFAULT_DAY_LIMITS["sodium_mg"])
+    assert salty.any()
+
+    mask = np.ones(len(catalog), dtype=bool)
+    whole_day = meal_scores(catalog, {"protein_g": 20}, mask)
+    lunch = meal_scores(catalog, {"protein_g": 20}, mask, day_share=0.4)
+    # Within the day's allowance but over lunch's share of it
+    assert (lunch[salty] < whole_day[salty]).all()
+    sugar = catalog.nutrients_raw[:, NUTRIENT_COLS.index(SHORT_TO_LONG_MAP["free_sugar_g"])].astype(float)
+    within = (sodium <= lunch_allowance) & (sugar <= DEFAULT_DAY_LIMITS["free_sugar_g"] * 0.4)
+    np.testing.assert_array_equal(lunch[within], whole_day[within])
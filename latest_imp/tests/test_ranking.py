@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+import meal_recommendor as recommender
+from benchmarks.synthetic import synthetic_profiles
+from ranking_table import set_ranking_table
+
+
+@pytest.fixture
+def no_table(catalog):
+    set_ranking_table(None, catalog.version)
+    recommender._segment_cache.clear()
+    yield
+    set_ranking_table(None, None)
+
+
+def reference(catalog, def_vec, profile, k):
+    """Uncached ranking: the batch path's full similarity row through rank_candidates."""
+    return recommender.rank_candidates(catalog, catalog.index.similarities(def_vec[None, :])[0], profile, k)
+
+
+def assert_same_ranking(got, expected):
+    assert (got is None) == (expected is None)
+    if got is None:
+        return
+    np.testing.assert_array_equal(got[0], expected[0])
+    np.testing.assert_allclose(got[2], expected[2], rtol=1e-6)
+    assert got[3] == expected[3]
+
+
+def test_cached_matches_uncached_for_fractional_weights(catalog, no_table):
+    rng = np.random.default_rng(7)
+    profiles = synthetic_profiles(catalog, 20, seed=7)
+    n = len(recommender.NUTRIENT_COLS)
+    for profile in profiles:
+        for _ in range(5):
+            def_vec = np.where(rng.random(n) < 0.4, rng.random(n), 0.0)
+            def_vec[rng.integers(n)] = rng.uniform(0.05, 1.0)
+            expected = reference(catalog, def_vec, profile, 8)
+            # Cold, then served from the segment cache
+            assert_same_ranking(recommender.rank_candidates_cached(catalog, def_vec, profile, 8), expected)
+            assert_same_ranking(recommender.rank_candidates_cached(catalog, def_vec, profile, 8), expected)
+
+
+def test_weights_that_round_alike_are_ranked_separately(catalog, no_table):
+    profile = synthetic_profiles(catalog, 1, seed=3)[0]
+    n = len(recommender.NUTRIENT_COLS)
+    first, second = np.zeros(n), np.zeros(n)
+    first[[0, 2]] = [0.504, 0.004]
+    second[[0, 2]] = [0.496, 0.0]
+    for def_vec in (first, second):
+        expected = reference(catalog, def_vec, profile, 10)
+        assert_same_ranking(recommender.rank_candidates_cached(catalog, def_vec, profile, 10), expected)
+
+
+def test_exact_index_ranks_without_a_search(catalog, no_table, monkeypatch):
+    assert catalog.index.exact
+
+    def search(*args, **kwargs):
+        raise AssertionError("exact index should go through rank_candidates")
+
+    monkeypatch.setattr(catalog.index, "search", search)
+    profile = synthetic_profiles(catalog, 1, seed=5)[0]
+    def_vec = np.zeros(len(recommender.NUTRIENT_COLS))
+    def_vec[[1, 4]] = [0.7, 0.25]
+    assert_same_ranking(recommender.rank_candidates_cached(catalog, def_vec, profile, 5),
+                        reference(catalog, def_vec, profile, 5))
+
+
+def test_table_hits_match_scoring_for_equal_weights(catalog, no_table):
+    from ranking_table import RankingTable, N_SUBSETS, subset_vector
+
+    profiles = synthetic_profiles(catalog, 10, seed=11)
+    table = RankingTable.build(catalog, profiles)
+    set_ranking_table(table, catalog.version)
+    rng = np.random.default_rng(11)
+    for profile in profiles:
+        for code in rng.integers(1, N_SUBSETS, size=10):
+            def_vec = subset_vector(int(code))
+            from_table = recommender.rank_candidates_from_table(catalog, def_vec, profile, 5)
+            if from_table is not None:
+                assert_same_ranking(from_table, reference(catalog, def_vec, profile, 5))
+    assert table.hits
+
+
+def test_table_declines_weighted_deficits(catalog, no_table):
+    from ranking_table import RankingTable
+
+    profile = synthetic_profiles(catalog, 1, seed=13)[0]
+    table = RankingTable.build(catalog, [profile])
+    set_ranking_table(table, catalog.version)
+    def_vec = np.zeros(len(recommender.NUTRIENT_COLS))
+    def_vec[[1, 4]] = [0.7, 0.25]
+    assert recommender.rank_candidates_from_table(catalog, def_vec, profile, 5) is None
+    assert_same_ranking(recommender.rank_candidates_cached(catalog, def_vec, profile, 5),
+                        reference(catalog, def_vec, profile, 5))
+    assert (table.hits, table.misses) == (0, 2)
+
+
+def test_rebuilt_table_is_picked_up(catalog, no_table, tmp_path, monkeypatch):
+    import ranking_table
+    from ranking_table import RankingTable, get_ranking_table
+
+    profiles = synthetic_profiles(catalog, 2, seed=17)
+    monkeypatch.setattr(ranking_table, "RANKING_TABLE_DIR", str(tmp_path))
+    monkeypatch.setattr(ranking_table, "RANKING_TABLE_RELOAD_INTERVAL", 0)
+
+    RankingTable.build(catalog, profiles[:1], k=8).write(str(tmp_path))
+    first = get_ranking_table(catalog)
+    assert (len(first), first.k) == (1, 8)
+    assert get_ranking_table(catalog) is first
+
+    RankingTable.build(catalog, profiles, k=16).write(str(tmp_path))
+    rebuilt = get_ranking_table(catalog)
+    assert rebuilt is not first and rebuilt.k == 16
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+import meal_recommendor as recommender
+
+
+class FakeUsers:
+    """The two users_collection calls the recent-dishes buffer makes, on one document."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.reads = 0
+
+    def find_one(self, query, projection=None):
+        self.reads += 1
+        return dict(self.doc) if query["_id"] == self.doc["_id"] else None
+
+    def update_one(self, query, update):
+        push = update["$push"]["recent_dishes"]
+        entries = self.doc.get("recent_dishes", []) + push["$each"]
+        self.doc["recent_dishes"] = entries[push["$slice"]:]
+
+
+def test_recent_dishes_read_from_the_user_document(monkeypatch):
+    mother_id = ObjectId()
+    users = FakeUsers({"_id": mother_id, "recent_dishes": [{"dish": "Poha", "at": datetime.utcnow()}]})
+    monkeypatch.setattr(recommender, "users_collection", users)
+
+    assert recommender.get_recent_recommendations(str(mother_id)) == ["Poha"]
+
+    # Another worker process writes to the same document
+    users.doc["recent_dishes"].append({"dish": "Ragi Dosa", "at": datetime.utcnow()})
+    assert recommender.get_recent_recommendations(str(mother_id)) == ["Ragi Dosa", "Poha"]
+
+    recommender.remember_recommended_dishes(str(mother_id), ["Dal Tadka"])
+    assert recommender.get_recent_recommendations(str(mother_id)) == ["Dal Tadka", "Ragi Dosa", "Poha"]
+    assert users.reads == 3
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from utils.scoring import normalize_vector, select_top_k
+from utils.similarity_index import BruteForceIndex, IVFIndex
+
+
+def reference_top_k(scores, k):
+    """Full sort: best first, ties to the lower index."""
+    return np.lexsort((np.arange(len(scores)), -scores))[:k]
+
+
+@pytest.mark.parametrize("k", [0, 1, 3, 10, 49, 50, 80])
+def test_select_top_k_matches_full_sort_with_ties(k):
+    rng = np.random.default_rng(k)
+    for _ in range(50):
+        # Few distinct values, so the k-th place is almost always tied
+        scores = rng.integers(0, 6, size=50).astype(float)
+        np.testing.assert_array_equal(select_top_k(scores, k), reference_top_k(scores, k))
+
+
+def test_select_top_k_keeps_the_lowest_index_among_boundary_ties():
+    scores = np.array([0.2, 0.9, 0.5, 0.5, 0.1, 0.5, 0.5])
+    np.testing.assert_array_equal(select_top_k(scores, 3), [1, 2, 3])
+
+
+def check_search(index, query, mask, k=10):
+    scores = index.vectors @ normalize_vector(query)
+    allowed = np.flatnonzero(mask)
+    expected = allowed[reference_top_k(scores[allowed], k)]
+    ids, found = index.search(query, k, mask)
+    np.testing.assert_array_equal(ids, expected)
+    np.testing.assert_allclose(found, scores[ids], rtol=1e-6)
+
+
+def test_index_search_matches_reference_ranking():
+    rng = np.random.default_rng(0)
+    # Repeated rows give exactly tied scores
+    matrix = rng.integers(0, 3, size=(400, 6)).astype(float)
+    brute = BruteForceIndex(matrix)
+    ivf = IVFIndex(matrix, n_lists=8, n_probe=8)  # every list probed: exact
+    for _ in range(20):
+        mask = rng.random(400) < 0.6
+        check_search(brute, rng.random(6), mask)
+        # One-nutrient queries: the score is a single vector component, so
+        # ties stay exact even though IVF scores list by list
+        query = np.zeros(6)
+        query[rng.integers(6)] = rng.uniform(0.5, 2)
+        check_search(brute, query, mask)
+        check_search(ivf, query, mask)
+
+
+def test_artifact_index_maps_the_unit_rows_without_copying(catalog, tmp_path):
+    from catalog import DishCatalog
+
+    catalog.write_artifact(str(tmp_path))
+    loaded = DishCatalog.from_artifact(str(tmp_path))
+    vectors = loaded.index.vectors
+    assert not vectors.flags.owndata and isinstance(vectors.base, np.memmap)
+    np.testing.assert_array_equal(vectors, catalog.index.vectors)
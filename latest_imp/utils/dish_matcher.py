@@ -0,0 +1,158 @@
+"""
+Approximate dish-name lookup against the catalog.
+
+OCR output and hand-typed names rarely match catalog names byte for byte
+("Instant Coffee" vs "Instant coffee", "Dahi chawal/ Perugu" vs
+"Dahi chawal/Perugu"). DishMatcher resolves a free-text name to a catalog
+dish id in two steps:
+
+1. exact lookup of the normalized name (case, accents, punctuation and
+   spacing ignored), also under each name's variants: the name without its
+   bracketed part, and each bracketed alternative ("Hot tea (Garam Chai)"
+   is found as "hot tea" and "garam chai" too);
+2. otherwise, Dice similarity over character trigrams, scored for every
+   key in one pass over an inverted index; the best dish above the
+   threshold wins.
+"""
+import json
+import os
+import re
+import unicodedata
+from collections import namedtuple
+
+import numpy as np
+
+# Minimum trigram similarity (0-1) for a fuzzy match to count
+DISH_MATCH_THRESHOLD = float(os.environ.get("DISH_MATCH_THRESHOLD", 0.75))
+
+DishMatch = namedtuple("DishMatch", ["dish_id", "dish_name", "score", "exact"])
+
+_BRACKETED = re.compile(r"\(([^()]*)\)")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_dish_name(name):
+    """Lower-case ASCII words separated by single spaces: 'Dahi-Chawal (Perugu)' -> 'dahi chawal perugu'."""
+    text = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode("ascii")
+    text = text.lower().replace("&", " and ")
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def name_variants(name):
+    """Other keys a dish may be written as: without the bracketed part, and each bracketed alternative."""
+    text = str(name or "")
+    main = _BRACKETED.sub(" ", text)
+    variants = [main] + main.split("/")
+    for inner in _BRACKETED.findall(text):
+        variants.extend(inner.split("/"))
+    keys = [normalize_dish_name(v) for v in variants]
+    return [k for k in keys if len(k) >= 3]
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def read_alias_file(path):
+    """{alias: canonical dish name} from an alias file, or {} if there is none."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh).get("aliases", {})
+    except FileNotFoundError:
+        return {}
+
+
+class DishMatcher:
+    """
+    Name index over a list of dish names; dish ids are positions in that
+    list (the catalog's row order). `aliases` maps extra spellings to one
+    of the names. Built once per catalog and read-only afterwards.
+    """
+
+    def __init__(self, names, aliases=None, threshold=None):
+        self.names = [str(n) for n in names]
+        self.threshold = DISH_MATCH_THRESHOLD if threshold is None else threshold
+
+        exact = {}
+        for dish_id, name in enumerate(self.names):
+            exact.setdefault(normalize_dish_name(name), dish_id)
+        by_name = {name: dish_id for dish_id, name in enumerate(self.names)}
+        for alias, canonical in (aliases or {}).items():
+            if canonical in by_name:
+                exact.setdefault(normalize_dish_name(alias), by_name[canonical])
+
+        # Variants only count when they point at a single dish
+        variants, ambiguous = {}, set()
+        for dish_id, name in enumerate(self.names):
+            for key in name_variants(name):
+                if key in exact:
+                    continue
+                if variants.setdefault(key, dish_id) != dish_id:
+                    ambiguous.add(key)
+        for key in ambiguous:
+            del variants[key]
+        exact.update(variants)
+        self._exact = exact
+
+        # Trigram inverted index over every key
+        self._keys = list(exact)
+        self._key_dish = np.array([exact[k] for k in self._keys], dtype=np.int32)
+        self._key_sizes = np.empty(len(self._keys), dtype=np.float32)
+        postings = {}
+        for key_id, key in enumerate(self._keys):
+            grams = trigrams(key)
+            self._key_sizes[key_id] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(key_id)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def similarities(self, name):
+        """Dice similarity of `name` to every key (0 for keys sharing no trigram)."""
+        grams = trigrams(normalize_dish_name(name))
+        hits = [self._postings[g] for g in grams if g in self._postings]
+        if not hits:
+            return np.zeros(len(self._keys), dtype=np.float32)
+        overlap = np.bincount(np.concatenate(hits), minlength=len(self._keys))
+        return 2.0 * overlap / (len(grams) + self._key_sizes)
+
+    def candidates(self, name, n=5):
+        """Up to n best DishMatch entries for `name`, one per dish, best first (no threshold)."""
+        key = normalize_dish_name(name)
+        if not key:
+            return []
+        if key in self._exact:
+            dish_id = self._exact[key]
+            return [DishMatch(dish_id, self.names[dish_id], 1.0, True)]
+
+        scores = self.similarities(name)
+        best = {}
+        # Stable sort: equal scores keep key order (primary names come first)
+        for key_id in np.argsort(-scores, kind="stable"):
+            if scores[key_id] <= 0 or len(best) == n:
+                break
+            dish_id = int(self._key_dish[key_id])
+            if dish_id not in best:
+                best[dish_id] = DishMatch(dish_id, self.names[dish_id], float(scores[key_id]), False)
+        return list(best.values())
+
+    def match(self, name, threshold=None):
+        """Best DishMatch for `name`, or None if nothing reaches the threshold."""
+        key = normalize_dish_name(name)
+        if not key:
+            return None
+        dish_id = self._exact.get(key)
+        if dish_id is not None:
+            return DishMatch(dish_id, self.names[dish_id], 1.0, True)
+
+        scores = self.similarities(name)
+        if not len(scores):
+            return None
+        best = int(np.argmax(scores))
+        if scores[best] <= 0 or scores[best] < (self.threshold if threshold is None else threshold):
+            return None
+        dish_id = int(self._key_dish[best])
+        return DishMatch(dish_id, self.names[dish_id], float(scores[best]), False)
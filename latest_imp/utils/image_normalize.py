@@ -0,0 +1,158 @@
+"""
+Normalization stage for uploaded meal photos.
+
+Each original (already in the content-addressed store, see
+utils/image_store.py) is decoded once and written out as two JPEGs next
+to it, named after the original's hash:
+
+    <h>.analysis.jpg   longest side <= ANALYSIS_MAX_SIDE, fed to recognition
+    <h>.thumb.jpg      longest side <= THUMBNAIL_SIZE, shown on report/profile pages
+
+EXIF rotation is applied and everything is converted to RGB. For JPEGs the
+decoder is asked for a reduced-size draft, so a 12 MP phone photo is never
+fully decoded. A photo seen before (same hash) reuses its derived files
+without decoding anything.
+
+Decoding is CPU and memory heavy, so it runs in IMAGE_WORKERS threads
+(Pillow releases the GIL while decoding and resizing). With
+COLD_STORAGE_DIR set, the original is moved there once it is normalized;
+only the derived images stay on the serving disk. The same photo can be
+in the pipeline twice (two meals, or a retry), so the original is always
+looked up by hash (locate_original) rather than trusted to still be at
+the path it was uploaded to.
+"""
+import os
+import shutil
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.image_store import IMAGE_STORE_DIR, image_path
+
+ANALYSIS_MAX_SIDE = int(os.environ.get("ANALYSIS_MAX_SIDE", 1024))
+ANALYSIS_QUALITY = int(os.environ.get("ANALYSIS_QUALITY", 85))
+THUMBNAIL_SIZE = int(os.environ.get("THUMBNAIL_SIZE", 192))
+THUMBNAIL_QUALITY = int(os.environ.get("THUMBNAIL_QUALITY", 70))
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", 2))
+IMAGE_NORMALIZE_TIMEOUT = float(os.environ.get("IMAGE_NORMALIZE_TIMEOUT", 30))
+# Empty disables cold storage: originals stay in the image store
+COLD_STORAGE_DIR = os.environ.get("COLD_STORAGE_DIR", "")
+
+ANALYSIS_SUFFIX = ".analysis.jpg"
+THUMBNAIL_SUFFIX = ".thumb.jpg"
+
+NormalizedImage = namedtuple("NormalizedImage", ["original_path", "analysis_path", "thumbnail_path", "size"])
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def derived_paths(sha256, root=None):
+    """(analysis_path, thumbnail_path) for an original's hash."""
+    return image_path(sha256, ANALYSIS_SUFFIX, root), image_path(sha256, THUMBNAIL_SUFFIX, root)
+
+
+def _save_jpeg(img, path, quality):
+    # Written under a temporary name so readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    img.save(tmp_path, "JPEG", quality=quality, optimize=True)
+    os.replace(tmp_path, path)
+
+
+def locate_original(path, sha256, cold_dir=None):
+    """Where an original is now: `path` in the image store, else its cold-storage copy; None if neither exists."""
+    if os.path.exists(path):
+        return path
+    cold_dir = COLD_STORAGE_DIR if cold_dir is None else cold_dir
+    if cold_dir:
+        cold_path = image_path(sha256, os.path.splitext(path)[1], cold_dir)
+        if os.path.exists(cold_path):
+            return cold_path
+    return None
+
+
+def move_to_cold_storage(path, sha256, cold_dir=None):
+    """
+    Moves an original into cold storage (same sharded layout) and returns
+    where it is afterwards. Safe to call for the same photo from several
+    workers at once: whoever moves it first wins, the others find the copy.
+    """
+    cold_dir = COLD_STORAGE_DIR if cold_dir is None else cold_dir
+    if not cold_dir:
+        return path
+    dest = image_path(sha256, os.path.splitext(path)[1], cold_dir)
+    try:
+        if os.path.exists(dest):
+            # Same content already archived
+            os.unlink(path)
+        else:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            # Moved under a temporary name first, so a reader never sees a partial copy
+            tmp_path = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                shutil.move(path, tmp_path)
+            except FileNotFoundError:
+                # Across filesystems move is copy + unlink: the copy is complete
+                # if it exists, only the unlink lost the race
+                if not os.path.exists(tmp_path):
+                    raise
+            os.replace(tmp_path, dest)
+    except FileNotFoundError:
+        pass  # another worker moved it first
+    return locate_original(path, sha256, cold_dir) or path
+
+
+def normalize_image(path, sha256, root=None, cold_dir=None):
+    """
+    Produces the analysis image and thumbnail for one original and returns a
+    NormalizedImage (`size` is the original's (width, height), or None when
+    the derived files already existed). Raises OSError for files Pillow
+    cannot decode.
+    """
+    from PIL import Image, ImageOps
+
+    root = root or IMAGE_STORE_DIR
+    analysis_path, thumbnail_path = derived_paths(sha256, root)
+    size = None
+    if not (os.path.exists(analysis_path) and os.path.exists(thumbnail_path)):
+        source = locate_original(path, sha256, cold_dir)
+        if source is None:
+            raise FileNotFoundError(f"Original {sha256} is neither at {path} nor in cold storage")
+        try:
+            img = Image.open(source)
+        except FileNotFoundError:
+            # Moved to cold storage by another worker between the lookup and the open
+            source = locate_original(path, sha256, cold_dir)
+            if source is None:
+                raise
+            img = Image.open(source)
+        with img:
+            size = img.size
+            # JPEG: decode straight at a reduced scale (still >= the requested size)
+            img.draft("RGB", (ANALYSIS_MAX_SIDE, ANALYSIS_MAX_SIDE))
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            img.thumbnail((ANALYSIS_MAX_SIDE, ANALYSIS_MAX_SIDE))
+            os.makedirs(os.path.dirname(analysis_path), exist_ok=True)
+            _save_jpeg(img, analysis_path, ANALYSIS_QUALITY)
+
+            img.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            _save_jpeg(img, thumbnail_path, THUMBNAIL_QUALITY)
+
+    original_path = move_to_cold_storage(path, sha256, cold_dir)
+    return NormalizedImage(original_path, analysis_path, thumbnail_path, size)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, IMAGE_WORKERS), thread_name_prefix="image-normalize")
+    return _executor
+
+
+def normalize_in_pool(path, sha256, timeout=IMAGE_NORMALIZE_TIMEOUT):
+    """normalize_image in the bounded image pool; waits for the result (and re-raises its errors)."""
+    if IMAGE_WORKERS <= 0:
+        return normalize_image(path, sha256)
+    return _get_executor().submit(normalize_image, path, sha256).result(timeout=timeout)
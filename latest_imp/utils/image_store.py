@@ -0,0 +1,104 @@
+"""
+Content-addressed storage for uploaded photos (meals and ASHA visits).
+
+An upload is streamed to a temporary file in IMAGE_STORE_CHUNK pieces
+while its SHA-256 is computed, then moved to
+
+    <UPLOAD_FOLDER>/images/<h[0:2]>/<h[2:4]>/<h><ext>
+
+where h is the hex digest and ext comes from the image's magic bytes, so
+the path depends on the content alone. The same photo uploaded again (a
+client retry, or two mothers sharing a picture) is stored once; the
+second upload just gets the existing path back with `created=False`.
+Client file names are never used, so "IMG_0001.jpg" from two phones no
+longer collide, and the two-level sharding keeps every directory small.
+
+Files are never deleted here: several documents may reference one file.
+"""
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+
+from config import UPLOAD_FOLDER
+
+IMAGE_STORE_DIR = os.environ.get("IMAGE_STORE_DIR", os.path.join(UPLOAD_FOLDER, "images"))
+IMAGE_STORE_CHUNK = int(os.environ.get("IMAGE_STORE_CHUNK", 64 * 1024))
+
+StoredImage = namedtuple("StoredImage", ["sha256", "path", "size", "created"])
+
+# Leading bytes -> extension; anything else is stored as .bin
+_MAGIC = [
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"BM", ".bmp"),
+]
+
+
+def sniff_extension(head):
+    """File extension for the first bytes of an image."""
+    for magic, ext in _MAGIC:
+        if head.startswith(magic):
+            return ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    if head[4:12] in (b"ftypheic", b"ftypheix", b"ftypmif1"):
+        return ".heic"
+    return ".bin"
+
+
+def image_path(sha256, ext, root=None):
+    """Sharded location of an image in the store."""
+    root = root or IMAGE_STORE_DIR
+    return os.path.join(root, sha256[:2], sha256[2:4], sha256 + ext)
+
+
+def store_image(stream, root=None):
+    """
+    Streams a binary file object into the store and returns a StoredImage.
+    Empty streams raise ValueError.
+    """
+    root = root or IMAGE_STORE_DIR
+    incoming = os.path.join(root, ".incoming")
+    os.makedirs(incoming, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    # Same filesystem as the store, so the final move is an atomic rename
+    fd, tmp_path = tempfile.mkstemp(dir=incoming)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(IMAGE_STORE_CHUNK)
+                if not chunk:
+                    break
+                if len(head) < 16:
+                    head += chunk[:16 - len(head)]
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        if size == 0:
+            raise ValueError("empty upload")
+
+        sha256 = digest.hexdigest()
+        path = image_path(sha256, sniff_extension(head), root)
+        if os.path.exists(path):
+            os.unlink(tmp_path)
+            return StoredImage(sha256, path, size, False)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A concurrent upload of the same bytes may win the rename; the content is identical either way
+        os.replace(tmp_path, path)
+        return StoredImage(sha256, path, size, True)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def store_upload(file_storage, root=None):
+    """store_image for a werkzeug FileStorage (request.files[...])."""
+    return store_image(file_storage.stream, root)
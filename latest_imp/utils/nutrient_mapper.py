@@ -16,48 +16,32 @@ SHORT_TO_LONG_MAP = {
     "folate_ug": "Folate (µg)"
 }
 
-# 2. Maps the recommender's full-name keys to the text query
-#    it expects (e.g., "low in protein").
-#    This is based on your recommender's NUTRIENT_MAP, but reversed.
-LONG_TO_QUERY_MAP = {
-    "Protein (g)": "protein",
-    "Iron (mg)": "iron",
-    "Calcium (mg)": "calcium",
-    "Fats (g)": "fat",
-    "Fibre (g)": "fiber",
-    "Carbohydrates (g)": "carbohydrate",
-    "Free Sugar (g)": "sugar",
-    "Vitamin C (mg)": "vitamin c",
-    "Folate (µg)": "folate"
-    # Note: 'sodium', 'kcal' are missing from your recommender's
-    # original NUTRIENT_MAP, so we can't search for "low in sodium".
-}
-
-def deficits_to_text_query(deficits: dict) -> str:
+def deficit_weights(deficits: dict, targets: dict = None) -> dict:
     """
-    Translates a deficit dictionary (e.g., {"protein_g": 10})
-    into a text string (e.g., "Low in protein").
+    Turns numeric deficits (e.g., {"protein_g": 10, "kcal": 120}) into
+    weights keyed by the recommender's full-name keys, without going
+    through the text query. Every nutrient is kept, including kcal and sodium.
+
+    With `targets` (the plan's values for the same meal), each weight is the
+    gap as a fraction of the target, capped at 1, so a 90% shortfall counts
+    more than a 5% one. Without a target the weight is 1.
     """
-    low_in_terms = []
-    
+    weights = {}
+    targets = targets or {}
+
     for short_key, deficit_amount in deficits.items():
-        # Step 1: "protein_g" -> "Protein (g)"
         long_key = SHORT_TO_LONG_MAP.get(short_key)
-        if not long_key:
+        try:
+            gap = float(deficit_amount)
+        except (TypeError, ValueError):
             continue
-            
-        # Step 2: "Protein (g)" -> "protein"
-        query_term = LONG_TO_QUERY_MAP.get(long_key)
-        if not query_term:
+        if not long_key or gap <= 0:
             continue
-            
-        if query_term not in low_in_terms:
-            low_in_terms.append(query_term)
-            
-    if not low_in_terms:
-        return "" # No deficits found that match the recommender's terms
 
-    # Build the final string: "Low in protein and iron"
-    query = "Low in " + " and ".join(low_in_terms)
-    print(query)
-    return query
\ No newline at end of file
+        try:
+            target = float(targets.get(short_key) or 0)
+        except (TypeError, ValueError):
+            target = 0
+        weights[long_key] = min(gap / target, 1.0) if target > 0 else 1.0
+
+    return weights
@@ -0,0 +1,216 @@
+"""
+Recipe-link lookup with a persistent dish -> link cache.
+
+The catalog only has a few hundred dishes and their recipe links rarely
+change, so each dish is looked up once per TTL and the answer (including
+"No recipe link found.") is kept in a store (Mongo collection or JSON file).
+Providers are pluggable; StaticRecipeLinkProvider is a local stand-in for
+tests and benchmarks.
+"""
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+NO_RECIPE_LINK = "No recipe link found."
+
+
+class RecipeLinkError(Exception):
+    """Raised by a provider when a lookup failed; carries the message shown to the user."""
+
+
+# ----------------------------------------------------------------
+# Providers
+# ----------------------------------------------------------------
+class RecipeLinkProvider:
+    """Looks up a recipe link for a dish. Returns a URL or NO_RECIPE_LINK."""
+
+    name = "base"
+
+    def search(self, dish_name):
+        raise NotImplementedError
+
+
+class GoogleSearchProvider(RecipeLinkProvider):
+    """Google Custom Search API (100 free queries/day)."""
+
+    name = "google_cse"
+
+    def __init__(self, api_key, search_engine_id):
+        self.api_key = api_key
+        self.search_engine_id = search_engine_id
+        self._service = None
+        self._lock = threading.Lock()
+
+    @property
+    def service(self):
+        """The API client, built on first use (googleapiclient is slow to import)."""
+        if self._service is None:
+            with self._lock:
+                if self._service is None:
+                    from googleapiclient.discovery import build
+                    self._service = build("customsearch", "v1", developerKey=self.api_key)
+        return self._service
+
+    def search(self, dish_name):
+        from googleapiclient.errors import HttpError
+
+        try:
+            result = self.service.cse().list(
+                q=f"{dish_name} recipe",
+                cx=self.search_engine_id,
+                num=1
+            ).execute()
+        except HttpError as e:
+            print(f"Error calling Google Search API for '{dish_name}': {e}")
+            if e.resp.status == 429:
+                raise RecipeLinkError("Error: Daily free query limit (100) likely exceeded.")
+            raise RecipeLinkError("Error: API call failed (HttpError).")
+        except Exception as e:
+            print(f"Error during recipe search for '{dish_name}': {e}")
+            raise RecipeLinkError("Error: API call failed (Exception).")
+
+        items = result.get('items', [])
+        if items:
+            return items[0].get('link')
+        return NO_RECIPE_LINK
+
+
+class StaticRecipeLinkProvider(RecipeLinkProvider):
+    """In-memory provider for tests, benchmarks and offline runs."""
+
+    name = "static"
+
+    def __init__(self, links=None, default=NO_RECIPE_LINK):
+        self.links = dict(links or {})
+        self.default = default
+        self.calls = 0
+
+    def search(self, dish_name):
+        self.calls += 1
+        return self.links.get(dish_name, self.default)
+
+
+class UnconfiguredProvider(RecipeLinkProvider):
+    """Used when no search API keys are set."""
+
+    name = "unconfigured"
+
+    def search(self, dish_name):
+        raise RecipeLinkError("Error: Google Search API not configured.")
+
+
+# ----------------------------------------------------------------
+# Stores
+# ----------------------------------------------------------------
+def dish_key(dish_name):
+    return " ".join(str(dish_name).lower().split())
+
+
+class MongoRecipeLinkStore:
+    """Stores one document per dish in a Mongo collection (e.g. recipe_links)."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def get(self, dish_name):
+        try:
+            return self.collection.find_one({"_id": dish_key(dish_name)})
+        except Exception as e:
+            print(f"Error reading recipe link cache: {e}")
+            return None
+
+    def put(self, record):
+        try:
+            self.collection.replace_one({"_id": record["_id"]}, record, upsert=True)
+        except Exception as e:
+            print(f"Error writing recipe link cache: {e}")
+
+
+class JsonFileRecipeLinkStore:
+    """Stores all links in one local JSON file; fine for a single host."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as fh:
+                self._records = json.load(fh)
+        except (FileNotFoundError, ValueError):
+            self._records = {}
+
+    def get(self, dish_name):
+        record = self._records.get(dish_key(dish_name))
+        if record is None:
+            return None
+        return dict(record, fetched_at=datetime.fromisoformat(record["fetched_at"]))
+
+    def put(self, record):
+        with self._lock:
+            self._records[record["_id"]] = dict(record, fetched_at=record["fetched_at"].isoformat())
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(self._records, fh, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+
+
+# ----------------------------------------------------------------
+# Cache
+# ----------------------------------------------------------------
+class RecipeLinkCache:
+    """
+    dish -> recipe link with an in-process layer over a persistent store.
+
+    Found links live for `ttl`; "No recipe link found." answers are cached
+    too, for the shorter `negative_ttl`. Provider errors (quota, network)
+    are returned to the caller but never cached.
+    """
+
+    def __init__(self, provider, store=None, ttl=timedelta(days=30), negative_ttl=timedelta(days=3)):
+        self.provider = provider
+        self.store = store
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, record):
+        if not record:
+            return False
+        ttl = self.ttl if record.get("found") else self.negative_ttl
+        return datetime.utcnow() - record["fetched_at"] < ttl
+
+    def peek(self, dish_name):
+        """Cached link for a dish, or None if it would need a provider call."""
+        key = dish_key(dish_name)
+        record = self._memory.get(key)
+        if not self._fresh(record) and self.store is not None:
+            record = self.store.get(dish_name)
+            if self._fresh(record):
+                with self._lock:
+                    self._memory[key] = record
+        return record["link"] if self._fresh(record) else None
+
+    def get_link(self, dish_name):
+        link = self.peek(dish_name)
+        if link is not None:
+            return link
+
+        try:
+            link = self.provider.search(dish_name) or NO_RECIPE_LINK
+        except RecipeLinkError as e:
+            return str(e)
+
+        record = {
+            "_id": dish_key(dish_name),
+            "dish_name": dish_name,
+            "link": link,
+            "found": link != NO_RECIPE_LINK,
+            "provider": self.provider.name,
+            "fetched_at": datetime.utcnow()
+        }
+        with self._lock:
+            self._memory[record["_id"]] = record
+        if self.store is not None:
+            self.store.put(record)
+        return link
@@ -0,0 +1,89 @@
+"""
+NumPy scoring kernels for the recommender.
+
+Replaces the two scikit-learn pieces the app used (MinMaxScaler and
+cosine_similarity) so workers don't import sklearn/scipy at all:
+
+- minmax_fit / minmax_scale: per-column min-max scaling with the fitted
+  (data_min, data_max) kept by the caller, same arithmetic as MinMaxScaler
+  (constant columns scale to 0, NaNs are ignored when fitting);
+- normalize_rows / cosine_similarity / weighted_dot: float32 kernels;
+- select_top_k: positions of the k best scores, ties broken by the lower
+  position, without sorting the whole array.
+"""
+import numpy as np
+
+
+# ----------------------------------------------------------------
+# Min-max scaling
+# ----------------------------------------------------------------
+def minmax_fit(matrix):
+    """(data_min, data_max) per column, ignoring NaNs, as float64."""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    return np.nanmin(matrix, axis=0), np.nanmax(matrix, axis=0)
+
+
+def minmax_scale(matrix, data_min, data_max):
+    """
+    Scales columns to [0, 1] using fitted params. Values outside the fitted
+    range are not clipped, and a constant column maps to 0 (its range is
+    treated as 1), matching MinMaxScaler.
+    """
+    data_min = np.asarray(data_min, dtype=np.float64)
+    data_range = np.asarray(data_max, dtype=np.float64) - data_min
+    scale = 1.0 / np.where(data_range == 0, 1.0, data_range)
+    # Same operation order as sklearn: X * scale_ + min_
+    return np.asarray(matrix, dtype=np.float64) * scale + (-data_min * scale)
+
+
+# ----------------------------------------------------------------
+# Similarity kernels
+# ----------------------------------------------------------------
+def normalize_rows(matrix):
+    """Rows scaled to unit length in float32; all-zero rows stay zero (similarity 0, like sklearn)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def normalize_vector(vector):
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def weighted_dot(matrix, weights):
+    """matrix @ weights in float32: one score per row (or per row pair for a 2-D weights)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    weights = np.asarray(weights, dtype=np.float32)
+    return matrix @ (weights.T if weights.ndim == 2 else weights)
+
+
+def cosine_similarity(queries, matrix, matrix_normalized=False):
+    """
+    Cosine similarity of every query row against every matrix row
+    (queries x rows), float32. Pass matrix_normalized=True when `matrix`
+    already has unit-length rows (e.g. a similarity index's vectors).
+    """
+    vectors = matrix if matrix_normalized else normalize_rows(matrix)
+    return weighted_dot(normalize_rows(np.atleast_2d(queries)), vectors)
+
+
+# ----------------------------------------------------------------
+# Selection
+# ----------------------------------------------------------------
+def select_top_k(scores, k):
+    """
+    Indices of the k highest scores, best first, ties to the lower index.
+    Uses a partial selection (argpartition) so only the k winners (and any
+    entries tied with the last of them) get sorted.
+    """
+    scores = np.asarray(scores)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, k - 1)[:k]
+    # argpartition picks arbitrarily among entries tied at the boundary
+    top = np.union1d(top, np.flatnonzero(scores == scores[top].min()))
+    return top[np.lexsort((top, -scores[top]))][:k]
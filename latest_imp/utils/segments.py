@@ -0,0 +1,89 @@
+"""
+Recommender segment of a mother: the profile fields dish ranking depends
+on (state, area, diet, income band, cuisine), normalized once at signup
+and stored on the user document as `recommender_segment`.
+
+The signup form offers income as rupee labels ("₹1,00,000 – ₹3,00,000")
+while the dish catalog tags dishes with bands ("1-3L"); INCOME_BANDS maps
+one onto the other so the income filter and boost can actually match.
+
+build_recommender_profile turns a user document into the profile dict
+the recommender, the meal planner and the batch jobs all take.
+"""
+import re
+
+# Signup INCOME_RANGES label -> catalog income band
+INCOME_BANDS = {
+    "< ₹1,00,000": "<1L",
+    "₹1,00,000 – ₹3,00,000": "1-3L",
+    "₹3,00,000 – ₹6,00,000": "3-6L",
+    ">₹6,00,000": ">6L",
+}
+CATALOG_INCOME_BANDS = ["<1L", "1-3L", "3-6L", ">6L"]
+
+_BANDS_LOWER = {band.lower(): band for band in CATALOG_INCOME_BANDS}
+_LABEL_KEY = re.compile(r"[\s,₹]+")
+
+
+def _label_key(label):
+    # Tolerates spacing / dash / comma differences in stored labels
+    return _LABEL_KEY.sub("", label).replace("–", "-").lower()
+
+
+_LABELS = {_label_key(label): band for label, band in INCOME_BANDS.items()}
+
+
+def normalize_income_band(value):
+    """
+    Catalog band(s) for a signup label, a band, or a ','/';'-separated list
+    of bands, joined with ',' (the profile's income_range format).
+    Unknown values are dropped; "" means no income preference.
+    """
+    value = str(value or "")
+    # Labels contain commas themselves ("₹1,00,000"), so try the whole value first
+    if _label_key(value) in _LABELS:
+        return _LABELS[_label_key(value)]
+
+    bands = []
+    for part in re.split(r"[,;]", value):
+        band = _BANDS_LOWER.get(part.strip().lower())
+        if band and band not in bands:
+            bands.append(band)
+    return ",".join(bands)
+
+
+def recommender_segment(state, area, diet, income, cuisine):
+    """Normalized segment dict; the stored form of a mother's ranking context."""
+    area = (area or "").strip().lower()
+    return {
+        "state": (state or "").strip(),
+        "area": area if area in ("rural", "urban", "both") else "both",
+        "diet": (diet or "").strip(),
+        "income_band": normalize_income_band(income),
+        "cuisine": (cuisine or "").strip(),
+    }
+
+
+def segment_from_user(mother_doc):
+    """The stored segment, or one derived from the raw profile fields for users who signed up before it existed."""
+    return mother_doc.get("recommender_segment") or recommender_segment(
+        mother_doc.get("location_state"),
+        mother_doc.get("location_area_type"),
+        mother_doc.get("dietary_preference"),
+        mother_doc.get("income_range"),
+        mother_doc.get("cuisine_preference"),
+    )
+
+
+def build_recommender_profile(mother_doc):
+    """Builds the profile dict the meal recommender expects from a mother's user document."""
+    segment = segment_from_user(mother_doc)
+    return {
+        "mother_id": str(mother_doc["_id"]),  # Used for tracking recommendations
+        "state": segment["state"],
+        "area": segment["area"],
+        "income_range": segment["income_band"],
+        "diet_pref": segment["diet"],
+        "cuisine_pref": segment["cuisine"],
+        "allergies_to_avoid": mother_doc.get("allergies", [])
+    }
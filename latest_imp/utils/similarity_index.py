@@ -0,0 +1,156 @@
+"""
+Cosine-similarity search over dish nutrient vectors.
+
+Two interchangeable indexes, both built once per catalog:
+
+- BruteForceIndex scores every dish (exact; the default for small catalogs).
+- IVFIndex partitions the unit-normalized vectors with spherical k-means
+  and only scores the lists whose centroids are closest to the query
+  (approximate, sub-linear; for catalogs with tens of thousands of dishes).
+
+search(query, k, mask) returns the k most similar dishes among those
+allowed by `mask`, best first, as (dish_ids, scores). The mask is applied
+before the top-k, so filtered-out dishes never take a slot; ties go to the
+lower dish id.
+"""
+import os
+
+import numpy as np
+
+from utils.scoring import normalize_rows, normalize_vector, cosine_similarity, select_top_k
+
+# "auto" picks brute force below IVF_MIN_DISHES, IVF above it
+SIMILARITY_INDEX = os.environ.get("SIMILARITY_INDEX", "auto").lower()
+IVF_MIN_DISHES = int(os.environ.get("IVF_MIN_DISHES", 20000))
+# Lists probed per query, as a fraction of all lists (at least 1)
+IVF_PROBE_FRACTION = float(os.environ.get("IVF_PROBE_FRACTION", 0.1))
+
+KMEANS_ITERATIONS = 15
+KMEANS_TRAIN_PER_LIST = 256
+
+
+def _best(ids, scores, k):
+    """(ids, scores) of the k best, best first; `ids` must be ascending so ties go to the lower id."""
+    top = select_top_k(scores, k)
+    return ids[top], scores[top]
+
+
+class BruteForceIndex:
+    """Exact search: one matrix-vector product over the whole catalog."""
+
+    name = "brute"
+    exact = True
+
+    def __init__(self, matrix, normalized=False):
+        # Already unit rows (e.g. a memory-mapped artifact): used in place, not copied
+        self.vectors = np.asarray(matrix, dtype=np.float32) if normalized else normalize_rows(matrix)
+        if self.vectors.flags.writeable:
+            self.vectors.flags.writeable = False
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def similarities(self, queries):
+        """Cosine similarity of every query row against every dish (queries x dishes)."""
+        return cosine_similarity(queries, self.vectors, matrix_normalized=True)
+
+    def search(self, query, k, mask=None):
+        scores = self.vectors @ normalize_vector(query)
+        if mask is None:
+            return _best(np.arange(len(scores)), scores, k)
+        ids = np.flatnonzero(mask)
+        return _best(ids, scores[ids], k)
+
+
+class IVFIndex(BruteForceIndex):
+    """
+    Inverted-file index: dishes are grouped into `n_lists` clusters and a
+    query only scores the `n_probe` clusters nearest to it. If the probed
+    lists hold fewer than k dishes allowed by the mask, more lists are
+    probed until k are found (or all lists have been searched).
+    """
+
+    name = "ivf"
+    exact = False
+
+    def __init__(self, matrix, normalized=False, n_lists=None, n_probe=None, seed=0):
+        super().__init__(matrix, normalized)
+        n = len(self.vectors)
+        self.n_lists = max(1, min(n, n_lists or int(np.sqrt(n))))
+        self.n_probe = max(1, n_probe or int(np.ceil(self.n_lists * IVF_PROBE_FRACTION)))
+
+        self.centroids = self._train(seed)
+        assignment = self._assign(self.vectors)
+
+        # Dish ids grouped by list, with list i at ids[offsets[i]:offsets[i + 1]]
+        self.ids = np.argsort(assignment, kind="stable")
+        self.offsets = np.searchsorted(assignment[self.ids], np.arange(self.n_lists + 1))
+        self.list_vectors = self.vectors[self.ids]
+
+    def _assign(self, vectors, chunk=65536):
+        labels = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk):
+            labels[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ self.centroids.T, axis=1)
+        return labels
+
+    def _train(self, seed):
+        """Spherical k-means on a sample of the vectors."""
+        rng = np.random.default_rng(seed)
+        n = len(self.vectors)
+        sample_size = min(n, self.n_lists * KMEANS_TRAIN_PER_LIST)
+        sample = self.vectors[rng.choice(n, sample_size, replace=False)]
+
+        self.centroids = sample[rng.choice(sample_size, self.n_lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = self._assign(sample)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, labels, sample)
+            empty = ~sums.any(axis=1)
+            # Re-seed empty clusters with random sample points
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            self.centroids = normalize_rows(sums)
+        return self.centroids
+
+    def search(self, query, k, mask=None):
+        query = normalize_vector(query)
+        list_order = np.argsort(-(self.centroids @ query), kind="stable")
+
+        found_ids, found_scores, found = [], [], 0
+        probed = 0
+        while probed < self.n_lists and (probed < self.n_probe or found < k):
+            step = self.n_probe if probed == 0 else max(1, self.n_probe // 2)
+            for lst in list_order[probed:probed + step]:
+                lo, hi = self.offsets[lst], self.offsets[lst + 1]
+                ids = self.ids[lo:hi]
+                vectors = self.list_vectors[lo:hi]
+                if mask is not None:
+                    keep = mask[ids]
+                    ids, vectors = ids[keep], vectors[keep]
+                if len(ids):
+                    found_ids.append(ids)
+                    found_scores.append(vectors @ query)
+                    found += len(ids)
+            probed += step
+
+        if not found_ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        ids = np.concatenate(found_ids)
+        order = np.argsort(ids)
+        return _best(ids[order], np.concatenate(found_scores)[order], k)
+
+
+SIMILARITY_INDEXES = {"brute": BruteForceIndex, "ivf": IVFIndex}
+
+
+def build_similarity_index(matrix, kind=None, normalized=False):
+    """
+    Builds the index named by `kind` (or SIMILARITY_INDEX); "auto" chooses by
+    catalog size. With normalized=True, `matrix` already has unit-length
+    float32 rows and is kept as is instead of being copied.
+    """
+    kind = (kind or SIMILARITY_INDEX).lower()
+    if kind == "auto":
+        kind = "ivf" if len(matrix) >= IVF_MIN_DISHES else "brute"
+    if kind not in SIMILARITY_INDEXES:
+        raise ValueError(f"Unknown similarity index '{kind}' (expected one of {sorted(SIMILARITY_INDEXES)} or 'auto').")
+    return SIMILARITY_INDEXES[kind](matrix, normalized)
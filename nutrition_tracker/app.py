@@ -32,16 +32,20 @@ def login_required(f):
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME", "nutrition_tracker")
 
-# Create MongoDB client with server API version
-try:
-    mongo_client = MongoClient(MONGO_URI, server_api=ServerApi('1'))
-    # Verify connection with ping
-    mongo_client.admin.command('ping')
-    print("Successfully connected to MongoDB Atlas!")
-    db = mongo_client[DB_NAME]
-except Exception as e:
-    print(f"Error connecting to MongoDB Atlas: {e}")
-    raise
+# Create MongoDB client with server API version; connect=False keeps the
+# import free of network calls (warm_up pings before serving)
+mongo_client = MongoClient(MONGO_URI, server_api=ServerApi('1'), connect=False)
+db = mongo_client[DB_NAME]
+
+
+def warm_up():
+    """Verifies the Atlas connection with a ping; raises if it is unreachable."""
+    try:
+        mongo_client.admin.command('ping')
+        print("Successfully connected to MongoDB Atlas!")
+    except Exception as e:
+        print(f"Error connecting to MongoDB Atlas: {e}")
+        raise
 
 # make db accessible to blueprints via app config
 app.config["DB"] = db
@@ -170,6 +174,7 @@ def history():
     return render_template("history.html", meals=None, mother_id=mother_id)
 
 if __name__ == "__main__":
+    warm_up()
     # Seed demo data if not present
     seed_demo_data(db)
     port = int(os.getenv("PORT", 5000))